@@ -0,0 +1,343 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmark-Suite für Generator, CSV-Speicherung und UI-Aktualisierung.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.run_benchmarks --sizes 100,10000,100000 --output bench.json
+    python -m benchmarks.run_benchmarks --compare alt.json --output neu.json
+
+Die Ergebnisse werden als JSON geschrieben (ein Eintrag pro Messung mit
+min/median/mean in Sekunden). Mit --compare werden sie gegen einen
+früheren Lauf verglichen; Messungen, die um mehr als --threshold langsamer
+geworden sind, werden als Regression gemeldet (Exit-Code 1).
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import modules.challenge_generator as challenge_generator
+import modules.catalog_shards as catalog_shards
+import modules.game_management as game_management
+import modules.game_preferences as game_preferences
+import modules.strafen as strafen
+from modules.csv_handler import load_entries, write_entries
+from modules.catalog_index import CatalogIndex
+from modules.bundle import write_bundle, read_bundle
+from benchmarks.synthetic_catalog import (CATALOG_HEADERS, make_catalog, make_strafen,
+                                          catalog_shape, make_game_vars)
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+def measure(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times),
+            "mean": statistics.mean(times), "repeat": repeat}
+
+@contextlib.contextmanager
+def use_catalog(path, strafen_path=None):
+    # Die Module binden CSV_FILE/STRAFEN_CSV beim Import, daher dort umbiegen
+    patched = [(catalog_shards, "CSV_FILE"), (game_management, "CSV_FILE"),
+               (game_preferences, "CSV_FILE")]
+    old = [(module, name, getattr(module, name)) for module, name in patched]
+    for module, name in patched:
+        setattr(module, name, path)
+    old_strafen = strafen.STRAFEN_CSV
+    if strafen_path is not None:
+        strafen.STRAFEN_CSV = strafen_path
+    try:
+        yield
+    finally:
+        for module, name, value in old:
+            setattr(module, name, value)
+        strafen.STRAFEN_CSV = old_strafen
+
+class FakeTree:
+    """Minimaler Ersatz für ttk.Treeview, wenn kein Display verfügbar ist."""
+    def __init__(self):
+        self.items = {}
+    def get_children(self):
+        return tuple(self.items)
+    def delete(self, *items):
+        for item in items:
+            del self.items[item]
+    def insert(self, parent, index, iid=None, values=()):
+        self.items[iid] = values
+        return iid
+    def item(self, iid, values=()):
+        self.items[iid] = values
+
+def make_tk_root():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return root
+    except Exception:
+        return None
+
+def bench_size(rows, repeat, tmpdir, root, results):
+    games, modes = catalog_shape(rows)
+    entries = make_catalog(rows, games, modes)
+    path = os.path.join(tmpdir, f"catalog_{rows}.csv")
+    strafen_path = os.path.join(tmpdir, f"strafen_{rows}.csv")
+    tag = {"rows": rows, "games": games, "modes": modes}
+    # große Kataloge seltener wiederholen
+    rep = max(1, repeat if rows <= 10000 else repeat // 5)
+
+    results.append({"name": "write_entries", **tag,
+                    **measure(lambda: write_entries(path, entries, CATALOG_HEADERS), rep)})
+    results.append({"name": "load_entries", **tag, **measure(lambda: load_entries(path), rep)})
+    bundle_path = os.path.join(tmpdir, f"catalog_{rows}.wcgb")
+    bundle_strafen = make_strafen(max(10, rows // 100))
+    results.append({"name": "write_bundle", **tag,
+                    **measure(lambda: write_bundle(bundle_path, entries, bundle_strafen), rep)})
+    results.append({"name": "read_bundle", **tag, **measure(lambda: read_bundle(bundle_path), rep)})
+
+    selected = sorted({e["Spiel"] for e in entries})[:min(games, 20)]
+    weights = [1.0] * len(selected)
+    game_vars = make_game_vars(entries, selected)
+    with use_catalog(path, strafen_path):
+        for desired_diff in (10, 100, 1000):
+            for raw_b2b in (0, 5, 10):
+                random.seed(0)
+                results.append({"name": "generate_challenge_logic", **tag,
+                                "desired_diff": desired_diff, "raw_b2b": raw_b2b,
+                                **measure(lambda: challenge_generator.generate_challenge_logic(
+                                    1, desired_diff, selected, weights, game_vars, raw_b2b), rep)})
+
+        strafen.write_strafen(make_strafen(max(10, rows // 100)))
+        results.append({"name": "load_strafen", **tag, **measure(strafen.load_strafen, rep)})
+
+        tree = FakeTree()
+        backend = "fake"
+        if root is not None:
+            from tkinter import ttk
+            tree = ttk.Treeview(root, columns=CATALOG_HEADERS, show="headings")
+            backend = "tk"
+        gm = game_management.GameManager(
+            {"spiel": None, "spielmodus": None, "schwierigkeit": None, "spieleranzahl": None},
+            tree, lambda: None)
+        results.append({"name": "update_entry_tree", **tag, "backend": backend,
+                        **measure(gm.update_entry_tree, rep)})
+        # Suche/Sortierung im Games-Tab: je Tastendruck bzw. Klick ein render()
+        gm.index = CatalogIndex(entries)
+        gm.entries = entries
+        gm.sort_column = None
+        for query in ("s", "spiel00", "modus001"):
+            gm.search_text = query
+            results.append({"name": "games_search", **tag, "query": query, "backend": backend,
+                            **measure(gm.render, rep)})
+        gm.search_text = ""
+        gm.index.order("Schwierigkeit")  # Sortierreihenfolge einmalig aufbauen
+        def sort_click():
+            gm.sort_by("Schwierigkeit")
+        results.append({"name": "games_sort", **tag, "backend": backend, **measure(sort_click, rep)})
+
+        if root is not None:
+            import tkinter as tk
+            frame = tk.Frame(root)
+            game_preferences.game_vars.clear()
+            results.append({"name": "update_game_selection_panel", **tag, "backend": "tk",
+                            **measure(lambda: game_preferences.update_game_selection_panel(frame, root), rep)})
+            frame.destroy()
+            game_preferences.game_vars.clear()
+        else:
+            results.append({"name": "update_game_selection_panel", **tag, "skipped": "kein Display"})
+
+def bench_image(repeat, results):
+    try:
+        from modules.image_utils import create_result_image
+    except ImportError as e:
+        results.append({"name": "create_result_image", "skipped": f"Import fehlgeschlagen: {e}"})
+        return
+    for lines in (10, 100, 1000):
+        text = "\n".join(f"  Spiel{i:04d} (Modus001): 1 win(s) (Summe Schwierigkeit: 5.00)" for i in range(lines))
+        results.append({"name": "create_result_image", "lines": lines,
+                        **measure(lambda: create_result_image(text), repeat)})
+
+def bench_bounded_vs_rejection(repeat, results):
+    """
+    Vergleicht den Modus mit begrenzter Überschreitung mit dem bisherigen
+    Ablauf "Neu generieren, bis es passt" (nur Sampling, ohne CSV-Laden).
+    """
+    entries = make_catalog(2000, 20, 3)
+    selected = sorted({e["Spiel"] for e in entries})[:8]
+    pool = challenge_generator.build_candidate_pool(entries, 1, selected, [1.0] * len(selected),
+                                                    make_game_vars(entries, selected))
+    runs = 20 * repeat
+    max_attempts = 10000
+    for desired_diff in (20, 100):
+        for raw_b2b in (0, 5):
+            for tolerance in (0.5, 2.0):
+                random.seed(0)
+                bounded = measure(lambda: challenge_generator.sample_segments_bounded(
+                    *pool, desired_diff, raw_b2b, tolerance), runs)
+                attempts = []
+                def rejection():
+                    for attempt in range(1, max_attempts + 1):
+                        _, total = challenge_generator.sample_segments(*pool, desired_diff, raw_b2b)
+                        if total - desired_diff <= tolerance:
+                            break
+                    attempts.append(attempt)
+                random.seed(0)
+                rejected = measure(rejection, runs)
+                tag = {"desired_diff": desired_diff, "raw_b2b": raw_b2b, "tolerance": tolerance}
+                results.append({"name": "bounded_overshoot", **tag, **bounded})
+                results.append({"name": "rejection_regenerate", **tag, **rejected,
+                                "mean_attempts": statistics.mean(attempts),
+                                "capped": sum(a == max_attempts for a in attempts),
+                                "speedup_bounded": rejected["mean"] / bounded["mean"]})
+
+def check_bounded_window(results, seeds=200):
+    """
+    Regressionsprüfung für den Modus mit begrenzter Überschreitung: auf dem
+    synthetischen Katalog (Schwierigkeiten in Zehnteln, jede Summe ab 0.5
+    erreichbar) muss jede Challenge in [desired_diff, desired_diff + tolerance]
+    landen, auch mit tolerance 0. Gibt die Anzahl der Fehltreffer zurück.
+    """
+    entries = make_catalog(2000, 20, 3)
+    selected = sorted({e["Spiel"] for e in entries})[:8]
+    pool = challenge_generator.build_candidate_pool(entries, 1, selected, [1.0] * len(selected),
+                                                    make_game_vars(entries, selected))
+    for desired_diff in (20, 37, 100):
+        for raw_b2b in (0, 5):
+            for tolerance in (0, 0.5):
+                misses = 0
+                for seed in range(seeds):
+                    _, total = challenge_generator.sample_segments_bounded(
+                        *pool, desired_diff, raw_b2b, tolerance, rng=random.Random(seed))
+                    if not desired_diff - 1e-9 <= total <= desired_diff + tolerance + 1e-9:
+                        misses += 1
+                results.append({"name": "bounded_window", "desired_diff": desired_diff, "raw_b2b": raw_b2b,
+                                "tolerance": tolerance, "runs": seeds, "misses": misses})
+    return sum(r["misses"] for r in results if r["name"] == "bounded_window")
+
+def bench_runs_to_precision(results, precision=0.005, max_runs=64000):
+    """
+    Anzahl Läufe (und Zeit), bis das 95-%-Konfidenzintervall der erwarteten
+    Win-Anzahl höchstens +-precision (relativ) breit ist, für unabhängige,
+    gespiegelte und stratifizierte Läufe. Die Läufe werden verdoppelt, bis
+    die Genauigkeit erreicht ist.
+    """
+    entries = make_catalog(2000, 20, 3)
+    selected = sorted({e["Spiel"] for e in entries})[:8]
+    pool = challenge_generator.build_candidate_pool(entries, 1, selected, [1.0] * len(selected),
+                                                    make_game_vars(entries, selected))
+    for desired_diff in (20, 100):
+        for raw_b2b in (0, 5):
+            naive_runs = None
+            for method in challenge_generator.SIMULATION_METHODS:
+                runs = 250
+                start = time.perf_counter()
+                while True:
+                    stats = challenge_generator.simulate_challenges(pool, desired_diff, raw_b2b, runs, method, seed=0)
+                    mean, error = stats["wins"]
+                    if 1.96 * error <= precision * mean or runs >= max_runs:
+                        break
+                    runs *= 2
+                entry = {"name": "runs_to_precision", "method": method, "desired_diff": desired_diff,
+                         "raw_b2b": raw_b2b, "runs": stats["runs"], "seconds": time.perf_counter() - start,
+                         "reached": 1.96 * error <= precision * mean}
+                if method == "naive":
+                    naive_runs = stats["runs"]
+                else:
+                    entry["runs_saved"] = naive_runs / stats["runs"]
+                results.append(entry)
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    def key(r):
+        return tuple(sorted((k, v) for k, v in r.items()
+                            if k not in ("min", "median", "mean", "repeat", "mean_attempts",
+                                         "capped", "speedup_bounded")))
+    old = {key(r): r for r in baseline if "median" in r}
+    regressions = []
+    for r in results:
+        prev = old.get(key(r))
+        if prev is None or "median" not in r:
+            continue
+        ratio = r["median"] / prev["median"] if prev["median"] > 0 else 1.0
+        r["baseline_median"] = prev["median"]
+        r["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(r)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks für den Win Challenge Generator")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Kataloggrößen, kommagetrennt (bis 1000000)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="früheres Ergebnis-JSON zum Vergleich")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="erlaubte Verlangsamung gegenüber --compare (0.2 = 20 %%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    root = make_tk_root()
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for rows in sizes:
+            print(f"Katalog mit {rows} Zeilen ...", file=sys.stderr)
+            bench_size(rows, args.repeat, tmpdir, root, results)
+    bench_image(args.repeat, results)
+    bench_bounded_vs_rejection(args.repeat, results)
+    window_misses = check_bounded_window(results)
+    bench_runs_to_precision(results)
+    if root is not None:
+        root.destroy()
+
+    regressions = compare(results, args.compare, args.threshold) if args.compare else []
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for r in results:
+        if "skipped" in r:
+            print(f"{r['name']:<30} übersprungen: {r['skipped']}")
+            continue
+        if r["name"] == "runs_to_precision":
+            saved = f"  ({r['runs_saved']:.1f}x weniger Läufe)" if "runs_saved" in r else ""
+            print(f"{r['name']:<30} {r['method']:<11} desired_diff={r['desired_diff']} raw_b2b={r['raw_b2b']:<3} "
+                  f"{r['runs']:>6} Läufe {r['seconds'] * 1000:10.1f} ms{saved}")
+            continue
+        if r["name"] == "bounded_window":
+            print(f"{r['name']:<30} desired_diff={r['desired_diff']} raw_b2b={r['raw_b2b']} "
+                  f"tolerance={r['tolerance']:<4} {r['misses']} von {r['runs']} außerhalb des Fensters")
+            continue
+        extra = " ".join(f"{k}={r[k]}" for k in ("rows", "desired_diff", "raw_b2b", "tolerance", "lines", "query", "backend")
+                         if k in r)
+        ratio = f"  x{r['ratio']:.2f}" if "ratio" in r else ""
+        if "speedup_bounded" in r:
+            ratio += f"  ({r['mean_attempts']:.1f} Versuche, begrenzt {r['speedup_bounded']:.1f}x schneller)"
+        print(f"{r['name']:<30} {extra:<45} median {r['median'] * 1000:10.3f} ms{ratio}")
+    if regressions:
+        print(f"\n{len(regressions)} Regression(en) über {args.threshold:.0%}:")
+        for r in regressions:
+            print(f"  {r['name']} x{r['ratio']:.2f}")
+        return 1
+    if window_misses:
+        print(f"\n{window_misses} Challenge(s) außerhalb von [desired_diff, desired_diff + tolerance]")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+# benchmarks/synthetic_catalog.py
+import random
+
+CATALOG_HEADERS = ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"]
+
+def make_catalog(rows, games, modes_per_game, seed=0):
+    """
+    Erzeugt einen synthetischen Katalog mit rows Einträgen, verteilt auf
+    games Spiele mit je modes_per_game Spielmodi.
+    """
+    rng = random.Random(seed)
+    game_names = [f"Spiel{g:04d}" for g in range(games)]
+    mode_names = [f"Modus{m:03d}" for m in range(modes_per_game)]
+    entries = []
+    for i in range(rows):
+        entries.append({
+            "Spiel": game_names[i % games],
+            "Spielmodus": mode_names[(i // games) % modes_per_game],
+            "Schwierigkeit": round(rng.uniform(0.5, 10.0), 1),
+            "Spieleranzahl": rng.randint(1, 5),
+        })
+    return entries
+
+def make_strafen(count, seed=0):
+    rng = random.Random(seed)
+    return [{"Name": f"Strafe {i}", "Wahrscheinlichkeit": round(rng.uniform(0.05, 0.9), 2),
+             "Beschreibung": f"Beschreibung der Strafe {i}"} for i in range(count)]
+
+def catalog_shape(rows):
+    # Anzahl Spiele/Modi wächst mit der Kataloggröße, bleibt aber realistisch
+    games = max(5, min(2000, rows // 50))
+    modes = max(2, min(20, rows // (games * 5) or 2))
+    return games, modes
+
+def make_game_vars(entries, selected_games):
+    # Schlanke Variante von game_preferences.game_vars ohne Tk-Variablen
+    modes = {}
+    for e in entries:
+        modes.setdefault(e["Spiel"], set()).add(e["Spielmodus"])
+    return {game: {"allowed_modes": modes.get(game, set()), "available_modes": modes.get(game, set())}
+            for game in selected_games}
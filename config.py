@@ -1,3 +1,61 @@
 # config.py
 CSV_FILE = "win_challenges.csv"
 STRAFEN_CSV = "strafen.csv"
+
+# Bild-Export
+EXPORT_DIR = "exports"
+EXPORT_FORMAT = "png"  # png, jpg oder webp
+EXPORT_WORKERS = 4
+
+# Persistente Challenge-Sessions
+SESSION_DIR = "sessions"
+SESSION_COMPACT_EVENTS = 200  # Log wird nach so vielen Ereignissen in den Snapshot eingefaltet
+
+# Profiling (alternativ über die Umgebungsvariable WCG_PROFILE=1 bzw. WCG_PROFILE=cprofile)
+PROFILING_ENABLED = False
+PROFILE_OUTPUT = "profile_stats"  # .json für Statistik, .prof für cProfile
+
+# Wiederholungen vermeiden (Recency-Gewichtung)
+RECENCY_FILE = "recency.json"
+RECENCY_DECAY = 0.5     # Abklingfaktor der Hitze pro Generierung
+RECENCY_STRENGTH = 1.0  # Gewicht eines Eintrags = Basisgewicht * exp(-Stärke * Hitze)
+
+# Best-of-K: mehrere Kandidaten erzeugen und den bestbewerteten nehmen
+BEST_OF_WORKERS = None    # Anzahl Worker-Prozesse, None = Anzahl CPU-Kerne
+BEST_OF_BATCH = 25        # Kandidaten pro Auftrag an einen Worker
+BEST_OF_THRESHOLD = 0.95  # ab diesem Score wird vorzeitig abgebrochen
+BEST_OF_SCORE_WEIGHTS = {"closeness": 0.5, "diversity": 0.3, "b2b": 0.2}
+
+# Externe Änderungen an win_challenges.csv / strafen.csv übernehmen
+FILE_WATCH_ENABLED = True
+FILE_WATCH_INTERVAL = 1.0  # Sekunden zwischen zwei Prüfungen, falls inotify nicht verfügbar ist
+
+# Games-Tab: Treffer von Suche/Sortierung seitenweise anzeigen
+GAMES_PAGE_SIZE = 500
+
+# Gespeicherte Spielauswahl (Presets)
+PRESETS_FILE = "presets.json"
+
+# Größte zulässige Toleranz über der Zielschwierigkeit (Schwierigkeitspunkte)
+MAX_TOLERANCE = 100.0
+
+# Live-Vorschau im Generator-Tab
+PREVIEW_DEBOUNCE_MS = 250
+
+# Ergebnistext: so viele Zeilen pro after()-Schritt in die Textfelder einfügen
+RESULT_CHUNK_LINES = 200
+
+# Verlauf aller generierten Challenges (SQLite)
+HISTORY_DB = "history.sqlite3"
+HISTORY_VIEW_LIMIT = 200  # so viele Challenges zeigt der Verlauf-Tab
+HISTORY_BUCKET = 5        # Breite der Schwierigkeitsbereiche in der Auswertung
+
+# Bundle-Datei (Katalog + Strafen) zum Weitergeben
+BUNDLE_EXTENSION = ".wcgb"
+
+# Weitere Kataloge (Shards) als CSV-Dateien; werden erst bei Auswahl eines ihrer Spiele geladen
+CATALOG_DIR = "catalogs"
+CATALOG_MANIFEST = "manifest.json"  # in CATALOG_DIR, Spiele/Modi je Shard
+
+# Strafen: Anteil der (Win, Spieler)-Slots, die beim Generieren eine Strafe bekommen
+STRAFEN_CHANCE = 0.3
@@ -1,207 +1,696 @@
 # main.py
 import tkinter as tk
-from tkinter import ttk, messagebox
-from modules.csv_handler import ensure_csv_exists
-from config import CSV_FILE, STRAFEN_CSV
+from tkinter import ttk, messagebox, simpledialog, filedialog
+from modules.csv_handler import ensure_csv_exists, load_entries, export_bundle, import_bundle
+import os
+import time
+from config import (CSV_FILE, STRAFEN_CSV, FILE_WATCH_ENABLED, MAX_TOLERANCE, BUNDLE_EXTENSION, HISTORY_VIEW_LIMIT,
+                    HISTORY_BUCKET)
 from modules.game_management import GameManager
-from modules.game_preferences import update_game_selection_panel, game_vars
+from modules.catalog_index import CatalogIndex
+from modules.game_preferences import (update_game_selection_panel, sync_game_selection_panel, game_vars,
+                                     mode_change_listeners)
 from modules.challenge_generator import generate_challenge_logic
-from modules.gui_components import open_result_window
-from modules.image_utils import export_result_as_image, copy_image_to_clipboard
-from modules.strafen import load_strafen, write_strafen, ensure_strafen_csv
-
-# Sicherstellen, dass die CSV-Dateien existieren
-ensure_csv_exists(CSV_FILE, ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"])
-ensure_strafen_csv()
-selected_strafe_index = None
-
-root = tk.Tk()
-root.title("Win Challenge Generator")
-root.geometry("900x600")
-root.configure(bg="#2B2B2B")
-
-style = ttk.Style(root)
-style.theme_use("clam")
-style.configure("TFrame", background="#2B2B2B")
-style.configure("TLabel", background="#2B2B2B", foreground="#FFFFFF", font=("Segoe UI", 12))
-style.configure("TButton", font=("Segoe UI", 12), padding=5)
-style.map("TButton", background=[("active", "#357ABD")], foreground=[("active", "#FFFFFF")])
-
-notebook = ttk.Notebook(root)
-notebook.pack(fill="both", expand=True, padx=10, pady=10)
-
-# ----- Tab 1: Challenge Generator -----
-tab_gen = ttk.Frame(notebook)
-notebook.add(tab_gen, text="Challenge Generator")
-
-ttk.Label(tab_gen, text="Anzahl Spieler:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-combo_num_players = ttk.Combobox(tab_gen, values=["1", "2", "3", "4", "5"], state="readonly", width=5, font=("Segoe UI", 12))
-combo_num_players.current(0)
-combo_num_players.grid(row=0, column=1, padx=5, pady=5, sticky="w")
-
-ttk.Label(tab_gen, text="Gewünschte Schwierigkeit:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
-entry_desired_diff = ttk.Entry(tab_gen, font=("Segoe UI", 12))
-entry_desired_diff.grid(row=1, column=1, padx=5, pady=5, sticky="w")
-
-ttk.Label(tab_gen, text="Back-to-Back Wahrscheinlichkeit (0 = keine, 10 = ausschließlich):").grid(row=2, column=0, padx=5, pady=5, sticky="w")
-spin_b2b = ttk.Spinbox(tab_gen, from_=0, to=10, width=5, font=("Segoe UI", 12))
-spin_b2b.set(1)
-spin_b2b.grid(row=2, column=1, padx=5, pady=5, sticky="w")
-
-ttk.Label(tab_gen, text="Wähle die Spiele aus:").grid(row=3, column=0, padx=5, pady=5, sticky="w")
-frame_games = tk.Frame(tab_gen, bg="#2B2B2B")
-frame_games.grid(row=4, column=0, columnspan=2, sticky="nsew", padx=5, pady=5)
-canvas_games = tk.Canvas(frame_games, bg="#2B2B2B", highlightthickness=0)
-canvas_games.pack(side="left", fill="both", expand=True)
-scrollbar_games = ttk.Scrollbar(frame_games, orient="vertical", command=canvas_games.yview)
-scrollbar_games.pack(side="right", fill="y")
-frame_games_inner = tk.Frame(canvas_games, bg="#2B2B2B")
-canvas_games.create_window((0, 0), window=frame_games_inner, anchor="nw")
-frame_games_inner.bind("<Configure>", lambda e: canvas_games.configure(scrollregion=canvas_games.bbox("all")))
-update_game_selection_panel(frame_games_inner, root)
-
-ttk.Button(tab_gen, text="Challenge generieren", command=lambda: on_generate_challenge()).grid(row=5, column=0, columnspan=2, padx=5, pady=10)
-
-text_result = tk.Text(tab_gen, height=15, width=60, state="disabled", bg="#1E1E1E", fg="#DCDCDC", font=("Segoe UI", 12))
-text_result.grid(row=6, column=0, columnspan=2, padx=5, pady=5, sticky="wens")
-scrollbar_text = ttk.Scrollbar(tab_gen, orient="vertical", command=text_result.yview)
-text_result.configure(yscrollcommand=scrollbar_text.set)
-scrollbar_text.grid(row=6, column=2, sticky="ns")
-
-challenge_data = None  # Global zum Speichern der Challenge-Daten
-
-def on_generate_challenge():
-    try:
-        num_players = int(combo_num_players.get())
-    except ValueError:
-        messagebox.showerror("Fehler", "Bitte wähle eine Anzahl an Spielern aus.")
-        return
-    desired_diff_str = entry_desired_diff.get().strip()
-    if not desired_diff_str:
-        messagebox.showerror("Fehler", "Bitte gewünschte Schwierigkeit eingeben.")
-        return
-    try:
-        desired_diff = float(desired_diff_str)
-        if desired_diff <= 0:
-            raise ValueError
-    except ValueError:
-        messagebox.showerror("Fehler", "Gewünschte Schwierigkeit muss eine Zahl > 0 sein.")
-        return
-    selected_game_list = []
-    weights = []
-    for game, vars in game_vars.items():
-        if vars["selected"].get():
-            selected_game_list.append(game)
+from modules.best_of_k import generate_best_of_k
+from modules.preview import PreviewModel, LivePreview
+from modules.gui_components import open_result_window, stream_text
+from modules import presets
+from modules import history
+from modules.image_utils import export_result_as_image, copy_image_to_clipboard, export_batch, when_done
+from modules.strafen import load_strafen, write_strafen, ensure_strafen_csv, schedule_strafen
+from modules import profiling
+from modules.profiling import instrument
+from modules.timer import format_elapsed
+from modules.session_log import load_open_sessions
+from modules.catalog_shards import shards, catalog_entries
+from concurrent.futures import ThreadPoolExecutor
+
+def main():
+    # Sicherstellen, dass die CSV-Dateien existieren
+    ensure_csv_exists(CSV_FILE, ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"])
+    ensure_strafen_csv()
+    # Manifest der Katalog-Shards einlesen (Einträge werden erst bei Auswahl geladen)
+    shards.scan()
+    selected_strafe_index = None
+
+    root = tk.Tk()
+    root.title("Win Challenge Generator")
+    root.geometry("900x600")
+    root.configure(bg="#2B2B2B")
+
+    style = ttk.Style(root)
+    style.theme_use("clam")
+    style.configure("TFrame", background="#2B2B2B")
+    style.configure("TLabel", background="#2B2B2B", foreground="#FFFFFF", font=("Segoe UI", 12))
+    style.configure("TButton", font=("Segoe UI", 12), padding=5)
+    style.map("TButton", background=[("active", "#357ABD")], foreground=[("active", "#FFFFFF")])
+
+    notebook = ttk.Notebook(root)
+    notebook.pack(fill="both", expand=True, padx=10, pady=10)
+
+    # ----- Tab 1: Challenge Generator -----
+    tab_gen = ttk.Frame(notebook)
+    notebook.add(tab_gen, text="Challenge Generator")
+
+    ttk.Label(tab_gen, text="Anzahl Spieler:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+    combo_num_players = ttk.Combobox(tab_gen, values=["1", "2", "3", "4", "5"], state="readonly", width=5, font=("Segoe UI", 12))
+    combo_num_players.current(0)
+    combo_num_players.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+
+    ttk.Label(tab_gen, text="Gewünschte Schwierigkeit:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+    entry_desired_diff = ttk.Entry(tab_gen, font=("Segoe UI", 12))
+    entry_desired_diff.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+
+    ttk.Label(tab_gen, text="Back-to-Back Wahrscheinlichkeit (0 = keine, 10 = ausschließlich):").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+    spin_b2b = ttk.Spinbox(tab_gen, from_=0, to=10, width=5, font=("Segoe UI", 12))
+    spin_b2b.set(1)
+    spin_b2b.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+
+    ttk.Label(tab_gen, text="Toleranz über Zielschwierigkeit (optional):").grid(row=3, column=0, padx=5, pady=5, sticky="w")
+    entry_tolerance = ttk.Entry(tab_gen, font=("Segoe UI", 12))
+    entry_tolerance.grid(row=3, column=1, padx=5, pady=5, sticky="w")
+
+    ttk.Label(tab_gen, text="Wähle die Spiele aus:").grid(row=4, column=0, padx=5, pady=5, sticky="w")
+    frame_presets = ttk.Frame(tab_gen)
+    frame_presets.grid(row=4, column=1, padx=5, pady=5, sticky="w")
+    ttk.Label(frame_presets, text="Preset:").pack(side="left")
+    combo_preset = ttk.Combobox(frame_presets, state="readonly", width=20, font=("Segoe UI", 12))
+    combo_preset.pack(side="left", padx=5)
+    ttk.Button(frame_presets, text="Speichern", command=lambda: on_save_preset()).pack(side="left", padx=2)
+    ttk.Button(frame_presets, text="Löschen", command=lambda: on_delete_preset()).pack(side="left", padx=2)
+    frame_games = tk.Frame(tab_gen, bg="#2B2B2B")
+    frame_games.grid(row=5, column=0, columnspan=2, sticky="nsew", padx=5, pady=5)
+    canvas_games = tk.Canvas(frame_games, bg="#2B2B2B", highlightthickness=0)
+    canvas_games.pack(side="left", fill="both", expand=True)
+    scrollbar_games = ttk.Scrollbar(frame_games, orient="vertical", command=canvas_games.yview)
+    scrollbar_games.pack(side="right", fill="y")
+    frame_games_inner = tk.Frame(canvas_games, bg="#2B2B2B")
+    canvas_games.create_window((0, 0), window=frame_games_inner, anchor="nw")
+    frame_games_inner.bind("<Configure>", lambda e: canvas_games.configure(scrollregion=canvas_games.bbox("all")))
+    update_game_selection_panel(frame_games_inner, root)
+
+    frame_gen_buttons = ttk.Frame(tab_gen)
+    frame_gen_buttons.grid(row=6, column=0, columnspan=2, padx=5, pady=10)
+    var_avoid_repeats = tk.BooleanVar(value=False)
+    ttk.Checkbutton(frame_gen_buttons, text="Wiederholungen vermeiden", variable=var_avoid_repeats).pack(side="left", padx=5)
+    var_schedule_strafen = tk.BooleanVar(value=False)
+    ttk.Checkbutton(frame_gen_buttons, text="Strafen einplanen", variable=var_schedule_strafen).pack(side="left", padx=5)
+    ttk.Label(frame_gen_buttons, text="Kandidaten:").pack(side="left", padx=(5, 0))
+    spin_candidates = ttk.Spinbox(frame_gen_buttons, from_=1, to=1000, width=5, font=("Segoe UI", 12))
+    spin_candidates.set(1)
+    spin_candidates.pack(side="left", padx=5)
+    ttk.Button(frame_gen_buttons, text="Challenge generieren", command=lambda: on_generate_challenge()).pack(side="left", padx=5)
+    ttk.Button(frame_gen_buttons, text="Vorschau berechnen", command=lambda: on_preview()).pack(side="left", padx=5)
+
+    label_preview = ttk.Label(tab_gen, text="", font=("Segoe UI", 10))
+    label_preview.grid(row=7, column=0, columnspan=2, padx=5, pady=2, sticky="w")
+
+    text_result = tk.Text(tab_gen, height=15, width=60, state="disabled", bg="#1E1E1E", fg="#DCDCDC", font=("Segoe UI", 12))
+    text_result.grid(row=8, column=0, columnspan=2, padx=5, pady=5, sticky="wens")
+    scrollbar_text = ttk.Scrollbar(tab_gen, orient="vertical", command=text_result.yview)
+    text_result.configure(yscrollcommand=scrollbar_text.set)
+    scrollbar_text.grid(row=8, column=2, sticky="ns")
+
+    challenge_data = None  # Global zum Speichern der Challenge-Daten
+    saved_presets = presets.load_presets()
+    active_preset = None  # Name des zuletzt geladenen Presets
+
+    def refresh_preset_list():
+        combo_preset["values"] = sorted(saved_presets)
+
+    def current_num_players():
+        try:
+            return int(combo_num_players.get())
+        except ValueError:
+            return 1
+
+    def on_preset_selected(event=None):
+        nonlocal active_preset
+        name = combo_preset.get()
+        if name not in saved_presets:
+            return
+        missing = presets.apply_preset(saved_presets[name], game_vars)
+        active_preset = name
+        for game in game_vars:
+            preview_model.update_game(game, game_vars, modes_changed=True)
+        live_preview.schedule()
+        if missing:
+            messagebox.showwarning("Preset", "Nicht mehr im Katalog: " + ", ".join(missing))
+        presets.warm_plans({name: saved_presets[name]}, current_num_players())
+
+    def on_save_preset():
+        nonlocal active_preset
+        name = simpledialog.askstring("Preset speichern", "Name des Presets:", initialvalue=combo_preset.get(), parent=root)
+        if not name or not name.strip():
+            return
+        name = name.strip()
+        saved_presets[name] = presets.capture_preset(game_vars)
+        presets.save_presets(saved_presets)
+        presets.forget_plan(name)
+        active_preset = name
+        refresh_preset_list()
+        combo_preset.set(name)
+        presets.warm_plans({name: saved_presets[name]}, current_num_players())
+
+    def on_delete_preset():
+        nonlocal active_preset
+        name = combo_preset.get()
+        if name not in saved_presets or not messagebox.askyesno("Preset löschen", f"Preset '{name}' löschen?"):
+            return
+        del saved_presets[name]
+        presets.save_presets(saved_presets)
+        presets.forget_plan(name)
+        if active_preset == name:
+            active_preset = None
+        refresh_preset_list()
+        combo_preset.set("")
+
+    def active_plan(num_players):
+        # Vorkompilierter Plan nur, solange die Auswahl noch dem geladenen Preset entspricht
+        if active_preset is None or active_preset not in saved_presets:
+            return None
+        preset = saved_presets[active_preset]
+        if not presets.preset_matches(preset, game_vars):
+            return None
+        return presets.get_plan(active_preset, preset, num_players)
+
+    combo_preset.bind("<<ComboboxSelected>>", on_preset_selected)
+    refresh_preset_list()
+    presets.warm_plans(saved_presets, current_num_players())
+
+    # Best-of-K läuft in einem Hintergrundthread (der auf den Prozess-Pool wartet),
+    # das Ergebnis wird per when_done im Tk-Thread übernommen
+    search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="best-of-k")
+    search_state = {"future": None}
+
+    def on_generate_challenge():
+        if search_state["future"] is not None:
+            label_preview.config(text="Kandidatensuche läuft noch…")
+            return
+        if shards_pending():
+            # Erst generieren, wenn die Shards der Auswahl geladen sind (lädt nur update_loaded_shards)
+            if not shard_update["generate_waiting"]:
+                shard_update["generate_waiting"] = True
+                label_preview.config(text="Katalog wird geladen…")
+                root.after(30, generate_when_shards_loaded)
+            return
+        try:
+            num_players = int(combo_num_players.get())
+        except ValueError:
+            messagebox.showerror("Fehler", "Bitte wähle eine Anzahl an Spielern aus.")
+            return
+        desired_diff_str = entry_desired_diff.get().strip()
+        if not desired_diff_str:
+            messagebox.showerror("Fehler", "Bitte gewünschte Schwierigkeit eingeben.")
+            return
+        try:
+            desired_diff = float(desired_diff_str)
+            if desired_diff <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Fehler", "Gewünschte Schwierigkeit muss eine Zahl > 0 sein.")
+            return
+        tolerance_str = entry_tolerance.get().strip()
+        tolerance = None
+        if tolerance_str:
             try:
-                weights.append(float(vars["weight"].get()))
+                tolerance = float(tolerance_str)
+                if not (0 <= tolerance <= MAX_TOLERANCE):
+                    raise ValueError
             except ValueError:
-                weights.append(1.0)
-    if not selected_game_list:
-        messagebox.showerror("Fehler", "Bitte wähle mindestens ein Spiel aus.")
-        return
-    raw_b2b = int(spin_b2b.get())
-    data = generate_challenge_logic(num_players, desired_diff, selected_game_list, weights, game_vars, raw_b2b)
-    if data is None:
-        messagebox.showerror("Fehler", "Keine passenden Einträge gefunden.")
-        return
-    global challenge_data
-    challenge_data = data
-    text_result.config(state="normal")
-    text_result.delete("1.0", "end")
-    text_result.insert("end", data["result"])
-    text_result.config(state="disabled")
-    from modules.gui_components import open_result_window
-    open_result_window(root, data, on_generate_challenge)
-
-# ----- Tab 2: Games -----
-tab_entries = ttk.Frame(notebook)
-notebook.add(tab_entries, text="Games")
+                messagebox.showerror("Fehler", f"Toleranz muss eine Zahl zwischen 0 und {MAX_TOLERANCE:g} sein.")
+                return
+        selected_game_list = []
+        weights = []
+        for game, vars in game_vars.items():
+            if vars["selected"].get():
+                selected_game_list.append(game)
+                try:
+                    weights.append(float(vars["weight"].get()))
+                except ValueError:
+                    weights.append(1.0)
+        if not selected_game_list:
+            messagebox.showerror("Fehler", "Bitte wähle mindestens ein Spiel aus.")
+            return
+        raw_b2b = int(spin_b2b.get())
+        try:
+            candidates = max(1, int(spin_candidates.get()))
+        except ValueError:
+            candidates = 1
+        plan = active_plan(num_players)
+        if candidates > 1:
+            # game_vars enthält Tk-Variablen: dem Thread nur eine Kopie der übrigen Werte geben
+            search_vars = {g: {k: v for k, v in game_vars[g].items() if k not in ("selected", "weight")}
+                           for g in selected_game_list}
+            future = search_state["future"] = search_executor.submit(
+                generate_best_of_k, num_players, desired_diff, selected_game_list, weights, search_vars, raw_b2b,
+                candidates, tolerance, avoid_repeats=var_avoid_repeats.get(), plan=plan)
+            label_preview.config(text=f"Suche den besten von {candidates} Kandidaten…")
+            when_done(root, future, lambda f: on_best_of_k_done(f, num_players))
+            return
+        data = generate_challenge_logic(num_players, desired_diff, selected_game_list, weights, game_vars, raw_b2b, tolerance,
+                                        avoid_repeats=var_avoid_repeats.get(), plan=plan)
+        finish_generation(data, num_players)
 
-from modules.game_management import GameManager
-tree_entries = ttk.Treeview(tab_entries, columns=("Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"), show="headings")
-for col in ("Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"):
-    tree_entries.heading(col, text=col)
-tree_entries.grid(row=0, column=0, columnspan=3, padx=5, pady=5, sticky="wens")
-
-ttk.Label(tab_entries, text="Spiel:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
-entry_spiel = ttk.Entry(tab_entries, font=("Segoe UI", 12))
-entry_spiel.grid(row=1, column=1, padx=5, pady=5)
-
-ttk.Label(tab_entries, text="Spielmodus:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
-entry_spielmodus = ttk.Entry(tab_entries, font=("Segoe UI", 12))
-entry_spielmodus.grid(row=2, column=1, padx=5, pady=5)
-
-ttk.Label(tab_entries, text="Schwierigkeit (0-10):").grid(row=3, column=0, padx=5, pady=5, sticky="w")
-entry_schwierigkeit = ttk.Entry(tab_entries, font=("Segoe UI", 12))
-entry_schwierigkeit.grid(row=3, column=1, padx=5, pady=5)
-
-ttk.Label(tab_entries, text="Spieleranzahl:").grid(row=4, column=0, padx=5, pady=5, sticky="w")
-entry_spieler = ttk.Entry(tab_entries, font=("Segoe UI", 12))
-entry_spieler.grid(row=4, column=1, padx=5, pady=5)
-
-gm = GameManager(
-    {"spiel": entry_spiel, "spielmodus": entry_spielmodus, "schwierigkeit": entry_schwierigkeit, "spieleranzahl": entry_spieler},
-    tree_entries,
-    lambda: update_game_selection_panel(frame_games_inner, root)
-)
-gm.update_entry_tree()
-
-# Hier den Double-Click binden:
-tree_entries.bind("<Double-1>", gm.on_treeview_double_click)
-
-ttk.Button(tab_entries, text="Eintrag hinzufügen", command=gm.add_entry).grid(row=5, column=0, columnspan=2, padx=5, pady=5)
-ttk.Button(tab_entries, text="Eintrag aktualisieren", command=gm.update_entry_in_csv).grid(row=6, column=0, columnspan=2, padx=5, pady=5)
-ttk.Button(tab_entries, text="Eintrag löschen", command=gm.delete_entry).grid(row=7, column=0, columnspan=2, padx=5, pady=5)
-
-# ----- Tab 3: Strafen ein -----
-tab_strafen = ttk.Frame(notebook)
-notebook.add(tab_strafen, text="Strafen")
-
-from modules.strafen import load_strafen, write_strafen
-def update_strafen_tree(tree):
-    tree.delete(*tree.get_children())
-    entries = load_strafen()
-    for index, entry in enumerate(entries):
-        tree.insert("", "end", iid=str(index),
-                    values=(entry["Name"], entry["Wahrscheinlichkeit"], entry.get("Beschreibung", "")))
-
-tree_strafen = ttk.Treeview(tab_strafen, columns=("Name", "Wahrscheinlichkeit", "Beschreibung"), show="headings")
-for col in ("Name", "Wahrscheinlichkeit", "Beschreibung"):
-    tree_strafen.heading(col, text=col)
-tree_strafen.grid(row=0, column=0, columnspan=3, padx=5, pady=5, sticky="wens")
-update_strafen_tree(tree_strafen)
-
-ttk.Label(tab_strafen, text="Name:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
-entry_strafe_name = ttk.Entry(tab_strafen, font=("Segoe UI", 12))
-entry_strafe_name.grid(row=1, column=1, padx=5, pady=5)
-
-ttk.Label(tab_strafen, text="Wahrscheinlichkeit:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
-entry_strafe_wahrscheinlichkeit = ttk.Entry(tab_strafen, font=("Segoe UI", 12))
-entry_strafe_wahrscheinlichkeit.grid(row=2, column=1, padx=5, pady=5)
-
-ttk.Label(tab_strafen, text="Beschreibung (optional):").grid(row=3, column=0, padx=5, pady=5, sticky="w")
-entry_strafe_beschreibung = ttk.Entry(tab_strafen, font=("Segoe UI", 12))
-entry_strafe_beschreibung.grid(row=3, column=1, padx=5, pady=5)
-
-def add_strafe_callback():
-    name = entry_strafe_name.get().strip()
-    wahrscheinlichkeit = entry_strafe_wahrscheinlichkeit.get().strip()
-    beschreibung = entry_strafe_beschreibung.get().strip()
-    if not name or not wahrscheinlichkeit:
-        messagebox.showerror("Fehler", "Name und Wahrscheinlichkeit sind Pflichtfelder.")
-        return
-    try:
-        w = float(wahrscheinlichkeit)
-    except ValueError:
-        messagebox.showerror("Fehler", "Wahrscheinlichkeit muss eine Zahl sein.")
-        return
-    from modules.strafen import load_strafen, write_strafen
-    entries = load_strafen()
-    entries.append({"Name": name, "Wahrscheinlichkeit": w, "Beschreibung": beschreibung})
-    write_strafen(entries)
-    messagebox.showinfo("Erfolg", "Strafe hinzugefügt!")
+    def on_best_of_k_done(future, num_players):
+        search_state["future"] = None
+        label_preview.config(text="")
+        if future.exception() is not None:
+            messagebox.showerror("Fehler", f"Kandidatensuche fehlgeschlagen: {future.exception()}")
+            return
+        finish_generation(future.result(), num_players)
+
+    def finish_generation(data, num_players):
+        if data is None:
+            messagebox.showerror("Fehler", "Keine passenden Einträge gefunden.")
+            return
+        if "score" in data:
+            label_preview.config(text=f"Bester von {data['candidates']} Kandidaten, Score {data['score']:.2f}")
+        if var_schedule_strafen.get():
+            data["strafen_plan"] = schedule_strafen(data, num_players)
+        history.record_challenge(data)
+        nonlocal challenge_data
+        challenge_data = data
+        stream_text(text_result, data["result"].splitlines(keepends=True))
+        from modules.gui_components import open_result_window
+        open_result_window(root, data, on_generate_challenge)
+
+    # Live-Vorschau: Änderungen an Auswahl/Gewichten patchen nur den Beitrag des Spiels,
+    # die Verteilung wird entprellt im Hintergrund berechnet.
+    preview_model = PreviewModel()
+    traced_games = set()
+
+    def preview_inputs():
+        try:
+            num_players = int(combo_num_players.get())
+            desired_diff = float(entry_desired_diff.get().strip())
+            raw_b2b = int(spin_b2b.get())
+        except ValueError:
+            return "Für die Vorschau Spieleranzahl, Schwierigkeit und B2B angeben."
+        if desired_diff <= 0:
+            return "Gewünschte Schwierigkeit muss eine Zahl > 0 sein."
+        if num_players != preview_model.num_players:
+            preview_model.rebuild(catalog_entries(), num_players, game_vars)
+        return preview_model.win_pmf(), raw_b2b, desired_diff
+
+    live_preview = LivePreview(root, preview_inputs, lambda text: label_preview.config(text=text))
+
+    # Shards der ausgewählten Spiele im Hintergrund laden, nicht mehr benötigte verwerfen
+    shard_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shards")
+    shard_update = {"after_id": None, "future": None, "generate_waiting": False}
+
+    def update_loaded_shards():
+        shard_update["after_id"] = None
+        selected = [g for g, gv in game_vars.items() if gv["selected"].get()]
+        future = shard_update["future"] = shard_executor.submit(shards.require, selected)
+        def poll():
+            if not future.done():
+                root.after(30, poll)
+            elif future.exception() is not None:
+                messagebox.showerror("Fehler", f"Katalog konnte nicht geladen werden: {future.exception()}")
+            elif future.result():
+                on_catalog_changed_for_preview()
+        root.after(30, poll)
+
+    def schedule_shard_update():
+        # Mehrere Änderungen (z.B. beim Laden eines Presets) zusammenfassen
+        if shard_update["after_id"] is None:
+            shard_update["after_id"] = root.after(100, update_loaded_shards)
+
+    def shards_pending():
+        if shard_update["after_id"] is not None:
+            # Entprellte Aktualisierung sofort starten statt weiter zu warten
+            root.after_cancel(shard_update["after_id"])
+            update_loaded_shards()
+        future = shard_update["future"]
+        return future is not None and not future.done()
+
+    def generate_when_shards_loaded():
+        if shards_pending():
+            root.after(30, generate_when_shards_loaded)
+            return
+        shard_update["generate_waiting"] = False
+        label_preview.config(text="")
+        on_generate_challenge()
+
+    def on_game_preference_changed(game, modes_changed=False):
+        if game in shards.game_shards:
+            schedule_shard_update()
+        preview_model.update_game(game, game_vars, modes_changed)
+        live_preview.schedule()
+
+    def attach_preview_traces():
+        for game in traced_games - set(game_vars):
+            traced_games.discard(game)
+        for game, gv in game_vars.items():
+            if game in traced_games:
+                continue
+            traced_games.add(game)
+            callback = lambda *args, g=game: on_game_preference_changed(g)
+            gv["selected"].trace_add("write", callback)
+            gv["weight"].trace_add("write", callback)
+
+    def on_catalog_changed_for_preview():
+        attach_preview_traces()
+        preview_model.num_players = None  # beim nächsten Berechnen neu aufbauen
+        live_preview.schedule()
+
+    def on_preview():
+        live_preview.schedule(0)
+
+    attach_preview_traces()
+    # Shards der beim Start bereits ausgewählten Spiele laden
+    schedule_shard_update()
+    mode_change_listeners.append(lambda game: on_game_preference_changed(game, modes_changed=True))
+    combo_num_players.bind("<<ComboboxSelected>>", lambda event: live_preview.schedule(), add="+")
+    entry_desired_diff.bind("<KeyRelease>", lambda event: live_preview.schedule())
+    spin_b2b.configure(command=live_preview.schedule)
+    spin_b2b.bind("<KeyRelease>", lambda event: live_preview.schedule())
+
+    # ----- Tab 2: Games -----
+    tab_entries = ttk.Frame(notebook)
+    notebook.add(tab_entries, text="Games")
+
+    frame_search = ttk.Frame(tab_entries)
+    frame_search.grid(row=0, column=0, columnspan=3, padx=5, pady=5, sticky="we")
+    ttk.Label(frame_search, text="Suche:").pack(side="left")
+    var_search = tk.StringVar()
+    ttk.Entry(frame_search, textvariable=var_search, font=("Segoe UI", 12)).pack(side="left", padx=5)
+    label_search_status = ttk.Label(frame_search, text="", font=("Segoe UI", 10))
+    label_search_status.pack(side="left", padx=5)
+    button_page_prev = ttk.Button(frame_search, text="◀", width=3)
+    button_page_prev.pack(side="left")
+    button_page_next = ttk.Button(frame_search, text="▶", width=3)
+    button_page_next.pack(side="left")
+
+    tree_entries = ttk.Treeview(tab_entries, columns=("Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"), show="headings")
+    for col in ("Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"):
+        tree_entries.heading(col, text=col, command=lambda c=col: on_sort_column(c))
+    tree_entries.grid(row=1, column=0, columnspan=3, padx=5, pady=5, sticky="wens")
+
+    ttk.Label(tab_entries, text="Spiel:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+    entry_spiel = ttk.Entry(tab_entries, font=("Segoe UI", 12))
+    entry_spiel.grid(row=2, column=1, padx=5, pady=5)
+
+    ttk.Label(tab_entries, text="Spielmodus:").grid(row=3, column=0, padx=5, pady=5, sticky="w")
+    entry_spielmodus = ttk.Entry(tab_entries, font=("Segoe UI", 12))
+    entry_spielmodus.grid(row=3, column=1, padx=5, pady=5)
+
+    ttk.Label(tab_entries, text="Schwierigkeit (0-10):").grid(row=4, column=0, padx=5, pady=5, sticky="w")
+    entry_schwierigkeit = ttk.Entry(tab_entries, font=("Segoe UI", 12))
+    entry_schwierigkeit.grid(row=4, column=1, padx=5, pady=5)
+
+    ttk.Label(tab_entries, text="Spieleranzahl:").grid(row=5, column=0, padx=5, pady=5, sticky="w")
+    entry_spieler = ttk.Entry(tab_entries, font=("Segoe UI", 12))
+    entry_spieler.grid(row=5, column=1, padx=5, pady=5)
+
+    def refresh_selection_panel():
+        update_game_selection_panel(frame_games_inner, root)
+        on_catalog_changed_for_preview()
+
+    gm = GameManager(
+        {"spiel": entry_spiel, "spielmodus": entry_spielmodus, "schwierigkeit": entry_schwierigkeit, "spieleranzahl": entry_spieler},
+        tree_entries,
+        refresh_selection_panel
+    )
+
+    def on_games_view_changed(first, last, total):
+        if first <= 1 and last == total:
+            text = f"{total} Treffer"
+        else:
+            text = f"{first}–{last} von {total} Treffern"
+        label_search_status.config(text=text)
+        button_page_prev.state(["!disabled"] if first > 1 else ["disabled"])
+        button_page_next.state(["!disabled"] if last < total else ["disabled"])
+
+    def on_sort_column(column):
+        gm.sort_by(column)
+        for col in ("Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"):
+            arrow = (" ▼" if gm.sort_reverse else " ▲") if col == gm.sort_column else ""
+            tree_entries.heading(col, text=col + arrow)
+
+    gm.on_view_changed = on_games_view_changed
+    button_page_prev.configure(command=lambda: gm.change_page(-1))
+    button_page_next.configure(command=lambda: gm.change_page(1))
+    var_search.trace_add("write", lambda *args: gm.set_search(var_search.get()))
+    gm.update_entry_tree()
+
+    # Hier den Double-Click binden:
+    tree_entries.bind("<Double-1>", gm.on_treeview_double_click)
+
+    ttk.Button(tab_entries, text="Eintrag hinzufügen", command=gm.add_entry).grid(row=6, column=0, columnspan=2, padx=5, pady=5)
+    ttk.Button(tab_entries, text="Eintrag aktualisieren", command=gm.update_entry_in_csv).grid(row=7, column=0, columnspan=2, padx=5, pady=5)
+    ttk.Button(tab_entries, text="Eintrag löschen", command=gm.delete_entry).grid(row=8, column=0, columnspan=2, padx=5, pady=5)
+
+    # Katalog und Strafen als eine komprimierte Bundle-Datei weitergeben
+    bundle_filetypes = [("Challenge-Bundle", "*" + BUNDLE_EXTENSION), ("Alle Dateien", "*.*")]
+
+    def on_export_bundle():
+        path = filedialog.asksaveasfilename(defaultextension=BUNDLE_EXTENSION, filetypes=bundle_filetypes)
+        if not path:
+            return
+        try:
+            export_bundle(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Fehler", f"Bundle konnte nicht exportiert werden: {e}")
+            return
+        messagebox.showinfo("Erfolg", "Bundle exportiert!")
+
+    def on_import_bundle():
+        path = filedialog.askopenfilename(filetypes=bundle_filetypes)
+        if not path:
+            return
+        if not messagebox.askyesno("Bundle importieren", "Katalog und Strafen werden durch den Inhalt des Bundles ersetzt. Fortfahren?"):
+            return
+        try:
+            entries, _ = import_bundle(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Fehler", f"Bundle konnte nicht importiert werden: {e}")
+            return
+        gm.apply_entries(entries)
+        sync_game_selection_panel(frame_games_inner, root, entries)
+        on_catalog_changed_for_preview()
+        presets.warm_plans(saved_presets, current_num_players())
+        update_strafen_tree(tree_strafen)
+
+    frame_bundle = ttk.Frame(tab_entries)
+    frame_bundle.grid(row=9, column=0, columnspan=2, padx=5, pady=5)
+    ttk.Button(frame_bundle, text="Bundle exportieren", command=on_export_bundle).pack(side="left", padx=5)
+    ttk.Button(frame_bundle, text="Bundle importieren", command=on_import_bundle).pack(side="left", padx=5)
+
+    # ----- Tab 3: Strafen ein -----
+    tab_strafen = ttk.Frame(notebook)
+    notebook.add(tab_strafen, text="Strafen")
+
+    strafen_rows = []  # aktuell im Strafen-Treeview angezeigte Zeilen
+
+    def strafe_row_values(entry):
+        return (entry["Name"], entry["Wahrscheinlichkeit"], entry.get("Beschreibung", ""))
+
+    @instrument("update_strafen_tree")
+    def update_strafen_tree(tree):
+        nonlocal strafen_rows
+        tree.delete(*tree.get_children())
+        entries = load_strafen()
+        for index, entry in enumerate(entries):
+            tree.insert("", "end", iid=str(index), values=strafe_row_values(entry))
+        strafen_rows = [strafe_row_values(e) for e in entries]
+
+    tree_strafen = ttk.Treeview(tab_strafen, columns=("Name", "Wahrscheinlichkeit", "Beschreibung"), show="headings")
+    for col in ("Name", "Wahrscheinlichkeit", "Beschreibung"):
+        tree_strafen.heading(col, text=col)
+    tree_strafen.grid(row=0, column=0, columnspan=3, padx=5, pady=5, sticky="wens")
     update_strafen_tree(tree_strafen)
 
-ttk.Button(tab_strafen, text="Strafe hinzufügen", command=add_strafe_callback).grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+    ttk.Label(tab_strafen, text="Name:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+    entry_strafe_name = ttk.Entry(tab_strafen, font=("Segoe UI", 12))
+    entry_strafe_name.grid(row=1, column=1, padx=5, pady=5)
+
+    ttk.Label(tab_strafen, text="Wahrscheinlichkeit:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+    entry_strafe_wahrscheinlichkeit = ttk.Entry(tab_strafen, font=("Segoe UI", 12))
+    entry_strafe_wahrscheinlichkeit.grid(row=2, column=1, padx=5, pady=5)
+
+    ttk.Label(tab_strafen, text="Beschreibung (optional):").grid(row=3, column=0, padx=5, pady=5, sticky="w")
+    entry_strafe_beschreibung = ttk.Entry(tab_strafen, font=("Segoe UI", 12))
+    entry_strafe_beschreibung.grid(row=3, column=1, padx=5, pady=5)
+
+    def add_strafe_callback():
+        name = entry_strafe_name.get().strip()
+        wahrscheinlichkeit = entry_strafe_wahrscheinlichkeit.get().strip()
+        beschreibung = entry_strafe_beschreibung.get().strip()
+        if not name or not wahrscheinlichkeit:
+            messagebox.showerror("Fehler", "Name und Wahrscheinlichkeit sind Pflichtfelder.")
+            return
+        try:
+            w = float(wahrscheinlichkeit)
+        except ValueError:
+            messagebox.showerror("Fehler", "Wahrscheinlichkeit muss eine Zahl sein.")
+            return
+        from modules.strafen import load_strafen, write_strafen
+        from modules.file_lock import exclusive
+        with exclusive(STRAFEN_CSV):
+            entries = load_strafen()
+            entries.append({"Name": name, "Wahrscheinlichkeit": w, "Beschreibung": beschreibung})
+            write_strafen(entries)
+        messagebox.showinfo("Erfolg", "Strafe hinzugefügt!")
+        update_strafen_tree(tree_strafen)
+
+    ttk.Button(tab_strafen, text="Strafe hinzufügen", command=add_strafe_callback).grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+
+    # ----- Tab 4: Verlauf -----
+    tab_history = ttk.Frame(notebook)
+    notebook.add(tab_history, text="Verlauf")
+
+    frame_history_filter = ttk.Frame(tab_history)
+    frame_history_filter.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="we")
+    ttk.Label(frame_history_filter, text="Spiel:").pack(side="left")
+    var_history_game = tk.StringVar()
+    entry_history_game = ttk.Entry(frame_history_filter, textvariable=var_history_game, font=("Segoe UI", 12))
+    entry_history_game.pack(side="left", padx=5)
+    ttk.Label(frame_history_filter, text="Zeitraum (Tage):").pack(side="left", padx=(10, 0))
+    spin_history_days = ttk.Spinbox(frame_history_filter, from_=1, to=3650, width=6)
+    spin_history_days.set(30)
+    spin_history_days.pack(side="left", padx=5)
+
+    history_columns = ("Datum", "Schwierigkeit", "Wins", "Status", "Zeit", "Seed", "Session")
+    tree_history = ttk.Treeview(tab_history, columns=history_columns, show="headings")
+    for col in history_columns:
+        tree_history.heading(col, text=col)
+    tree_history.grid(row=1, column=0, padx=5, pady=5, sticky="wens")
+    text_history_stats = tk.Text(tab_history, height=15, width=45, state="disabled", bg="#1E1E1E", fg="#DCDCDC",
+                                 font=("Segoe UI", 11))
+    text_history_stats.grid(row=1, column=1, padx=5, pady=5, sticky="wens")
+    tab_history.columnconfigure(0, weight=1)
+    tab_history.rowconfigure(1, weight=1)
+
+    def history_row_values(row):
+        if row["wins_done"] is not None:
+            status = f"erledigt {row['wins_done']}/{row['num_wins']}"
+        elif row["accepted"] is not None:
+            status = "akzeptiert"
+        else:
+            status = "generiert"
+        return (time.strftime("%Y-%m-%d %H:%M", time.localtime(row["created"])), f"{row['total_diff']:.2f}",
+                row["num_wins"], status, format_elapsed(row["elapsed"]) if row["elapsed"] else "",
+                row["seed"] if row["seed"] is not None else "", row["session_id"] or "")
+
+    def history_stats_lines(days, game):
+        if game:
+            yield f"Wins je Modus von {game} ({days} Tage, akzeptiert/generiert):\n"
+            accepted = dict(history.wins_per_mode(game, days, accepted_only=True))
+            for mode, wins in history.wins_per_mode(game, days):
+                yield f"  {mode}: {accepted.get(mode, 0)}/{wins}\n"
+        else:
+            yield f"Wins je Spiel ({days} Tage, akzeptiert/generiert):\n"
+            accepted = dict(history.wins_per_game(days, accepted_only=True))
+            for name, wins in history.wins_per_game(days):
+                yield f"  {name}: {accepted.get(name, 0)}/{wins}\n"
+        yield "\nØ Zeit erledigter Challenges je Schwierigkeit:\n"
+        for low, count, avg in history.completion_by_difficulty(HISTORY_BUCKET):
+            yield f"  {low}-{low + HISTORY_BUCKET}: {format_elapsed(avg)} ({count}x)\n"
+        per_point = history.seconds_per_difficulty()
+        if per_point is not None:
+            yield f"\nØ {per_point:.0f} s pro Schwierigkeitspunkt\n"
+            try:
+                desired = float(entry_desired_diff.get())
+                yield f"Geschätzte Dauer für Schwierigkeit {desired:g}: {format_elapsed(desired * per_point)}\n"
+            except ValueError:
+                pass
+
+    history_ids = []
+
+    def refresh_history(event=None):
+        nonlocal history_ids
+        game = var_history_game.get().strip() or None
+        try:
+            days = max(1, int(spin_history_days.get()))
+        except ValueError:
+            days = 30
+        rows = history.recent(HISTORY_VIEW_LIMIT, game=game)
+        tree_history.delete(*tree_history.get_children())
+        history_ids = [row["id"] for row in rows]
+        for index, row in enumerate(rows):
+            tree_history.insert("", "end", iid=str(index), values=history_row_values(row))
+        stream_text(text_history_stats, history_stats_lines(days, game))
+
+    def on_history_double_click(event):
+        # Challenge aus dem Verlauf erneut spielen (als neuer Verlaufseintrag)
+        selection = tree_history.selection()
+        if not selection:
+            return
+        data = history.load_challenge(history_ids[int(selection[0])])
+        if data is None:
+            return
+        data.pop("history_id", None)
+        history.record_challenge(data)
+        open_result_window(root, data, on_generate_challenge)
+
+    def on_export_history_images():
+        # Markierte Challenges (Mehrfachauswahl) als Bilder in ein ZIP-Archiv
+        selection = tree_history.selection()
+        if not selection:
+            messagebox.showerror("Fehler", "Keine Challenge im Verlauf ausgewählt.")
+            return
+        challenges = [history.load_challenge(history_ids[int(iid)]) for iid in selection]
+        texts = [data["result"] for data in challenges if data is not None]
+        path = filedialog.asksaveasfilename(defaultextension=".zip", filetypes=[("ZIP-Archiv", "*.zip")])
+        if not path:
+            return
+        def done(future):
+            if future.exception() is not None:
+                messagebox.showerror("Fehler", f"Export fehlgeschlagen: {future.exception()}")
+            else:
+                messagebox.showinfo("Erfolg", f"{len(future.result())} Challenge(s) als Bilder gespeichert: {path}")
+        when_done(root, export_batch(texts, path), done)
+
+    ttk.Button(frame_history_filter, text="Aktualisieren", command=refresh_history).pack(side="left", padx=5)
+    ttk.Button(frame_history_filter, text="Als Bilder exportieren", command=on_export_history_images).pack(side="left", padx=5)
+    entry_history_game.bind("<Return>", refresh_history)
+    tree_history.bind("<Double-1>", on_history_double_click)
+    notebook.bind("<<NotebookTabChanged>>",
+                  lambda event: refresh_history() if notebook.select() == str(tab_history) else None)
+
+    # Externe Änderungen (Editor, Sync) übernehmen, ohne alles neu zu laden
+    def on_file_changed(path, data):
+        nonlocal strafen_rows
+        if path == os.path.abspath(CSV_FILE):
+            entries, index = data
+            gm.apply_entries(entries, index)
+            sync_game_selection_panel(frame_games_inner, root, entries)
+            on_catalog_changed_for_preview()
+            # Pläne der Presets sind jetzt veraltet, im Hintergrund neu kompilieren
+            presets.warm_plans(saved_presets, current_num_players())
+        elif path == os.path.abspath(STRAFEN_CSV):
+            new_rows = [strafe_row_values(e) for e in data]
+            sync_tree(tree_strafen, strafen_rows, new_rows)
+            strafen_rows = new_rows
+
+    if FILE_WATCH_ENABLED:
+        from modules.file_watcher import FileWatcher, sync_tree
+        def load_catalog_with_index():
+            # Suchindex gleich im Hintergrundthread aufbauen
+            entries = load_entries(CSV_FILE)
+            return entries, CatalogIndex(entries)
+        file_watcher = FileWatcher(root, {CSV_FILE: load_catalog_with_index, STRAFEN_CSV: load_strafen},
+                                   on_file_changed).start()
+
+    # Nach einem Absturz offene Challenge-Sessions wiederherstellen
+    open_sessions = load_open_sessions()
+    if open_sessions:
+        if messagebox.askyesno("Sessions wiederherstellen",
+                               f"{len(open_sessions)} nicht beendete Challenge(s) gefunden. Wiederherstellen?"):
+            for session in open_sessions:
+                open_result_window(root, session.challenge, on_generate_challenge, session=session)
+        else:
+            for session in open_sessions:
+                session.close(finished=True)
+                history.mark_closed(session.challenge.get("history_id"), session.elapsed, sum(session.state))
+
+    # Profiling-Statistik (nur wenn über WCG_PROFILE oder config aktiviert)
+    if profiling.enabled:
+        root.bind("<F12>", lambda event: profiling.show_stats_window(root))
+
+    root.mainloop()
 
-root.mainloop()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# modules/best_of_k.py
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from modules.catalog_shards import catalog_entries
+from modules.profiling import instrument
+from modules.sampling import RecencyState, entry_key, constraints_from_game_vars
+from modules.challenge_generator import (build_candidate_pool, build_challenge, effective_b2b_probability,
+                                         sample_challenge)
+from config import BEST_OF_WORKERS, BEST_OF_BATCH, BEST_OF_THRESHOLD, BEST_OF_SCORE_WEIGHTS
+
+# Relative Abweichung von desired_diff, bei der die Nähe-Bewertung auf 0.5 fällt
+CLOSENESS_SCALE = 0.02
+
+_executor = None
+
+def _get_executor():
+    # Prozesse statt Threads, da das Ziehen reiner Python-Code ist (GIL).
+    # Der Pool wird beim ersten Best-of-K-Lauf gestartet und danach wiederverwendet.
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=BEST_OF_WORKERS or os.cpu_count() or 1)
+    return _executor
+
+def score_challenge(segments, total_diff, desired_diff, raw_b2b, num_games, weights=BEST_OF_SCORE_WEIGHTS):
+    """
+    Bewertet eine Challenge mit einem Wert in [0, 1] aus drei Teilwerten:
+    closeness  - Nähe der Gesamtschwierigkeit zu desired_diff,
+    diversity  - Anteil verschiedener Spiele (gemessen am Möglichen),
+    b2b        - Anteil der Wins in Back-to-Back Segmenten nahe am Erwartungswert
+                 für die eingestellte B2B-Wahrscheinlichkeit.
+    """
+    wins = [win for seg in segments for win in seg["wins"]]
+    if not wins:
+        return 0.0
+    deviation = abs(total_diff - desired_diff) / desired_diff if desired_diff > 0 else 0.0
+    closeness = 1.0 / (1.0 + deviation / CLOSENESS_SCALE)
+    distinct = len({win["Spiel"] for win in wins})
+    diversity = distinct / min(len(wins), num_games) if num_games else 1.0
+    # Erwarteter B2B-Anteil: B2B-Segmente haben im Mittel 3 Wins
+    p_eff = effective_b2b_probability(raw_b2b)
+    expected = 3 * p_eff / (1 - p_eff + 3 * p_eff) if p_eff > 0 else 0.0
+    actual = sum(seg["length"] for seg in segments if seg["length"] > 1) / len(wins)
+    b2b = 1.0 - abs(actual - expected)
+    total_weight = sum(weights.values())
+    return (weights["closeness"] * closeness + weights["diversity"] * diversity + weights["b2b"] * b2b) / total_weight
+
+def _run_batch(pool, desired_diff, raw_b2b, tolerance, constraints, heat, count, seed, threshold):
+    """
+    Erzeugt und bewertet bis zu count Kandidaten in einem Worker-Prozess.
+    Gibt (score, segments, total_diff, seed, anzahl) des besten Kandidaten
+    zurück; bricht ab, sobald ein Kandidat threshold erreicht.
+    """
+    # Eigener Seed je Batch, sonst ziehen per fork gestartete Worker identische Folgen.
+    # Jeder Kandidat bekommt daraus einen eigenen Seed, damit er reproduzierbar bleibt.
+    seeds = random.Random(seed)
+    best = None
+    generated = 0
+    for _ in range(count):
+        candidate_seed = seeds.getrandbits(63)
+        recency = RecencyState(dict(heat)) if heat is not None else None
+        segments, total_diff = sample_challenge(pool, desired_diff, raw_b2b, tolerance, constraints, recency,
+                                                rng=random.Random(candidate_seed))
+        generated += 1
+        score = score_challenge(segments, total_diff, desired_diff, raw_b2b, len(pool[1]))
+        if best is None or score > best[0]:
+            best = (score, segments, total_diff, candidate_seed)
+            if score >= threshold:
+                break
+    return (*best, generated)
+
+def _best_of_batches(args, k, threshold):
+    batches = [min(BEST_OF_BATCH, k - start) for start in range(0, k, BEST_OF_BATCH)]
+    best = None
+    generated = 0
+    try:
+        executor = _get_executor()
+        pending = {executor.submit(_run_batch, *args, count, random.getrandbits(64), threshold) for count in batches}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                score, segments, total_diff, candidate_seed, n = future.result()
+                generated += n
+                if best is None or score > best[0]:
+                    best = (score, segments, total_diff, candidate_seed)
+            if best[0] >= threshold:
+                # Noch nicht gestartete Batches verwerfen, laufende enden nach ihrem nächsten Treffer
+                for future in pending:
+                    future.cancel()
+                break
+    except (BrokenProcessPool, OSError):
+        # Ohne Prozess-Pool (z.B. eingeschränkte Umgebung) im eigenen Prozess weiterrechnen
+        global _executor
+        _executor = None
+        for count in batches:
+            score, segments, total_diff, candidate_seed, n = _run_batch(*args, count, random.getrandbits(64), threshold)
+            generated += n
+            if best is None or score > best[0]:
+                best = (score, segments, total_diff, candidate_seed)
+            if best[0] >= threshold:
+                break
+    return best, generated
+
+@instrument("generate_best_of_k")
+def generate_best_of_k(num_players, desired_diff, selected_game_list, weights, game_vars, raw_b2b, k,
+                       tolerance=None, avoid_repeats=False, threshold=BEST_OF_THRESHOLD, plan=None):
+    """
+    Erzeugt bis zu k Kandidaten wie generate_challenge_logic und gibt den
+    bestbewerteten (score_challenge) zurück, ergänzt um "score" und
+    "candidates" (Anzahl ausgewerteter Kandidaten). Die Kandidaten
+    werden in Batches auf einen Prozess-Pool verteilt; sobald einer
+    threshold erreicht, werden die übrigen Batches abgebrochen.
+    Bei avoid_repeats sehen alle Kandidaten denselben Recency-Zustand,
+    gespeichert werden nur die Ziehungen des gewählten Kandidaten.
+    Mit plan (modules.presets) wird dessen vorkompilierter pool verwendet.
+    """
+    if plan is not None:
+        pool = plan["pool"]
+    else:
+        entries = catalog_entries(selected_game_list)
+        pool = build_candidate_pool(entries, num_players, selected_game_list, weights, game_vars)
+    if pool is None:
+        return None
+    recency = RecencyState.load() if avoid_repeats else None
+    constraints = constraints_from_game_vars(pool[1], game_vars)
+    args = (pool, desired_diff, raw_b2b, tolerance, constraints, recency.heat if recency is not None else None)
+    if k <= 1:
+        score, segments, total_diff, candidate_seed, generated = _run_batch(*args, 1, random.getrandbits(64), threshold)
+        best = (score, segments, total_diff, candidate_seed)
+    else:
+        best, generated = _best_of_batches(args, k, threshold)
+    score, segments, total_diff, seed = best
+    if recency is not None:
+        for seg in segments:
+            for win in seg["wins"]:
+                recency.bump(entry_key(win))
+        recency.decay()
+        recency.save()
+    data = build_challenge(segments, total_diff)
+    data["score"] = score
+    data["candidates"] = generated
+    data["seed"] = seed
+    return data
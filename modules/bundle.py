@@ -0,0 +1,181 @@
+# modules/bundle.py
+import array
+import struct
+import sys
+import zlib
+from modules.profiling import instrument
+from modules.file_lock import atomic_write
+
+# Bundle-Datei mit Katalog und Strafen zum Weitergeben:
+#   "WCGB" + Formatversion (uint16) + zlib-Datenstrom mit den Abschnitten
+#   "CATL"  Spiele- und Modus-Stringtabelle, Anzahl Zeilen, dann je eine Spalte
+#           Spiel-Index (uint32), Modus-Index (uint32), Schwierigkeit (float64),
+#           Spieleranzahl (uint32)
+#   "STRF"  Anzahl, Namen, Beschreibungen (Stringtabellen), Wahrscheinlichkeit (float64)
+#   "END."
+# Stringtabellen: Anzahl (uint32), Bytelänge (uint64), UTF-8 mit "\0" getrennt.
+# Zahlen sind little-endian; Spalten werden blockweise geschrieben und gelesen.
+MAGIC = b"WCGB"
+VERSION = 1
+CHUNK_ROWS = 65536
+READ_SIZE = 1 << 16
+
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+class _Writer:
+    def __init__(self, f):
+        self.f = f
+        self.compressor = zlib.compressobj(6)
+
+    def write(self, data):
+        self.f.write(self.compressor.compress(data))
+
+    def write_u32(self, value):
+        self.write(_U32.pack(value))
+
+    def write_strings(self, strings):
+        for s in strings:
+            if "\0" in s:
+                raise ValueError(f"Text enthält ein Nullzeichen: {s!r}")
+        blob = "\0".join(strings).encode("utf-8")
+        self.write_u32(len(strings))
+        self.write(_U64.pack(len(blob)))
+        self.write(blob)
+
+    def write_column(self, typecode, values):
+        # values: Sequenz; wird in Blöcken zu CHUNK_ROWS umgewandelt
+        for start in range(0, len(values), CHUNK_ROWS):
+            column = array.array(typecode, values[start:start + CHUNK_ROWS])
+            if sys.byteorder == "big":
+                column.byteswap()
+            self.write(column.tobytes())
+
+    def close(self):
+        self.f.write(self.compressor.flush())
+
+class _Reader:
+    def __init__(self, f):
+        self.f = f
+        self.decompressor = zlib.decompressobj()
+        self.buffer = bytearray()
+        self.pos = 0
+
+    def read(self, n):
+        while len(self.buffer) - self.pos < n:
+            compressed = self.f.read(READ_SIZE)
+            if not compressed:
+                self.buffer += self.decompressor.flush()
+                if len(self.buffer) - self.pos < n:
+                    raise ValueError("Bundle ist unvollständig.")
+                break
+            if self.pos:
+                del self.buffer[:self.pos]
+                self.pos = 0
+            self.buffer += self.decompressor.decompress(compressed)
+        data = self.buffer[self.pos:self.pos + n]
+        self.pos += n
+        return data
+
+    def read_u32(self):
+        return _U32.unpack(self.read(4))[0]
+
+    def read_strings(self):
+        count = self.read_u32()
+        size = _U64.unpack(self.read(8))[0]
+        if count == 0:
+            return []
+        strings = self.read(size).decode("utf-8").split("\0")
+        if len(strings) != count:
+            raise ValueError("Bundle ist beschädigt (Stringtabelle).")
+        return strings
+
+    def read_column(self, typecode, count):
+        column = array.array(typecode)
+        for start in range(0, count, CHUNK_ROWS):
+            column.frombytes(self.read(min(CHUNK_ROWS, count - start) * column.itemsize))
+        if sys.byteorder == "big":
+            column.byteswap()
+        return column
+
+def _check_u32(values, name):
+    # array("I") würde sonst mit OverflowError abbrechen
+    for v in values:
+        if not 0 <= v <= 0xFFFFFFFF:
+            raise ValueError(f"{name} muss zwischen 0 und {0xFFFFFFFF} liegen: {v}")
+    return values
+
+def _table(values):
+    # Stringtabelle und Index je Wert, in Reihenfolge des ersten Auftretens
+    index = {}
+    codes = [index.setdefault(v, len(index)) for v in values]
+    return list(index), codes
+
+@instrument("write_bundle")
+def write_bundle(path, entries, strafen):
+    """
+    Schreibt Katalog (entries) und Strafen atomar als Bundle nach path.
+    Ungültige Werte (z.B. negative Spieleranzahl) ergeben ValueError,
+    bevor path angelegt wird.
+    """
+    games, game_codes = _table([str(e["Spiel"]) for e in entries])
+    modes, mode_codes = _table([str(e["Spielmodus"]) for e in entries])
+    players = _check_u32([int(e["Spieleranzahl"]) for e in entries], "Spieleranzahl")
+    # Export an einen frei gewählten Ort: ohne Sperr- und Versionsdatei daneben
+    with atomic_write(path, binary=True, locked=False) as f:
+        f.write(MAGIC + struct.pack("<H", VERSION))
+        writer = _Writer(f)
+        writer.write(b"CATL")
+        writer.write_strings(games)
+        writer.write_strings(modes)
+        writer.write_u32(len(entries))
+        writer.write_column("I", game_codes)
+        writer.write_column("I", mode_codes)
+        writer.write_column("d", [float(e["Schwierigkeit"]) for e in entries])
+        writer.write_column("I", players)
+        writer.write(b"STRF")
+        writer.write_u32(len(strafen))
+        writer.write_strings([str(e["Name"]) for e in strafen])
+        writer.write_strings([str(e.get("Beschreibung", "")) for e in strafen])
+        writer.write_column("d", [float(e["Wahrscheinlichkeit"]) for e in strafen])
+        writer.write(b"END.")
+        writer.close()
+
+@instrument("read_bundle")
+def read_bundle(path):
+    """Liest ein Bundle; gibt (entries, strafen) im Format von load_entries/load_strafen zurück."""
+    with open(path, "rb") as f:
+        header = f.read(6)
+        if len(header) < 6 or header[:4] != MAGIC:
+            raise ValueError("Keine Bundle-Datei.")
+        version = struct.unpack("<H", header[4:])[0]
+        if version > VERSION:
+            raise ValueError(f"Bundle-Version {version} wird nicht unterstützt (höchstens {VERSION}).")
+        reader = _Reader(f)
+        if reader.read(4) != b"CATL":
+            raise ValueError("Bundle ist beschädigt (Katalog fehlt).")
+        games = reader.read_strings()
+        modes = reader.read_strings()
+        count = reader.read_u32()
+        game_codes = reader.read_column("I", count)
+        mode_codes = reader.read_column("I", count)
+        difficulties = reader.read_column("d", count)
+        players = reader.read_column("I", count)
+        try:
+            entries = [{"Spiel": games[g], "Spielmodus": modes[m], "Schwierigkeit": d, "Spieleranzahl": p}
+                       for g, m, d, p in zip(game_codes, mode_codes, difficulties, players)]
+        except IndexError:
+            raise ValueError("Bundle ist beschädigt (ungültiger Index).") from None
+        if reader.read(4) != b"STRF":
+            raise ValueError("Bundle ist beschädigt (Strafen fehlen).")
+        count = reader.read_u32()
+        names = reader.read_strings()
+        descriptions = reader.read_strings()
+        probabilities = reader.read_column("d", count)
+        if len(names) != count or len(descriptions) != count:
+            raise ValueError("Bundle ist beschädigt (Strafen).")
+        strafen = [{"Name": n, "Wahrscheinlichkeit": w, "Beschreibung": b}
+                   for n, w, b in zip(names, probabilities, descriptions)]
+        if reader.read(4) != b"END.":
+            raise ValueError("Bundle ist beschädigt (Ende fehlt).")
+    return entries, strafen
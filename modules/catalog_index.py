@@ -0,0 +1,91 @@
+# modules/catalog_index.py
+import bisect
+from modules.profiling import instrument
+
+SEARCH_FIELDS = ("Spiel", "Spielmodus")
+NUMERIC_COLUMNS = ("Schwierigkeit", "Spieleranzahl")
+
+class CatalogIndex:
+    """
+    Suchindex über die Katalogeinträge (Index = Zeile in der CSV).
+
+    Für die Suche liegen alle Präfix-Schlüssel (ganzer Spiel- bzw.
+    Spielmodus-Name sowie jedes einzelne Wort daraus, kleingeschrieben) als
+    sortierte Liste vor; ein Präfix entspricht damit einem zusammenhängenden
+    Bereich, der per bisect gefunden wird. Sortierreihenfolgen je Spalte
+    werden beim ersten Bedarf berechnet und danach wiederverwendet.
+    """
+    def __init__(self, entries):
+        self.entries = entries
+        keys = []
+        for i, entry in enumerate(entries):
+            for field in SEARCH_FIELDS:
+                text = str(entry[field]).casefold()
+                keys.append((text, i))
+                words = text.split()
+                if len(words) > 1:
+                    keys.extend((word, i) for word in words)
+        keys.sort()
+        self.keys = [k for k, _ in keys]
+        self.rows = [i for _, i in keys]
+        self._orders = {}
+        self._ranks = {}
+
+    def prefix_matches(self, prefix):
+        """Menge der Zeilen, in denen ein Name oder ein Wort mit prefix beginnt."""
+        prefix = prefix.casefold()
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return set(self.rows[lo:hi])
+
+    def order(self, column):
+        order = self._orders.get(column)
+        if order is None:
+            if column in NUMERIC_COLUMNS:
+                key = lambda i: self.entries[i][column]
+            else:
+                key = lambda i: str(self.entries[i][column]).casefold()
+            order = sorted(range(len(self.entries)), key=key)
+            self._orders[column] = order
+            rank = [0] * len(order)
+            for position, i in enumerate(order):
+                rank[i] = position
+            self._ranks[column] = rank
+        return order
+
+    @instrument("CatalogIndex.query")
+    def query(self, text="", column=None, reverse=False, limit=None, offset=0):
+        """
+        Zeilenindizes, die zu allen Wörtern in text passen (jedes Wort als
+        Präfix), sortiert nach column bzw. in CSV-Reihenfolge. Gibt
+        (treffer[offset:offset + limit], anzahl_treffer) zurück.
+        """
+        terms = text.split()
+        matches = None
+        for term in terms:
+            found = self.prefix_matches(term)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return [], 0
+        if column is None:
+            rows = range(len(self.entries)) if matches is None else sorted(matches)
+            if reverse:
+                rows = rows[::-1]
+        else:
+            order = self.order(column)
+            if matches is None:
+                rows = order
+            elif len(matches) * 8 < len(order):
+                # Wenige Treffer: nach Rang sortieren statt die ganze Reihenfolge zu durchlaufen
+                rank = self._ranks[column]
+                rows = sorted(matches, key=rank.__getitem__)
+            else:
+                rows = [i for i in order if i in matches]
+            if reverse:
+                rows = rows[::-1]
+        total = len(rows)
+        if limit is not None:
+            rows = rows[offset:offset + limit]
+        elif offset:
+            rows = rows[offset:]
+        return list(rows), total
@@ -0,0 +1,185 @@
+# modules/catalog_shards.py
+import csv
+import json
+import os
+import sys
+import threading
+from modules.csv_handler import load_entries, load_entries_cached
+from modules.file_lock import atomic_write, file_stamp
+from modules.profiling import instrument
+from config import CSV_FILE, CATALOG_DIR, CATALOG_MANIFEST
+
+# Zusätzlich zu CSV_FILE können in CATALOG_DIR weitere Kataloge (Shards, z.B.
+# je Community oder Spielereihe) als CSV-Dateien liegen. Das Manifest merkt
+# sich je Shard Stempel und Spiele/Modi, damit beim Start nur geänderte
+# Shards gelesen werden müssen. Die Einträge eines Shards werden erst geladen,
+# wenn eines seiner Spiele ausgewählt ist, und wieder verworfen, wenn keines
+# mehr ausgewählt ist. Geladen und verworfen wird ausschließlich über
+# require(), alle anderen Zugriffe sehen nur den bereits geladenen Stand.
+
+def _read_games(path):
+    # Nur Spiel und Spielmodus lesen, für das Manifest
+    games = {}
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None or "Spiel" not in header or "Spielmodus" not in header:
+            return games
+        game_col, mode_col = header.index("Spiel"), header.index("Spielmodus")
+        for row in reader:
+            if len(row) > max(game_col, mode_col):
+                games.setdefault(row[game_col], set()).add(row[mode_col])
+    return {game: sorted(modes) for game, modes in games.items()}
+
+class ShardCatalog:
+    """
+    Shards in directory mit Manifest und bedarfsweisem Laden.
+
+    Spiel- und Modusnamen werden per sys.intern geteilt, sodass gleiche
+    Namen aus verschiedenen Shards (und die Schlüssel in game_vars) dasselbe
+    Objekt sind. Der zusammengeführte Index by_game (spiel -> {shard: einträge})
+    wird beim Laden und Verwerfen eines Shards nur für dessen Spiele geändert.
+    """
+    def __init__(self, directory=CATALOG_DIR):
+        self.directory = directory
+        self.manifest = {}     # shard -> {"stamp": [...], "games": {spiel: [modi]}}
+        self.game_shards = {}  # spiel -> [shard, ...]
+        self.loaded = {}       # shard -> (Stempel beim Laden, Spiele)
+        self.by_game = {}      # spiel -> {shard: [einträge]}
+        self.lock = threading.RLock()
+
+    def _path(self, shard):
+        return os.path.join(self.directory, shard)
+
+    @instrument("ShardCatalog.scan")
+    def scan(self):
+        """Liest das Manifest und aktualisiert es für neue, geänderte oder entfernte Shards."""
+        with self.lock:
+            if not os.path.isdir(self.directory):
+                self.manifest, self.game_shards = {}, {}
+                return
+            manifest_path = self._path(CATALOG_MANIFEST)
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                stored = {}
+            manifest = {}
+            for name in sorted(os.listdir(self.directory)):
+                if not name.lower().endswith(".csv"):
+                    continue
+                stamp = list(file_stamp(self._path(name)))
+                entry = stored.get(name)
+                if entry is None or entry.get("stamp") != stamp:
+                    entry = {"stamp": stamp, "games": _read_games(self._path(name))}
+                manifest[name] = entry
+            if manifest != stored:
+                with atomic_write(manifest_path) as f:
+                    json.dump(manifest, f, ensure_ascii=False)
+            self.manifest = manifest
+            self.game_shards = {}
+            for shard, entry in manifest.items():
+                for game in entry["games"]:
+                    self.game_shards.setdefault(sys.intern(game), []).append(shard)
+            for shard in [s for s in self.loaded if s not in manifest]:
+                self._unload(shard)
+
+    def modes_by_game(self):
+        """{spiel: {modi}} aller Shards laut Manifest, ohne Einträge zu laden."""
+        modes = {}
+        with self.lock:
+            for entry in self.manifest.values():
+                for game, game_modes in entry["games"].items():
+                    modes.setdefault(sys.intern(game), set()).update(sys.intern(m) for m in game_modes)
+        return modes
+
+    def shards_for(self, games):
+        with self.lock:
+            return {shard for game in games for shard in self.game_shards.get(game, ())}
+
+    @instrument("ShardCatalog.load")
+    def _load(self, shard):
+        stamp = file_stamp(self._path(shard))
+        entries = load_entries(self._path(shard))
+        by_game = {}
+        for e in entries:
+            e["Spiel"] = sys.intern(e["Spiel"])
+            e["Spielmodus"] = sys.intern(e["Spielmodus"])
+            by_game.setdefault(e["Spiel"], []).append(e)
+        for game, game_entries in by_game.items():
+            self.by_game.setdefault(game, {})[shard] = game_entries
+        self.loaded[shard] = (stamp, list(by_game))
+
+    def _unload(self, shard):
+        _, games = self.loaded.pop(shard)
+        for game in games:
+            shards = self.by_game[game]
+            del shards[shard]
+            if not shards:
+                del self.by_game[game]
+
+    def _ensure(self, shards):
+        changed = False
+        for shard in shards:
+            if not os.path.exists(self._path(shard)):
+                # Seit dem letzten scan() gelöscht
+                if shard in self.loaded:
+                    self._unload(shard)
+                    changed = True
+                continue
+            if shard in self.loaded and self.loaded[shard][0] == file_stamp(self._path(shard)):
+                continue
+            if shard in self.loaded:
+                self._unload(shard)
+            self._load(shard)
+            changed = True
+        return changed
+
+    def require(self, selected_games):
+        """
+        Lädt die Shards der ausgewählten Spiele und verwirft alle übrigen.
+        Gibt True zurück, wenn sich die geladenen Einträge geändert haben.
+        """
+        with self.lock:
+            needed = self.shards_for(selected_games)
+            changed = self._ensure(needed)
+            for shard in [s for s in self.loaded if s not in needed]:
+                self._unload(shard)
+                changed = True
+            return changed
+
+    def entries_for(self, games):
+        """Einträge der Spiele aus den bereits geladenen Shards (lädt selbst nichts nach)."""
+        with self.lock:
+            return [e for game in games for entries in self.by_game.get(game, {}).values() for e in entries]
+
+    def loaded_entries(self):
+        with self.lock:
+            return [e for shards in self.by_game.values() for entries in shards.values() for e in entries]
+
+    def stamp(self, games):
+        """
+        Stempel der geladenen Shards zu games (None für nicht geladene), für die
+        Invalidierung vorkompilierter Pläne: ändert sich, sobald require() einen
+        Shard lädt, neu lädt oder verwirft.
+        """
+        with self.lock:
+            return tuple(sorted((shard, self.loaded[shard][0] if shard in self.loaded else None)
+                                for shard in self.shards_for(games)))
+
+shards = ShardCatalog()
+
+def catalog_entries(games=None):
+    """
+    Einträge aus CSV_FILE plus die Einträge der geladenen Shards
+    (mit games nur die dieser Spiele). Grundlage für build_candidate_pool.
+    """
+    entries = load_entries_cached(CSV_FILE)
+    if games is None:
+        entries.extend(shards.loaded_entries())
+    else:
+        entries.extend(shards.entries_for(games))
+    return entries
+
+def catalog_stamp(games):
+    return file_stamp(CSV_FILE), shards.stamp(games)
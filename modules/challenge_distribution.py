@@ -0,0 +1,201 @@
+# modules/challenge_distribution.py
+import math
+from modules.challenge_generator import effective_b2b_probability, segment_multiplier
+from modules.profiling import instrument
+
+# Höchstzahl an Schwierigkeits-Stufen bis desired_diff; bestimmt die automatische Auflösung.
+MAX_BINS = 100
+MIN_RESOLUTION = 0.25
+PRUNE = 1e-12
+
+def _add_discretized(pmf, value, prob, resolution):
+    # Wert auf die beiden benachbarten Stufen verteilen, sodass der Erwartungswert exakt bleibt
+    pos = value / resolution
+    low = math.floor(pos)
+    frac = pos - low
+    if frac < 1e-9:
+        pmf[low] = pmf.get(low, 0.0) + prob
+        return
+    pmf[low] = pmf.get(low, 0.0) + prob * (1 - frac)
+    pmf[low + 1] = pmf.get(low + 1, 0.0) + prob * frac
+
+def win_difficulty_pmf(available_games, valid_games, valid_weights):
+    """
+    Verteilung der Schwierigkeit eines einzelnen Wins: {schwierigkeit: wahrscheinlichkeit},
+    entsprechend random.choices über die Spielgewichte und random.choice über die Einträge.
+    """
+    total_weight = sum(valid_weights)
+    pmf = {}
+    if total_weight <= 0:
+        return pmf
+    for game, weight in zip(valid_games, valid_weights):
+        game_entries = available_games[game]
+        p = weight / total_weight / len(game_entries)
+        for entry in game_entries:
+            pmf[entry["Schwierigkeit"]] = pmf.get(entry["Schwierigkeit"], 0.0) + p
+    return pmf
+
+def auto_resolution(desired_diff):
+    return max(MIN_RESOLUTION, desired_diff / MAX_BINS)
+
+def _segment_outcomes(win_pmf, p_eff, resolution):
+    """
+    Alle möglichen Segmente als {länge: {stufe: wahrscheinlichkeit}}, wobei die
+    Wahrscheinlichkeit der Länge bereits eingerechnet ist.
+    """
+    binned = {}
+    for value, prob in win_pmf.items():
+        _add_discretized(binned, value, prob, resolution)
+    outcomes = {}
+    if p_eff < 1:
+        outcomes[1] = {b: p * (1 - p_eff) for b, p in binned.items()}
+    if p_eff > 0:
+        # Summe von L Wins per Faltung, danach mit 1.5^(L-1) skaliert
+        sums = dict(binned)
+        for seg_length in (2, 3, 4):
+            nxt = {}
+            for b1, p1 in sums.items():
+                for b2, p2 in binned.items():
+                    nxt[b1 + b2] = nxt.get(b1 + b2, 0.0) + p1 * p2
+            sums = nxt
+            multiplier = segment_multiplier(seg_length)
+            scaled = {}
+            for b, p in sums.items():
+                _add_discretized(scaled, b * resolution * multiplier, p * p_eff / 3, resolution)
+            outcomes[seg_length] = scaled
+    return outcomes
+
+@instrument("challenge_distribution")
+def challenge_distribution(win_pmf, raw_b2b, desired_diff, resolution=None):
+    """
+    Exakte Verteilung (bis auf die Diskretisierung der Schwierigkeiten auf
+    Stufen der Breite resolution) von Gesamtzahl der Wins und finaler
+    Gesamtschwierigkeit für das Segmentmodell aus sample_segments.
+
+    Dynamische Programmierung über die bisher erreichte Schwierigkeit s:
+    für jede Stufe s < desired_diff wird die Verteilung der bisherigen
+    Win-Anzahl mitgeführt und mit allen Segment-Ausgängen weitergefaltet;
+    Ausgänge, die desired_diff erreichen, landen in der Endverteilung.
+    Gibt None zurück, wenn die Challenge nie endet (alle Schwierigkeiten 0).
+    """
+    if resolution is None:
+        resolution = auto_resolution(desired_diff)
+    p_eff = effective_b2b_probability(raw_b2b)
+    outcomes = _segment_outcomes(win_pmf, p_eff, resolution)
+    target = math.ceil(desired_diff / resolution - 1e-9)
+
+    # Segmente ohne Schwierigkeit (Stufe 0) bleiben auf derselben Stufe und werden vorab aufgelöst
+    zero_steps = [(length, pmf.get(0, 0.0)) for length, pmf in outcomes.items() if pmf.get(0, 0.0) > 0]
+    q0 = sum(p for _, p in zero_steps)
+    if q0 >= 1 - 1e-12:
+        return None
+    steps = [(length, b, p) for length, pmf in outcomes.items() for b, p in pmf.items() if b > 0 and p > PRUNE]
+
+    # states[s] = (offset, probs): probs[i] = P(Stufe s mit offset + i Wins erreicht)
+    states = {0: (0, [1.0])}
+    final_wins = {}
+    final_diff = {}
+    final_by_length = {}
+    expected_segments = 0.0
+    for s in range(target):
+        state = states.pop(s, None)
+        if state is None:
+            continue
+        offset, probs = _trim(*state)
+        if zero_steps:
+            offset, probs = _absorb_zero_steps(offset, probs, zero_steps)
+        mass = sum(probs)
+        expected_segments += mass
+        for length, b, p in steps:
+            t = s + b
+            if t >= target:
+                final_diff[t] = final_diff.get(t, 0.0) + mass * p
+                final_by_length[length] = final_by_length.get(length, 0.0) + p
+            else:
+                _accumulate(states, t, offset + length, probs, p)
+        # Endverteilung der Wins je Segmentlänge nur einmal pro Stufe falten
+        for length, p in final_by_length.items():
+            for i, q in enumerate(probs):
+                n = offset + i + length
+                final_wins[n] = final_wins.get(n, 0.0) + q * p
+        final_by_length.clear()
+    if target <= 0:
+        final_wins[0] = 1.0
+        final_diff[0] = 1.0
+
+    wins = dict(sorted(final_wins.items()))
+    total_diff = {t * resolution: p for t, p in sorted(final_diff.items())}
+    expected_total = sum(d * p for d, p in total_diff.items())
+    return {
+        "resolution": resolution,
+        "wins": wins,
+        "total_diff": total_diff,
+        "expected_wins": sum(n * p for n, p in wins.items()),
+        "expected_segments": expected_segments,
+        "expected_b2b_segments": expected_segments * p_eff,
+        "expected_total_diff": expected_total,
+        "expected_overshoot": expected_total - desired_diff,
+    }
+
+def _trim(offset, probs):
+    # Vernachlässigbare Ränder der Win-Verteilung abschneiden
+    mass = sum(probs)
+    limit = mass * PRUNE
+    start = 0
+    end = len(probs)
+    while start < end - 1 and probs[start] < limit:
+        start += 1
+    while end - 1 > start and probs[end - 1] < limit:
+        end -= 1
+    if start == 0 and end == len(probs):
+        return offset, probs
+    return offset + start, probs[start:end]
+
+def _accumulate(states, t, offset, probs, p):
+    existing = states.get(t)
+    if existing is None:
+        states[t] = (offset, [q * p for q in probs])
+        return
+    old_offset, old = existing
+    start = min(old_offset, offset)
+    end = max(old_offset + len(old), offset + len(probs))
+    if start != old_offset or end != old_offset + len(old):
+        old = [0.0] * (old_offset - start) + old + [0.0] * (end - old_offset - len(old))
+    base = offset - start
+    old[base:base + len(probs)] = [a + q * p for a, q in zip(old[base:base + len(probs)], probs)]
+    states[t] = (start, old)
+
+def _absorb_zero_steps(offset, probs, zero_steps):
+    # Geometrische Reihe über beliebig viele Segmente ohne Schwierigkeit
+    total = {offset + i: q for i, q in enumerate(probs)}
+    frontier = dict(total)
+    while sum(frontier.values()) > PRUNE:
+        nxt = {}
+        for n, q in frontier.items():
+            for length, p in zero_steps:
+                nxt[n + length] = nxt.get(n + length, 0.0) + q * p
+        for n, q in nxt.items():
+            total[n] = total.get(n, 0.0) + q
+        frontier = nxt
+    start = min(total)
+    merged = [0.0] * (max(total) - start + 1)
+    for n, q in total.items():
+        merged[n - start] = q
+    return start, merged
+
+def expected_length_summary(distribution):
+    """Kurze Textzusammenfassung für die Vorschau im Generator-Tab."""
+    if distribution is None:
+        return "Keine Vorschau möglich (alle Schwierigkeiten sind 0)."
+    wins = distribution["wins"]
+    cumulative = 0.0
+    low = high = None
+    for n, p in wins.items():
+        cumulative += p
+        if low is None and cumulative >= 0.1:
+            low = n
+        if high is None and cumulative >= 0.9:
+            high = n
+    return (f"Erwartet: {distribution['expected_wins']:.1f} Wins (80 % zwischen {low} und {high}), "
+            f"{distribution['expected_b2b_segments']:.1f} B2B-Segmente, "
+            f"Überschreitung Ø {distribution['expected_overshoot']:.2f}")
@@ -1,13 +1,21 @@
 # modules/challenge_generator.py
+import bisect
+import math
 import random
-from modules.csv_handler import load_entries
-from config import CSV_FILE
+import statistics
+from modules.catalog_shards import catalog_entries
+from modules.profiling import instrument
+from modules.sampling import ConstrainedDrawer, EntrySampler, RecencyState, constraints_from_game_vars
 
-def generate_challenge_logic(num_players, desired_diff, selected_game_list, weights, game_vars, raw_b2b):
-    # Lade alle Einträge, die die Mindestspielerzahl erfüllen.
-    entries = load_entries(CSV_FILE)
+@instrument("generate_challenge_logic.filter")
+def build_candidate_pool(entries, num_players, selected_game_list, weights, game_vars):
+    """
+    Filtert die Einträge nach Spieleranzahl und erlaubten Gamemodes.
+    Gibt (available_games, valid_games, valid_weights) zurück oder None,
+    wenn keines der ausgewählten Spiele passende Einträge hat.
+    """
     filtered = [e for e in entries if e["Spieleranzahl"] >= num_players]
-    
+
     # Erstelle ein Dictionary verfügbarer Spiele, basierend auf den erlaubten Gamemodes.
     available_games = {}
     for game in selected_game_list:
@@ -15,7 +23,7 @@ def generate_challenge_logic(num_players, desired_diff, selected_game_list, weig
         game_entries = [e for e in filtered if e["Spiel"] == game and e["Spielmodus"] in allowed]
         if game_entries:
             available_games[game] = game_entries
-    
+
     # Filtere die ausgewählten Spiele (und deren Gewichte) so, dass nur Spiele mit verfügbaren Einträgen bleiben.
     valid_games = []
     valid_weights = []
@@ -25,27 +33,293 @@ def generate_challenge_logic(num_players, desired_diff, selected_game_list, weig
             valid_weights.append(weight)
     if not valid_games:
         return None  # Keine Spiele gefunden
+    return available_games, valid_games, valid_weights
 
+def effective_b2b_probability(raw_b2b):
     # Back-to-Back Wahrscheinlichkeit transformieren
-    p_eff = (raw_b2b / 10) ** 1.447
+    return (raw_b2b / 10) ** 1.447
+
+def segment_multiplier(seg_length):
+    return 1.5 ** (seg_length - 1) if seg_length > 1 else 1.0
+
+def make_segment(wins):
+    seg_length = len(wins)
+    seg_sum = sum(win["Schwierigkeit"] for win in wins)
+    return {"wins": wins, "length": seg_length, "seg_diff": seg_sum * segment_multiplier(seg_length)}
+
+def make_win_drawer(available_games, valid_games, valid_weights, rng=random):
+    # Standardauswahl eines Wins: Spiel nach Gewicht, dann Eintrag gleichverteilt
+    def draw_win():
+        chosen_game = rng.choices(valid_games, weights=valid_weights, k=1)[0]
+        return rng.choice(available_games[chosen_game])
+    return draw_win
+
+def _sample_segment(draw_win, p_eff, rng=random):
+    if rng.uniform(0, 1) < p_eff:
+        seg_length = rng.choice([2, 3, 4])
+    else:
+        seg_length = 1
+    wins = []
+    for _ in range(seg_length):
+        win = draw_win()
+        if win is None:
+            # Alle Einträge durch Constraints gesperrt: Segment endet vorzeitig
+            break
+        wins.append(win)
+    if not wins:
+        return None
+    return make_segment(wins)
 
+@instrument("generate_challenge_logic.sample")
+def sample_segments(available_games, valid_games, valid_weights, desired_diff, raw_b2b, draw_win=None, rng=random):
+    """
+    Zieht Segmente, bis desired_diff erreicht ist. draw_win() liefert einen
+    einzelnen Win; ohne Angabe wird make_win_drawer verwendet. Liefert
+    draw_win None (alles gesperrt), endet die Challenge vorzeitig.
+    rng ist die Zufallsquelle (random.Random oder das Modul random).
+    """
+    if draw_win is None:
+        draw_win = make_win_drawer(available_games, valid_games, valid_weights, rng)
+    p_eff = effective_b2b_probability(raw_b2b)
     segments = []
     total_diff = 0.0
     while total_diff < desired_diff:
-        if random.uniform(0, 1) < p_eff:
-            seg_length = random.choice([2, 3, 4])
+        seg = _sample_segment(draw_win, p_eff, rng)
+        if seg is None:
+            break
+        segments.append(seg)
+        total_diff += seg["seg_diff"]
+    return segments, total_diff
+
+# Für den Modus mit begrenzter Überschreitung werden Schwierigkeiten in
+# Hundertsteln als ganze Zahlen gerechnet, damit erreichbare Summen als
+# Bitmaske (Bit s gesetzt = Summe s erreichbar) dargestellt werden können.
+DIFF_UNITS = 100
+
+def _coin_table(available_games, valid_games, valid_weights, allow_entry=None):
+    """
+    Gruppiert alle Einträge mit Schwierigkeit > 0 nach ihrer Schwierigkeit
+    in Hundertsteln: {units: ([(entry, gewicht), ...], summe_gewichte)}.
+    Das Gewicht eines Eintrags entspricht seiner Ziehwahrscheinlichkeit im
+    normalen Modus (Spielgewicht / Anzahl Einträge des Spiels). Mit
+    allow_entry werden z.B. durch Constraints gesperrte Einträge ausgelassen.
+    """
+    coins = {}
+    for game, weight in zip(valid_games, valid_weights):
+        game_entries = available_games[game]
+        entry_weight = weight / len(game_entries)
+        if entry_weight <= 0:
+            continue
+        for entry in game_entries:
+            units = round(entry["Schwierigkeit"] * DIFF_UNITS)
+            if units <= 0 or (allow_entry is not None and not allow_entry(entry)):
+                continue
+            candidates, total = coins.get(units, ([], 0.0))
+            candidates.append((entry, entry_weight))
+            coins[units] = (candidates, total + entry_weight)
+    return coins
+
+def _unbounded_reach(coins, limit):
+    # Alle Summen bis limit, die sich mit beliebig vielen Münzen bilden lassen
+    mask = (1 << (limit + 1)) - 1
+    reach = 1
+    for units in coins:
+        step = units
+        while step <= limit:
+            reach |= (reach << step) & mask
+            step *= 2
+    return reach
+
+def _nth_set_bit(bits, n):
+    # Position des n-ten gesetzten Bits (ab 0), per Halbierung statt Liste aller Bits
+    pos = 0
+    width = bits.bit_length()
+    while width > 1:
+        half = width // 2
+        low = bits & ((1 << half) - 1)
+        count = low.bit_count()
+        if n < count:
+            bits, width = low, half
         else:
-            seg_length = 1
-        wins = []
-        for _ in range(seg_length):
-            chosen_game = random.choices(valid_games, weights=valid_weights, k=1)[0]
-            chosen_entry = random.choice(available_games[chosen_game])
-            wins.append(chosen_entry)
-        seg_sum = sum(win["Schwierigkeit"] for win in wins)
-        seg_diff = seg_sum * (1.5 ** (seg_length - 1)) if seg_length > 1 else seg_sum
-        segments.append({"wins": wins, "length": seg_length, "seg_diff": seg_diff})
-        total_diff += seg_diff
+            n -= count
+            bits >>= half
+            pos += half
+            width -= half
+    return pos
+
+def _pick_target(reach, lo, hi, rng=random):
+    """Zufällige erreichbare Summe in [lo, hi], sonst die kleinste erreichbare Summe >= lo."""
+    window = (reach >> lo) & ((1 << (hi - lo + 1)) - 1)
+    if window:
+        return lo + _nth_set_bit(window, rng.randrange(window.bit_count()))
+    above = reach >> lo
+    if not above:
+        return None
+    return lo + ((above & -above).bit_length() - 1)
+
+def _pick_coin(coins, allowed, rng=random):
+    units_list = [u for u in coins if allowed(u)]
+    units = rng.choices(units_list, weights=[coins[u][1] for u in units_list], k=1)[0]
+    candidates = coins[units][0]
+    entry = rng.choices([c[0] for c in candidates], weights=[c[1] for c in candidates], k=1)[0]
+    return units, entry
+
+def _window(remaining, tolerance, coins):
+    # Zielfenster [lo, hi] in Hundertsteln für den Rest; mehr als ein volles 4er-Segment
+    # aus der schwersten Münze über lo hinaus ist nie nötig (begrenzt die Bitmasken)
+    lo = math.ceil(remaining * DIFF_UNITS - 1e-6)
+    hi = max(lo, math.floor((remaining + tolerance) * DIFF_UNITS + 1e-6))
+    return lo, min(hi, lo + math.ceil(max(coins) * 4 * segment_multiplier(4)))
+
+def _in_window(reach, lo, hi):
+    return (reach >> lo) & ((1 << (hi - lo + 1)) - 1) != 0
+
+def _complete_with_normal_wins(coins, lo, hi, rng=random):
+    limit = max(hi, lo + max(coins))
+    reach = _unbounded_reach(coins, limit)
+    target = _pick_target(reach, lo, hi, rng)
+    if target is None:
+        return None
+    segments = []
+    s = target
+    while s > 0:
+        units, entry = _pick_coin(coins, lambda u: u <= s and reach >> (s - u) & 1, rng)
+        segments.append(make_segment([entry]))
+        s -= units
+    return segments
+
+def _complete_with_b2b_segment(coins, lo, hi, seg_length, rng=random):
+    # Genau seg_length Münzen, deren Summe mal Multiplikator im Fenster liegt
+    multiplier = segment_multiplier(seg_length)
+    seg_lo = math.ceil(lo / multiplier)
+    seg_hi = math.floor(hi / multiplier)
+    if seg_hi < seg_lo:
+        return None
+    mask = (1 << (seg_hi + 1)) - 1
+    reach_by_count = [1]
+    for _ in range(seg_length):
+        prev = reach_by_count[-1]
+        nxt = 0
+        for units in coins:
+            nxt |= (prev << units) & mask
+        reach_by_count.append(nxt)
+    window = (reach_by_count[-1] >> seg_lo) & ((1 << (seg_hi - seg_lo + 1)) - 1)
+    if not window:
+        return None
+    target = _pick_target(reach_by_count[-1], seg_lo, seg_hi, rng)
+    wins = []
+    s = target
+    for k in range(seg_length, 0, -1):
+        prev = reach_by_count[k - 1]
+        units, entry = _pick_coin(coins, lambda u: u <= s and prev >> (s - u) & 1, rng)
+        wins.append(entry)
+        s -= units
+    rng.shuffle(wins)
+    return [make_segment(wins)]
+
+@instrument("generate_challenge_logic.sample_bounded")
+def sample_segments_bounded(available_games, valid_games, valid_weights, desired_diff, raw_b2b, tolerance,
+                            draw_win=None, drawer=None, rng=random, sampler=None):
+    """
+    Wie sample_segments, überschreitet desired_diff aber höchstens um
+    tolerance (sofern die Schwierigkeiten der Einträge das zulassen),
+    ohne neu zu würfeln. Zufällige Segmente werden gezogen, bis das nächste
+    Segment überschießen würde oder danach kein Rest mehr im Fenster
+    [rest, rest + tolerance] aus Normal Wins erreichbar wäre; dieses Segment
+    wird verworfen und der Rest über eine Tabelle erreichbarer Summen gezielt
+    aufgefüllt: mit Wahrscheinlichkeit p_eff durch ein einzelnes
+    Back-to-Back Segment, sonst (oder wenn kein Segment passt) durch Normal Wins.
+
+    Mit drawer (ConstrainedDrawer) wird die Auffüllung nur aus den danach
+    noch erlaubten Einträgen gebildet. Würde sie einen Höchstwert
+    überschreiten, wird sie verworfen und stattdessen mit einzeln gezogenen
+    Normal Wins aufgefüllt - die Constraints haben dann Vorrang vor tolerance.
+
+    sampler ist der EntrySampler hinter draw_win bzw. drawer (falls vorhanden):
+    Wins des verworfenen Segments werden dort aus der Recency-Hitze
+    zurückgenommen, die über die Tabelle gewählten Wins eingetragen.
+    """
+    if drawer is not None:
+        draw_win = drawer.draw
+        sampler = drawer.sampler
+    elif draw_win is None:
+        draw_win = make_win_drawer(available_games, valid_games, valid_weights, rng)
+    p_eff = effective_b2b_probability(raw_b2b)
+    all_coins = _coin_table(available_games, valid_games, valid_weights)
+    if not all_coins:
+        return sample_segments(available_games, valid_games, valid_weights, desired_diff, raw_b2b, draw_win, rng)
+    # Erreichbare Summen einmal bis zum obersten Fenster; ist schon desired_diff nicht
+    # erreichbar, wird (wie bisher) nur auf Überschießen geprüft
+    _, reach_limit = _window(desired_diff, tolerance, all_coins)
+    reach = _unbounded_reach(all_coins, reach_limit)
+    if not _in_window(reach, *_window(desired_diff, tolerance, all_coins)):
+        reach = None
+
+    segments = []
+    total_diff = 0.0
+    while True:
+        seg = _sample_segment(draw_win, p_eff, rng)
+        if seg is None:
+            return segments, total_diff
+        rest = desired_diff - total_diff - seg["seg_diff"]
+        if rest < 0 or (reach is not None and rest > 0 and not _in_window(reach, *_window(rest, tolerance, all_coins))):
+            if drawer is not None:
+                drawer.unregister(seg["wins"])
+            if sampler is not None:
+                for win in seg["wins"]:
+                    sampler.undraw(win)
+            break
+        segments.append(seg)
+        total_diff += seg["seg_diff"]
 
+    coins = _coin_table(available_games, valid_games, valid_weights,
+                        drawer.allows if drawer is not None else None)
+
+    remaining = desired_diff - total_diff
+    if remaining > 0:
+        lo, hi = _window(remaining, tolerance, coins or all_coins)
+        completion = None
+        if coins and rng.uniform(0, 1) < p_eff:
+            for seg_length in rng.sample([2, 3, 4], 3):
+                completion = _complete_with_b2b_segment(coins, lo, hi, seg_length, rng)
+                if completion:
+                    break
+        if not completion and coins:
+            completion = _complete_with_normal_wins(coins, lo, hi, rng)
+        if completion and drawer is not None and not _register_completion(drawer, completion):
+            completion = None
+        if completion and sampler is not None:
+            for seg in completion:
+                for win in seg["wins"]:
+                    sampler.record(win)
+        if completion is None and drawer is not None:
+            completion = []
+            added = 0.0
+            while total_diff + added < desired_diff:
+                win = drawer.draw()
+                if win is None:
+                    break
+                completion.append(make_segment([win]))
+                added += completion[-1]["seg_diff"]
+        for seg in completion or ():
+            segments.append(seg)
+            total_diff += seg["seg_diff"]
+    return segments, total_diff
+
+def _register_completion(drawer, completion):
+    # Alle Wins der Auffüllung registrieren; bei Verstoß gegen einen Höchstwert alles zurücknehmen
+    registered = []
+    for seg in completion:
+        for win in seg["wins"]:
+            if not drawer.allows(win):
+                drawer.unregister(registered)
+                return False
+            drawer.register(win)
+            registered.append(win)
+    return True
+
+@instrument("generate_challenge_logic.group")
+def group_segments(segments):
     # Gruppiere Normal Wins
     normal_segments = [seg for seg in segments if seg["length"] == 1]
     normal_group = {}
@@ -66,19 +340,259 @@ def generate_challenge_logic(num_players, desired_diff, selected_game_list, weig
             key = f"{win['Spiel']} ({win['Spielmodus']})"
             group[key] = group.get(key, 0) + 1
         b2b_grouped.append({"group": group, "length": seg["length"], "seg_diff": seg["seg_diff"]})
+    return normal_group, b2b_grouped
 
-    # Formatieren des Ergebnisses
-    result = f"Gesamtschwierigkeit: {total_diff:.2f}\n\n"
+def iter_result_lines(total_diff, normal_group, b2b_grouped):
+    """Ergebnistext Zeile für Zeile (jeweils mit "\\n"), z.B. zum schrittweisen Einfügen in ein Textfeld."""
+    yield f"Gesamtschwierigkeit: {total_diff:.2f}\n"
+    yield "\n"
     if normal_group:
-        result += "Normal Wins:\n"
+        yield "Normal Wins:\n"
         for key, info in normal_group.items():
-            result += f"  {key}: {info['count']} win(s) (Summe Schwierigkeit: {info['diff']:.2f})\n"
-        result += "\n"
+            yield f"  {key}: {info['count']} win(s) (Summe Schwierigkeit: {info['diff']:.2f})\n"
+        yield "\n"
     if b2b_grouped:
-        result += "Back-to-Back Wins:\n"
+        yield "Back-to-Back Wins:\n"
         for i, seg in enumerate(b2b_grouped, 1):
-            result += f"  Segment {i} ({seg['length']} wins, berechnete Schwierigkeit: {seg['seg_diff']:.2f}):\n"
+            yield f"  Segment {i} ({seg['length']} wins, berechnete Schwierigkeit: {seg['seg_diff']:.2f}):\n"
             for key, count in seg["group"].items():
-                result += f"    {key}: {count} win(s)\n"
-            result += "\n"
-    return {"result": result, "normal": normal_group, "b2b": b2b_grouped}
+                yield f"    {key}: {count} win(s)\n"
+            yield "\n"
+
+@instrument("generate_challenge_logic.format")
+def format_result(total_diff, normal_group, b2b_grouped):
+    # join statt wiederholtem += : linear in der Textlänge
+    return "".join(iter_result_lines(total_diff, normal_group, b2b_grouped))
+
+# ----- Analysepfad: viele Läufe für Statistiken (ohne Ergebnistext) -----
+SIMULATION_METHODS = ("naive", "antithetic", "stratified")
+
+def _entry_table(available_games, valid_games, valid_weights):
+    """
+    Alle Einträge mit kumulierten Ziehgewichten, damit ein Win aus genau
+    einer Zufallszahl folgt. Nach Schwierigkeit sortiert, sodass u monoton
+    auf die Schwierigkeit abbildet - nur dann bringen gespiegelte bzw.
+    stratifizierte Zufallszahlen eine Varianzreduktion.
+    """
+    weighted = []
+    for game, weight in zip(valid_games, valid_weights):
+        game_entries = available_games[game]
+        entry_weight = weight / len(game_entries)
+        weighted.extend((entry, entry_weight) for entry in game_entries)
+    weighted.sort(key=lambda item: item[0]["Schwierigkeit"])
+    entries = []
+    cumulative = []
+    total = 0.0
+    for entry, entry_weight in weighted:
+        total += entry_weight
+        entries.append(entry)
+        cumulative.append(total)
+    return entries, cumulative
+
+# Zufallszahlen pro Segment: B2B ja/nein, Segmentlänge, bis zu 4 Wins
+_DECISIONS_PER_SEGMENT = 6
+
+def _simulate_run(uniforms, entries, cumulative, desired_diff, p_eff):
+    """
+    Ein Lauf mit demselben Segmentmodell wie sample_segments, aber jede
+    Entscheidung per Inversionsmethode aus uniforms. Jedes Segment verbraucht
+    immer _DECISIONS_PER_SEGMENT Zahlen, damit die j-te Zahl in allen Läufen
+    dieselbe Entscheidung steuert (Voraussetzung für Stratifizierung und
+    gespiegelte Läufe). Gibt (wins, total_diff, b2b_segmente) zurück.
+    """
+    total_weight = cumulative[-1]
+    last = len(entries) - 1
+    wins = 0
+    total_diff = 0.0
+    b2b = 0
+    while total_diff < desired_diff:
+        u = [next(uniforms) for _ in range(_DECISIONS_PER_SEGMENT)]
+        if u[0] < p_eff:
+            seg_length = 2 + min(2, int(u[1] * 3))
+            b2b += 1
+        else:
+            seg_length = 1
+        seg_sum = 0.0
+        for k in range(seg_length):
+            i = bisect.bisect_right(cumulative, u[2 + k] * total_weight)
+            seg_sum += entries[min(i, last)]["Schwierigkeit"]
+        wins += seg_length
+        total_diff += seg_sum * segment_multiplier(seg_length)
+    return wins, total_diff, b2b
+
+class _LatinHypercube:
+    """
+    Stratifizierte Zufallszahlen für n Läufe: für die j-te Entscheidung
+    eines Laufs liegt genau ein Lauf in jedem Intervall [k/n, (k+1)/n).
+    Die Permutationen je Entscheidung werden erst bei Bedarf erzeugt, da
+    die Anzahl der Entscheidungen pro Lauf nicht fest ist.
+    """
+    def __init__(self, n, rng):
+        self.n = n
+        self.rng = rng
+        self.strata = []
+
+    def stream(self, run):
+        j = 0
+        while True:
+            if j == len(self.strata):
+                perm = list(range(self.n))
+                self.rng.shuffle(perm)
+                self.strata.append(perm)
+            yield (self.strata[j][run] + self.rng.random()) / self.n
+            j += 1
+
+def _antithetic_pair(rng):
+    # Zweiter Lauf verwendet 1 - u an denselben Entscheidungsstellen wie der erste
+    used = []
+    def first():
+        while True:
+            u = rng.random()
+            used.append(u)
+            yield u
+    def second():
+        j = 0
+        while True:
+            yield 1.0 - used[j] if j < len(used) else rng.random()
+            j += 1
+    return first(), second()
+
+def _mean_and_error(units):
+    # units sind unabhängige, gleich verteilte Schätzer (Läufe, Paare oder Blöcke)
+    mean = statistics.fmean(units)
+    error = statistics.stdev(units) / math.sqrt(len(units)) if len(units) > 1 else float("inf")
+    return mean, error
+
+@instrument("simulate_challenges")
+def simulate_challenges(pool, desired_diff, raw_b2b, runs, method="naive", replicates=10, seed=None):
+    """
+    Schätzt Erwartungswerte (Wins, Gesamtschwierigkeit, B2B-Segmente) aus
+    runs Läufen. method:
+    naive      - unabhängige Läufe,
+    antithetic - Läufe in Paaren mit gespiegelten Zufallszahlen (u, 1 - u),
+    stratified - Latin-Hypercube über die Entscheidungen, aufgeteilt in
+                 replicates unabhängige Blöcke (für den Standardfehler).
+    Gibt {"method", "runs", "wins", "total_diff", "b2b_segments"} zurück, die
+    Kennzahlen jeweils als (mittelwert, standardfehler), oder None, wenn
+    keine Challenge endet (alle Schwierigkeiten 0).
+    """
+    if method not in SIMULATION_METHODS:
+        raise ValueError(f"Unbekannte Methode: {method}")
+    entries, cumulative = _entry_table(*pool)
+    if not entries or cumulative[-1] <= 0 or max(e["Schwierigkeit"] for e in entries) <= 0:
+        return None
+    rng = random.Random(seed)
+    p_eff = effective_b2b_probability(raw_b2b)
+    def run(uniforms):
+        return _simulate_run(uniforms, entries, cumulative, desired_diff, p_eff)
+
+    units = []  # je Schätzeinheit (wins, total_diff, b2b) als Mittelwert
+    if method == "naive":
+        units = [run(iter(rng.random, -1.0)) for _ in range(runs)]
+        used_runs = len(units)
+    elif method == "antithetic":
+        for _ in range(max(1, runs // 2)):
+            first, second = _antithetic_pair(rng)
+            a = run(first)
+            b = run(second)
+            units.append(tuple((x + y) / 2 for x, y in zip(a, b)))
+        used_runs = 2 * len(units)
+    else:
+        replicates = max(2, min(replicates, runs))
+        block = max(1, runs // replicates)
+        for _ in range(replicates):
+            lhs = _LatinHypercube(block, rng)
+            results = [run(lhs.stream(i)) for i in range(block)]
+            units.append(tuple(sum(col) / block for col in zip(*results)))
+        used_runs = replicates * block
+    wins, total_diff, b2b = zip(*units)
+    return {
+        "method": method,
+        "runs": used_runs,
+        "wins": _mean_and_error(wins),
+        "total_diff": _mean_and_error(total_diff),
+        "b2b_segments": _mean_and_error(b2b),
+    }
+
+def sample_challenge(pool, desired_diff, raw_b2b, tolerance=None, constraints=None, recency=None, sampler=None,
+                     rng=random):
+    """
+    Zieht die Segmente einer Challenge aus pool = (available_games, valid_games,
+    valid_weights), mit optionaler Toleranz, Constraints und Recency-Gewichtung.
+    sampler ist ein optional vorab erzeugter EntrySampler für diesen pool
+    (z.B. aus einem Preset), der dann nur kopiert wird. Alle Ziehungen
+    verwenden rng, z.B. random.Random(seed) für reproduzierbare Challenges.
+    Gibt (segments, total_diff) zurück.
+    """
+    available_games, valid_games, valid_weights = pool
+    draw_win = None
+    drawer = None
+    if recency is not None or constraints:
+        if sampler is not None:
+            sampler = sampler.clone(recency, rng)
+        else:
+            sampler = EntrySampler(available_games, valid_games, valid_weights, recency, rng)
+        draw_win = sampler.draw
+        if constraints:
+            drawer = ConstrainedDrawer(sampler, constraints, rng)
+            draw_win = drawer.draw
+    if tolerance is None:
+        segments, total_diff = sample_segments(available_games, valid_games, valid_weights, desired_diff, raw_b2b,
+                                               draw_win, rng)
+    else:
+        segments, total_diff = sample_segments_bounded(available_games, valid_games, valid_weights,
+                                                       desired_diff, raw_b2b, tolerance, draw_win, drawer, rng, sampler)
+    if drawer is not None:
+        # Noch offene Mindestanzahlen (Challenge war schon vorher lang genug)
+        while True:
+            win = drawer.draw_required()
+            if win is None:
+                break
+            seg = make_segment([win])
+            segments.append(seg)
+            total_diff += seg["seg_diff"]
+    return segments, total_diff
+
+def build_challenge(segments, total_diff):
+    normal_group, b2b_grouped = group_segments(segments)
+    result = format_result(total_diff, normal_group, b2b_grouped)
+    return {"result": result, "normal": normal_group, "b2b": b2b_grouped, "total_diff": total_diff}
+
+@instrument("generate_challenge_logic")
+def generate_challenge_logic(num_players, desired_diff, selected_game_list, weights, game_vars, raw_b2b,
+                             tolerance=None, avoid_repeats=False, plan=None, seed=None):
+    """
+    Erzeugt eine Challenge. Mit tolerance (>= 0) wird der Modus mit
+    begrenzter Überschreitung verwendet: die Gesamtschwierigkeit landet in
+    [desired_diff, desired_diff + tolerance], soweit die Einträge das zulassen.
+    Mit avoid_repeats werden kürzlich gezogene (Spiel, Spielmodus)-Kombinationen
+    über EntrySampler abgewertet; der Zustand bleibt zwischen Generierungen erhalten.
+    Sind in game_vars min_wins/max_wins/mode_caps gesetzt, werden sie beim Ziehen
+    über ConstrainedDrawer eingehalten; fehlende Pflicht-Wins werden am Ende als
+    Normal Wins angehängt. plan ist ein vorkompilierter Plan aus
+    modules.presets (pool und EntrySampler), dann entfällt das Filtern.
+    Der verwendete Seed steht in "seed"; mit demselben Seed (und gleichem
+    Katalog/Recency-Zustand) entsteht dieselbe Challenge.
+    """
+    seed = random.getrandbits(63) if seed is None else seed
+    # Eigener Generator statt random.seed(), damit der globale Zustand unberührt bleibt
+    rng = random.Random(seed)
+    sampler = None
+    if plan is not None:
+        pool = plan["pool"]
+        sampler = plan["sampler"]
+    else:
+        # Katalog plus die Shards der ausgewählten Spiele
+        entries = catalog_entries(selected_game_list)
+        pool = build_candidate_pool(entries, num_players, selected_game_list, weights, game_vars)
+    if pool is None:
+        return None
+    recency = RecencyState.load() if avoid_repeats else None
+    constraints = constraints_from_game_vars(pool[1], game_vars)
+    segments, total_diff = sample_challenge(pool, desired_diff, raw_b2b, tolerance, constraints, recency, sampler, rng)
+    if avoid_repeats:
+        recency.decay()
+        recency.save()
+    data = build_challenge(segments, total_diff)
+    data["seed"] = seed
+    return data
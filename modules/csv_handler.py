@@ -2,13 +2,16 @@
 import csv
 import os
 from config import CSV_FILE, STRAFEN_CSV
+from modules.profiling import instrument
+from modules.file_lock import atomic_write, file_stamp
 
 def ensure_csv_exists(filename, headers):
     if not os.path.exists(filename):
-        with open(filename, "w", newline="", encoding="utf-8") as f:
+        with atomic_write(filename) as f:
             writer = csv.writer(f)
             writer.writerow(headers)
 
+@instrument("load_entries")
 def load_entries(filename):
     ensure_csv_exists(filename, ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"])
     entries = []
@@ -26,9 +29,49 @@ def load_entries(filename):
             entries.append(row)
     return entries
 
+_entry_cache = {}
+
+def load_entries_cached(filename):
+    """
+    Wie load_entries, liest die Datei aber nur neu, wenn sich Versionszähler,
+    mtime oder Größe geändert haben. Gibt eine flache Kopie der Liste zurück;
+    die Einträge selbst dürfen nicht verändert werden.
+    """
+    key = os.path.abspath(filename)
+    stamp = file_stamp(filename)
+    cached = _entry_cache.get(key)
+    if cached is None or cached[0] != stamp or stamp[1] is None:
+        entries = load_entries(filename)
+        # Stempel vor dem Lesen: ändert sich die Datei währenddessen, wird beim nächsten Mal neu gelesen
+        _entry_cache[key] = cached = (stamp, entries)
+    return list(cached[1])
+
+@instrument("write_entries")
 def write_entries(filename, entries, headers):
-    with open(filename, "w", newline="", encoding="utf-8") as f:
+    # Atomar (temporäre Datei + os.replace) unter Sperre, Leser sehen nie eine halbe Datei
+    with atomic_write(filename) as f:
         writer = csv.writer(f)
         writer.writerow(headers)
         for entry in entries:
             writer.writerow([entry[h] for h in headers])
+
+def export_bundle(bundle_path, filename=CSV_FILE):
+    """Schreibt Katalog (filename) und Strafen in eine komprimierte Bundle-Datei (modules.bundle)."""
+    from modules.bundle import write_bundle
+    from modules.strafen import load_strafen
+    write_bundle(bundle_path, load_entries_cached(filename), load_strafen())
+
+@instrument("import_bundle")
+def import_bundle(bundle_path, filename=CSV_FILE):
+    """
+    Ersetzt Katalog und Strafen durch den Inhalt eines Bundles und gibt
+    (entries, strafen) zurück. Die geladenen Einträge landen direkt im
+    Cache von load_entries_cached, die CSV muss danach nicht neu geparst werden.
+    """
+    from modules.bundle import read_bundle
+    from modules.strafen import write_strafen
+    entries, strafen = read_bundle(bundle_path)
+    write_entries(filename, entries, ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"])
+    write_strafen(strafen)
+    _entry_cache[os.path.abspath(filename)] = (file_stamp(filename), entries)
+    return entries, list(strafen)
@@ -0,0 +1,159 @@
+# modules/file_lock.py
+import contextlib
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Schreiber ersetzen Dateien atomar per os.replace, Leser sehen daher immer
+# eine vollständige Datei und brauchen keine Sperre. Die Sperre in
+# "<datei>.lock" serialisiert nur Schreiber (bzw. Lesen-Ändern-Schreiben)
+# und enthält zugleich einen Versionszähler, den andere Prozesse billig
+# abfragen können.
+
+_local_locks = {}
+_local_guard = threading.Lock()
+
+def lock_path(path):
+    return os.path.abspath(path) + ".lock"
+
+def _acquire(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    elif msvcrt is not None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue  # LK_LOCK gibt nach ca. 10 s auf, dann erneut versuchen
+
+def _release(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+class _PathLock:
+    # Wiedereintrittsfähig innerhalb eines Prozesses: write_entries darf
+    # innerhalb eines exclusive()-Blocks desselben Threads aufgerufen werden.
+    def __init__(self, path):
+        self.path = lock_path(path)
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.fd = None
+
+    def acquire(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                _acquire(self.fd)
+            except Exception:
+                if self.fd is not None:
+                    os.close(self.fd)
+                    self.fd = None
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            try:
+                _release(self.fd)
+            finally:
+                os.close(self.fd)
+                self.fd = None
+        self.thread_lock.release()
+
+def _path_lock(path):
+    key = lock_path(path)
+    with _local_guard:
+        lock = _local_locks.get(key)
+        if lock is None:
+            lock = _local_locks[key] = _PathLock(path)
+        return lock
+
+@contextlib.contextmanager
+def exclusive(path):
+    """Exklusive (prozessübergreifende) Sperre für Schreibzugriffe auf path."""
+    lock = _path_lock(path)
+    lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+def read_version(path):
+    """Versionszähler von path; 0, wenn noch nie über atomic_write geschrieben wurde."""
+    try:
+        with open(lock_path(path), "rb") as f:
+            return int(f.read(32).strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def _bump_version(path):
+    # Nur unter der exklusiven Sperre aufrufen
+    lock = _path_lock(path)
+    os.lseek(lock.fd, 0, os.SEEK_SET)
+    raw = os.read(lock.fd, 32).strip()
+    version = int(raw) + 1 if raw.isdigit() else 1
+    os.lseek(lock.fd, 0, os.SEEK_SET)
+    os.ftruncate(lock.fd, 0)
+    os.write(lock.fd, str(version).encode("ascii"))
+    return version
+
+def _replace(src, dst, attempts=20):
+    # Unter Windows schlägt os.replace fehl, solange ein Leser die Datei offen hat
+    for attempt in range(attempts):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.05)
+
+@contextlib.contextmanager
+def atomic_write(path, encoding="utf-8", binary=False, locked=True):
+    """
+    Öffnet eine temporäre Datei neben path zum Schreiben (Text, newline="";
+    mit binary=True binär) und ersetzt path nach erfolgreichem Schreiben
+    atomar. Läuft unter der exklusiven Sperre und erhöht den Versionszähler;
+    mit locked=False (z.B. für Exporte an beliebige Orte) ohne beides, es
+    entsteht dann auch keine "<datei>.lock".
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with exclusive(path) if locked else contextlib.nullcontext():
+        try:
+            with (open(tmp, "wb") if binary else open(tmp, "w", newline="", encoding=encoding)) as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+            _replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+        if locked:
+            _bump_version(path)
+
+def file_stamp(path):
+    """(version, mtime_ns, size) - ändert sich bei jedem Schreiben, auch durch externe Editoren."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return read_version(path), None, None
+    return read_version(path), st.st_mtime_ns, st.st_size
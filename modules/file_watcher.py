@@ -0,0 +1,211 @@
+# modules/file_watcher.py
+import ctypes
+import ctypes.util
+import difflib
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from config import FILE_WATCH_INTERVAL
+
+# inotify-Konstanten (linux/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Wartezeit, damit mehrere Schreibvorgänge eines Editors zu einem Ereignis zusammenfallen
+SETTLE_DELAY = 0.1
+# Abstand, in dem der Tk-Thread fertig eingelesene Dateien abholt
+DELIVER_MS = 200
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _open_inotify(directories):
+    """Gibt einen inotify-Deskriptor für die Verzeichnisse zurück, oder None, wenn nicht verfügbar."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        for directory in directories:
+            if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+                os.close(fd)
+                return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+def _read_inotify_names(fd):
+    data = os.read(fd, 64 * 1024)
+    names = set()
+    offset = 0
+    while offset + _EVENT_HEADER.size <= len(data):
+        _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        names.add(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+        offset += length
+    return names
+
+class FileWatcher:
+    """
+    Überwacht Dateien im Hintergrund und liefert geänderte Inhalte an den
+    Tk-Thread. loaders ist {pfad: funktion}, die Funktion liest die Datei
+    (im Hintergrundthread) und ihr Ergebnis wird als on_change(pfad, daten)
+    per after() im Tk-Thread übergeben.
+
+    Unter Linux wird inotify auf den Verzeichnissen verwendet (Editoren
+    ersetzen Dateien oft per Umbenennen), sonst werden mtime und Größe alle
+    FILE_WATCH_INTERVAL Sekunden verglichen. Nur Dateien, deren Stempel sich
+    tatsächlich geändert hat, werden neu eingelesen.
+    """
+    def __init__(self, root, loaders, on_change, interval=FILE_WATCH_INTERVAL):
+        self.root = root
+        self.loaders = {os.path.abspath(path): loader for path, loader in loaders.items()}
+        self.on_change = on_change
+        self.interval = interval
+        self.stamps = {path: _file_stamp(path) for path in self.loaders}
+        self.results = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._after_id = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+            self._thread.start()
+            self._after_id = self.root.after(DELIVER_MS, self._deliver)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _run(self):
+        directories = {os.path.dirname(path) for path in self.loaders}
+        fd = _open_inotify(directories)
+        try:
+            while not self._stop.is_set():
+                if fd is None:
+                    self._stop.wait(self.interval)
+                    candidates = self.loaders.keys()
+                else:
+                    ready, _, _ = select.select([fd], [], [], self.interval)
+                    if not ready:
+                        continue
+                    names = _read_inotify_names(fd)
+                    candidates = [path for path in self.loaders if os.path.basename(path) in names]
+                    if not candidates:
+                        continue
+                    self._stop.wait(SETTLE_DELAY)
+                for path in list(candidates):
+                    self._check(path)
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def _check(self, path):
+        stamp = _file_stamp(path)
+        if stamp is None or stamp == self.stamps.get(path):
+            return
+        time.sleep(SETTLE_DELAY)
+        if _file_stamp(path) != stamp:
+            return  # wird noch geschrieben, nächste Runde
+        try:
+            data = self.loaders[path]()
+        except Exception:
+            return  # z.B. halb geschriebene Datei, beim nächsten Ereignis erneut versuchen
+        self.stamps[path] = stamp
+        self.results.put((path, data))
+
+    def _deliver(self):
+        # Nur die jeweils neueste Version einer Datei anwenden
+        latest = {}
+        try:
+            while True:
+                path, data = self.results.get_nowait()
+                latest[path] = data
+        except queue.Empty:
+            pass
+        for path, data in latest.items():
+            self.on_change(path, data)
+        if not self._stop.is_set():
+            self._after_id = self.root.after(DELIVER_MS, self._deliver)
+
+def sync_tree(tree, old_rows, new_rows):
+    """
+    Passt einen Treeview, dessen Zeilen (in Reihenfolge) old_rows zeigen, auf
+    new_rows an. Die Zeilen werden über ihre Werte zugeordnet
+    (difflib.SequenceMatcher): unveränderte Zeilen bleiben stehen,
+    verschobene werden per move umgehängt, geänderte in place aktualisiert,
+    nur wirklich neue eingefügt. Die iids bleiben dabei nicht Zeilenindizes.
+    Gibt die Anzahl der geänderten, verschobenen, eingefügten und
+    gelöschten Zeilen zurück.
+    """
+    iids = list(tree.get_children())
+    opcodes = difflib.SequenceMatcher(None, old_rows, new_rows, autojunk=False).get_opcodes()
+    # Weggefallene Zeilen nach Werten, damit eingefügte gleiche Zeilen sie übernehmen (Verschiebung)
+    removed = {}
+    for tag, i1, i2, _, _ in opcodes:
+        if tag in ("delete", "replace"):
+            for i in range(i1, i2):
+                removed.setdefault(old_rows[i], []).append(iids[i])
+    moved = {}  # Index in new_rows -> iid
+    for tag, _, _, j1, j2 in opcodes:
+        if tag in ("insert", "replace"):
+            for j in range(j1, j2):
+                candidates = removed.get(new_rows[j])
+                if candidates:
+                    moved[j] = candidates.pop(0)
+    claimed = set(moved.values())
+    target = []   # iid je Zeile von new_rows, None = neu einfügen
+    edited = {}   # iid -> neue Werte (Zeile an gleicher Stelle geändert)
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            target.extend(iids[i1:i2])
+            continue
+        # Nicht verschobene alte Zeilen eines replace-Blocks der Reihe nach weiterverwenden
+        spare = [iids[i] for i in range(i1, i2) if iids[i] not in claimed] if tag == "replace" else []
+        for j in range(j1, j2):
+            if j in moved:
+                target.append(moved[j])
+            elif spare:
+                iid = spare.pop(0)
+                claimed.add(iid)
+                edited[iid] = new_rows[j]
+                target.append(iid)
+            else:
+                target.append(None)
+    stale = [iids[i] for tag, i1, i2, _, _ in opcodes if tag in ("delete", "replace")
+             for i in range(i1, i2) if iids[i] not in claimed]
+    if stale:
+        tree.delete(*stale)
+    moved_iids = set(moved.values())
+    if moved_iids:
+        tree.detach(*moved_iids)
+    for iid, values in edited.items():
+        tree.item(iid, values=values)
+    inserted = 0
+    for position, iid in enumerate(target):
+        if iid is None:
+            tree.insert("", position, values=new_rows[position])
+            inserted += 1
+        elif iid in moved_iids:
+            tree.move(iid, "", position)
+    return len(stale) + len(moved_iids) + len(edited) + inserted
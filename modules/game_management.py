@@ -1,7 +1,10 @@
 # modules/game_management.py
 from tkinter import messagebox
 from modules.csv_handler import load_entries, write_entries
-from config import CSV_FILE
+from config import CSV_FILE, GAMES_PAGE_SIZE
+from modules.profiling import instrument
+from modules.catalog_index import CatalogIndex
+from modules.file_lock import exclusive
 
 class GameManager:
     def __init__(self, entry_widgets, tree_widget, update_selection_panel_callback):
@@ -12,6 +15,14 @@ class GameManager:
         self.tree = tree_widget
         self.update_selection_panel = update_selection_panel_callback
         self.selected_index = None
+        self.entries = []  # zuletzt geladener Katalog
+        self.index = CatalogIndex([])
+        self.search_text = ""
+        self.sort_column = None
+        self.sort_reverse = False
+        self.page = 0
+        self.shown = []  # aktuell im Treeview angezeigte (iid, values)
+        self.on_view_changed = None  # optional: Callback(erste, letzte, treffer) für eine Statuszeile
 
     def clear_entry_fields(self):
         self.entry_spiel.delete(0, "end")
@@ -41,26 +52,97 @@ class GameManager:
         except ValueError:
             messagebox.showerror("Fehler", "Spieleranzahl muss mindestens 1 sein.")
             return
-        entries = load_entries(CSV_FILE)
-        entries.append({
-            "Spiel": spiel,
-            "Spielmodus": spielmodus,
-            "Schwierigkeit": schwierigkeit,
-            "Spieleranzahl": spieleranzahl
-        })
-        write_entries(CSV_FILE, entries, ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"])
+        # Lesen und Schreiben unter einer Sperre, damit parallele Instanzen keine Änderungen verlieren
+        with exclusive(CSV_FILE):
+            entries = load_entries(CSV_FILE)
+            entries.append({
+                "Spiel": spiel,
+                "Spielmodus": spielmodus,
+                "Schwierigkeit": schwierigkeit,
+                "Spieleranzahl": spieleranzahl
+            })
+            write_entries(CSV_FILE, entries, ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"])
         messagebox.showinfo("Erfolg", "Eintrag hinzugefügt!")
         self.clear_entry_fields()
         self.update_entry_tree()
         self.update_selection_panel()
 
+    @staticmethod
+    def _row_values(entry):
+        return (entry["Spiel"], entry["Spielmodus"], entry["Schwierigkeit"], entry["Spieleranzahl"])
+
+    @instrument("GameManager.update_entry_tree")
     def update_entry_tree(self):
         self.tree.delete(*self.tree.get_children())
-        entries = load_entries(CSV_FILE)
-        for index, entry in enumerate(entries):
-            self.tree.insert("", "end", iid=str(index),
-                             values=(entry["Spiel"], entry["Spielmodus"],
-                                     entry["Schwierigkeit"], entry["Spieleranzahl"]))
+        self.shown = []
+        self.entries = load_entries(CSV_FILE)
+        self.index = CatalogIndex(self.entries)
+        self.render()
+
+    @instrument("GameManager.apply_entries")
+    def apply_entries(self, entries, index=None):
+        """
+        Übernimmt einen extern geänderten Katalog (index kann bereits im
+        Hintergrund erzeugt worden sein). Nur abweichende Zeilen im Treeview
+        werden geändert. Gibt die Anzahl geänderter Zeilen zurück.
+        """
+        self.entries = entries
+        self.index = index if index is not None else CatalogIndex(entries)
+        if self.selected_index is not None and self.selected_index >= len(entries):
+            self.selected_index = None
+        return self.render()
+
+    @instrument("GameManager.render")
+    def render(self):
+        """
+        Zeigt die aktuelle Seite (GAMES_PAGE_SIZE Zeilen) der Treffer von
+        Suche und Sortierung an. Bleiben die angezeigten Zeilen gleich, werden
+        nur geänderte Werte aktualisiert. Gibt die Anzahl geänderter Zeilen zurück.
+        """
+        offset = self.page * GAMES_PAGE_SIZE
+        rows, total = self.index.query(self.search_text, self.sort_column, self.sort_reverse, GAMES_PAGE_SIZE, offset)
+        if not rows and self.page > 0:
+            # Katalog oder Treffer sind geschrumpft: auf die letzte vorhandene Seite springen
+            self.page = max(0, (total - 1) // GAMES_PAGE_SIZE)
+            offset = self.page * GAMES_PAGE_SIZE
+            rows, total = self.index.query(self.search_text, self.sort_column, self.sort_reverse, GAMES_PAGE_SIZE, offset)
+        new = [(str(i), self._row_values(self.entries[i])) for i in rows]
+        changes = 0
+        if [iid for iid, _ in new] == [iid for iid, _ in self.shown]:
+            for (iid, values), (_, old_values) in zip(new, self.shown):
+                if values != old_values:
+                    self.tree.item(iid, values=values)
+                    changes += 1
+        else:
+            if self.shown:
+                self.tree.delete(*[iid for iid, _ in self.shown])
+            for iid, values in new:
+                self.tree.insert("", "end", iid=iid, values=values)
+            changes = len(self.shown) + len(new)
+        self.shown = new
+        if self.on_view_changed is not None:
+            self.on_view_changed(offset + 1 if new else 0, offset + len(new), total)
+        return changes
+
+    def set_search(self, text):
+        self.search_text = text
+        self.page = 0
+        self.render()
+
+    def change_page(self, step):
+        # step: -1 / +1; render() begrenzt auf die letzte vorhandene Seite
+        self.page = max(0, self.page + step)
+        self.render()
+
+    def sort_by(self, column):
+        # Erneuter Klick auf dieselbe Spalte kehrt die Reihenfolge um
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self.page = 0
+        self.render()
 
     def delete_entry(self):
         item = self.tree.focus()
@@ -68,9 +150,15 @@ class GameManager:
             messagebox.showerror("Fehler", "Kein Eintrag ausgewählt!")
             return
         index = int(item)
-        entries = load_entries(CSV_FILE)
-        del entries[index]
-        write_entries(CSV_FILE, entries, ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"])
+        with exclusive(CSV_FILE):
+            entries = load_entries(CSV_FILE)
+            exists = 0 <= index < len(entries)
+            if exists:
+                del entries[index]
+                write_entries(CSV_FILE, entries, ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"])
+        if not exists:
+            messagebox.showerror("Fehler", "Ausgewählter Eintrag existiert nicht mehr.")
+            return
         messagebox.showinfo("Erfolg", "Eintrag gelöscht!")
         self.update_entry_tree()
         self.update_selection_panel()
@@ -100,17 +188,21 @@ class GameManager:
         except ValueError:
             messagebox.showerror("Fehler", "Spieleranzahl muss mindestens 1 sein.")
             return
-        entries = load_entries(CSV_FILE)
-        if not (0 <= self.selected_index < len(entries)):
+        # Unter der Sperre nur das Ergebnis merken, Dialoge erst nach dem Freigeben zeigen
+        with exclusive(CSV_FILE):
+            entries = load_entries(CSV_FILE)
+            exists = 0 <= self.selected_index < len(entries)
+            if exists:
+                entries[self.selected_index] = {
+                    "Spiel": spiel,
+                    "Spielmodus": spielmodus,
+                    "Schwierigkeit": schwierigkeit,
+                    "Spieleranzahl": spieleranzahl
+                }
+                write_entries(CSV_FILE, entries, ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"])
+        if not exists:
             messagebox.showerror("Fehler", "Ausgewählter Eintrag existiert nicht mehr.")
             return
-        entries[self.selected_index] = {
-            "Spiel": spiel,
-            "Spielmodus": spielmodus,
-            "Schwierigkeit": schwierigkeit,
-            "Spieleranzahl": spieleranzahl
-        }
-        write_entries(CSV_FILE, entries, ["Spiel", "Spielmodus", "Schwierigkeit", "Spieleranzahl"])
         messagebox.showinfo("Erfolg", "Eintrag aktualisiert!")
         self.selected_index = None
         self.clear_entry_fields()
@@ -3,41 +3,114 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from modules.csv_handler import load_entries
 from config import CSV_FILE  # CSV_FILE importieren
+from modules.profiling import instrument
+from modules.catalog_shards import shards
 
 # Globale Variable game_vars (wird in main.py genutzt)
 game_vars = {}
+# Callbacks(game), die nach dem Speichern der Spielmodi eines Spiels aufgerufen werden
+mode_change_listeners = []
+
+def _parse_limit(text):
+    # Leeres Feld = keine Begrenzung
+    text = text.strip()
+    if not text:
+        return None
+    value = int(text)
+    if value < 0:
+        raise ValueError(text)
+    return value
 
 def edit_game_modes(root, game):
     available = sorted(list(game_vars[game]["available_modes"]))
     current_allowed = game_vars[game]["allowed_modes"]
+    current_caps = game_vars[game].get("mode_caps") or {}
     mode_vars = {}
+    cap_vars = {}
     win = tk.Toplevel(root)
     win.title(f"Gamemodes für {game}")
     win.configure(bg="#2B2B2B")
-    tk.Label(win, text="Wähle die Spielmodi aus:", bg="#2B2B2B", fg="#FFFFFF", font=("Segoe UI", 12)).pack(padx=5, pady=5)
+    tk.Label(win, text="Wähle die Spielmodi aus (optional max. Wins je Modus):", bg="#2B2B2B", fg="#FFFFFF", font=("Segoe UI", 12)).pack(padx=5, pady=5)
     for mode in available:
+        row = tk.Frame(win, bg="#2B2B2B")
+        row.pack(fill="x", padx=10, pady=2)
         var = tk.BooleanVar(value=(mode in current_allowed))
-        chk = ttk.Checkbutton(win, text=mode, variable=var)
-        chk.pack(anchor="w", padx=10, pady=2)
+        chk = ttk.Checkbutton(row, text=mode, variable=var)
+        chk.pack(side="left")
+        cap_var = tk.StringVar(value="" if current_caps.get(mode) is None else str(current_caps[mode]))
+        ttk.Entry(row, textvariable=cap_var, width=4).pack(side="right")
         mode_vars[mode] = var
+        cap_vars[mode] = cap_var
+    limits = tk.Frame(win, bg="#2B2B2B")
+    limits.pack(fill="x", padx=10, pady=5)
+    tk.Label(limits, text="Min. Wins:", bg="#2B2B2B", fg="#FFFFFF").pack(side="left")
+    min_var = tk.StringVar(value=str(game_vars[game].get("min_wins") or ""))
+    ttk.Entry(limits, textvariable=min_var, width=4).pack(side="left", padx=5)
+    tk.Label(limits, text="Max. Wins:", bg="#2B2B2B", fg="#FFFFFF").pack(side="left")
+    max_wins = game_vars[game].get("max_wins")
+    max_var = tk.StringVar(value="" if max_wins is None else str(max_wins))
+    ttk.Entry(limits, textvariable=max_var, width=4).pack(side="left", padx=5)
     def save_modes():
         selected_modes = {m for m, var in mode_vars.items() if var.get()}
         if not selected_modes:
             messagebox.showerror("Fehler", "Mindestens ein Spielmodus muss ausgewählt sein.")
             return
+        try:
+            min_wins = _parse_limit(min_var.get())
+            max_wins = _parse_limit(max_var.get())
+            mode_caps = {m: _parse_limit(v.get()) for m, v in cap_vars.items()}
+        except ValueError:
+            messagebox.showerror("Fehler", "Min./Max. Wins müssen leer oder ganze Zahlen >= 0 sein.")
+            return
+        if min_wins is not None and max_wins is not None and min_wins > max_wins:
+            messagebox.showerror("Fehler", "Min. Wins darf nicht größer als Max. Wins sein.")
+            return
         game_vars[game]["allowed_modes"] = selected_modes
+        game_vars[game]["min_wins"] = min_wins
+        game_vars[game]["max_wins"] = max_wins
+        game_vars[game]["mode_caps"] = {m: cap for m, cap in mode_caps.items() if cap is not None and m in selected_modes}
         win.destroy()
+        for listener in mode_change_listeners:
+            listener(game)
     ttk.Button(win, text="Speichern", command=save_modes).pack(padx=5, pady=10)
 
+# Zeilen-Frames des Auswahl-Panels je Spiel, für inkrementelle Aktualisierungen
+game_rows = {}
+
+def _create_game_row(parent_frame, root, game, before=None):
+    row = tk.Frame(parent_frame, bg="#2B2B2B", bd=1, relief="solid")
+    if before is None:
+        row.pack(fill="x", padx=5, pady=2)
+    else:
+        row.pack(fill="x", padx=5, pady=2, before=before)
+    row.bind("<Double-1>", lambda event, g=game: edit_game_modes(root, g))
+    chk = tk.Checkbutton(row, variable=game_vars[game]["selected"], bg="#2B2B2B")
+    chk.pack(side="left", padx=5)
+    lbl = tk.Label(row, text=game, bg="#2B2B2B", fg="#FFFFFF", font=("Segoe UI", 12), width=20, anchor="w")
+    lbl.pack(side="left", padx=5)
+    lbl.bind("<Double-1>", lambda event, g=game: edit_game_modes(root, g))
+    spn = ttk.Spinbox(row, from_=0.0, to=10.0, increment=0.1, textvariable=game_vars[game]["weight"], width=5, font=("Segoe UI", 12))
+    spn.pack(side="left", padx=5)
+    game_rows[game] = row
+
+def _modes_by_game(entries):
+    # Spiele aus dem Katalog plus die Spiele aller Shards laut Manifest (ohne sie zu laden)
+    modes = shards.modes_by_game()
+    for e in entries:
+        modes.setdefault(e["Spiel"], set()).add(e["Spielmodus"])
+    return modes
+
+@instrument("update_game_selection_panel")
 def update_game_selection_panel(parent_frame, root):
     # Leere alten Inhalt im frame
     for widget in parent_frame.winfo_children():
         widget.destroy()
+    game_rows.clear()
     # Lade Einträge unter Verwendung von CSV_FILE
     entries = load_entries(CSV_FILE)
-    unique_games = sorted({e["Spiel"] for e in entries})
-    for game in unique_games:
-        available_modes = {e["Spielmodus"] for e in entries if e["Spiel"] == game}
+    modes = _modes_by_game(entries)
+    for game in sorted(modes):
+        available_modes = modes[game]
         if game not in game_vars:
             game_vars[game] = {
                 "selected": tk.BooleanVar(value=False),
@@ -45,13 +118,38 @@ def update_game_selection_panel(parent_frame, root):
                 "allowed_modes": available_modes.copy(),
                 "available_modes": available_modes.copy()
             }
-        row = tk.Frame(parent_frame, bg="#2B2B2B", bd=1, relief="solid")
-        row.pack(fill="x", padx=5, pady=2)
-        row.bind("<Double-1>", lambda event, g=game: edit_game_modes(root, g))
-        chk = tk.Checkbutton(row, variable=game_vars[game]["selected"], bg="#2B2B2B")
-        chk.pack(side="left", padx=5)
-        lbl = tk.Label(row, text=game, bg="#2B2B2B", fg="#FFFFFF", font=("Segoe UI", 12), width=20, anchor="w")
-        lbl.pack(side="left", padx=5)
-        lbl.bind("<Double-1>", lambda event, g=game: edit_game_modes(root, g))
-        spn = ttk.Spinbox(row, from_=0.0, to=10.0, increment=0.1, textvariable=game_vars[game]["weight"], width=5, font=("Segoe UI", 12))
-        spn.pack(side="left", padx=5)
+        _create_game_row(parent_frame, root, game)
+
+@instrument("sync_game_selection_panel")
+def sync_game_selection_panel(parent_frame, root, entries):
+    """
+    Gleicht das Auswahl-Panel mit einem extern geänderten Katalog ab, ohne
+    es neu aufzubauen: nur Zeilen neuer bzw. entfernter Spiele werden
+    erzeugt bzw. zerstört, Auswahl und Gewichte der übrigen bleiben erhalten.
+    Neue Spielmodi eines bekannten Spiels werden erlaubt, entfernte entfallen.
+    """
+    modes = _modes_by_game(entries)
+    for game in [g for g in game_rows if g not in modes]:
+        game_rows.pop(game).destroy()
+        game_vars.pop(game, None)
+    ordered = sorted(modes)
+    for position, game in enumerate(ordered):
+        available_modes = modes[game]
+        if game in game_vars:
+            gv = game_vars[game]
+            added = available_modes - gv["available_modes"]
+            gv["allowed_modes"] = (gv["allowed_modes"] & available_modes) | added
+            gv["available_modes"] = available_modes.copy()
+            if gv.get("mode_caps"):
+                gv["mode_caps"] = {m: cap for m, cap in gv["mode_caps"].items() if m in available_modes}
+        else:
+            game_vars[game] = {
+                "selected": tk.BooleanVar(value=False),
+                "weight": tk.StringVar(value="1.0"),
+                "allowed_modes": available_modes.copy(),
+                "available_modes": available_modes.copy()
+            }
+        if game not in game_rows:
+            # Vor dem nächsten bereits vorhandenen Spiel einsortieren
+            before = next((game_rows[g] for g in ordered[position + 1:] if g in game_rows), None)
+            _create_game_row(parent_frame, root, game, before)
@@ -2,14 +2,57 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from modules.image_utils import export_result_as_image, copy_image_to_clipboard
+from modules.win_tracker import WinTracker, win_rows
+from modules.session_log import SessionLog
+from modules import history
+from modules.strafen import iter_strafen_plan_lines
+from modules.timer import ChallengeTimer, get_scheduler, format_elapsed
+from config import RESULT_CHUNK_LINES
 
-def open_result_window(root, challenge_data, generate_challenge_callback):
+# Laufende Einfüge-Vorgänge je Textfeld (Widget-Pfad -> after-ID)
+_text_streams = {}
+
+def stream_text(widget, lines, chunk_lines=RESULT_CHUNK_LINES):
+    """
+    Ersetzt den Inhalt eines (schreibgeschützten) Textfelds durch lines.
+    Der erste Block erscheint sofort, der Rest wird in Blöcken von
+    chunk_lines Zeilen per after() nachgeschoben, damit die Oberfläche
+    bei sehr langen Ergebnissen bedienbar bleibt. Ein erneuter Aufruf für
+    dasselbe Textfeld bricht den vorherigen Vorgang ab.
+    """
+    key = str(widget)
+    pending = _text_streams.pop(key, None)
+    if pending is not None:
+        widget.after_cancel(pending)
+    lines = iter(lines)
+    state = widget.cget("state")
+
+    def insert_chunk():
+        _text_streams.pop(key, None)
+        if not widget.winfo_exists():
+            return
+        chunk = "".join(line for _, line in zip(range(chunk_lines), lines))
+        if not chunk:
+            return
+        widget.config(state="normal")
+        widget.insert("end", chunk)
+        widget.config(state=state)
+        _text_streams[key] = widget.after(1, insert_chunk)
+
+    widget.config(state="normal")
+    widget.delete("1.0", "end")
+    widget.config(state=state)
+    insert_chunk()
+
+def open_result_window(root, challenge_data, generate_challenge_callback, session=None):
     """
     Öffnet ein Ergebnisfenster. Zunächst wird nur der Ergebnistext
     und unten die Buttons "Akzeptieren" und "Neu generieren" angezeigt.
     Nach Klick auf "Akzeptieren" erscheint der Timer-Steuerungsbereich
     (mit Start, Pause, Reset) sowie der schön formatierte Bereich zum 
     Markieren der erreichten Wins.
+    Mit session (SessionLog) wird eine wiederhergestellte, bereits
+    akzeptierte Challenge direkt mit ihrem gespeicherten Stand geöffnet.
     """
     result_win = tk.Toplevel(root)
     result_win.title("Challenge Ergebnis")
@@ -18,8 +61,17 @@ def open_result_window(root, challenge_data, generate_challenge_callback):
     # Ergebnisanzeige (immer sichtbar)
     text_result_win = tk.Text(result_win, height=10, width=60, bg="#1E1E1E", fg="#DCDCDC", font=("Segoe UI", 12))
     text_result_win.pack(side="top", fill="both", expand=True, padx=10, pady=10)
-    text_result_win.insert(tk.END, challenge_data["result"])
     text_result_win.config(state="disabled")
+    stream_text(text_result_win, challenge_data["result"].splitlines(keepends=True))
+
+    # Im Voraus geplante Strafen (nur wenn beim Generieren aktiviert)
+    if challenge_data.get("strafen_plan"):
+        tk.Label(result_win, text="Geplante Strafen:", font=("Segoe UI", 12, "bold"),
+                 bg="#2B2B2B", fg="#FFFFFF").pack(side="top", anchor="w", padx=10)
+        text_strafen = tk.Text(result_win, height=6, width=60, bg="#1E1E1E", fg="#DCDCDC", font=("Segoe UI", 11))
+        text_strafen.pack(side="top", fill="both", expand=True, padx=10, pady=(0, 10))
+        text_strafen.config(state="disabled")
+        stream_text(text_strafen, iter_strafen_plan_lines(challenge_data))
     
     # Der Control-Frame (Timer + Checkbox-Bereich) wird zunächst NICHT gepackt.
     control_frame = tk.Frame(result_win, bg="#2B2B2B")
@@ -41,45 +93,47 @@ def open_result_window(root, challenge_data, generate_challenge_callback):
     wins_title = tk.Label(wins_frame, text="Markiere die erreichten Wins:", font=("Segoe UI", 12, "bold"), bg="#2B2B2B", fg="#FFFFFF")
     wins_title.pack(anchor="w", padx=5, pady=(5,2))
     
-    # Für Normal Wins:
-    for key, info in challenge_data["normal"].items():
-        row = tk.Frame(wins_frame, bg="#2B2B2B", bd=1, relief="groove")
-        row.pack(fill="x", padx=10, pady=2)
-        lbl = tk.Label(row, text=f"{key}:", font=("Segoe UI", 12), bg="#2B2B2B", fg="#FFFFFF", width=30, anchor="w")
-        lbl.grid(row=0, column=0, padx=5, pady=5)
-        for i in range(info["count"]):
-            cb = tk.Checkbutton(row, bg="#2B2B2B")
-            cb.grid(row=0, column=i+1, padx=3, pady=5)
-            
-    # Für Back-to-Back Wins:
-    for i, seg in enumerate(challenge_data["b2b"], 1):
-        for key, count in seg["group"].items():
-            row = tk.Frame(wins_frame, bg="#2B2B2B", bd=1, relief="groove")
-            row.pack(fill="x", padx=10, pady=2)
-            lbl = tk.Label(row, text=f"Segment {i} – {key}:", font=("Segoe UI", 12), bg="#2B2B2B", fg="#FFFFFF", width=30, anchor="w")
-            lbl.grid(row=0, column=0, padx=5, pady=5)
-            for j in range(count):
-                cb = tk.Checkbutton(row, bg="#2B2B2B")
-                cb.grid(row=0, column=j+1, padx=3, pady=5)
+    # Alle Wins als Kästchen-Raster auf einem Canvas (statt ein Checkbutton pro Win)
+    # Jede Änderung wird an das Session-Log angehängt, sobald die Challenge akzeptiert ist.
+    session_ref = {"session": session}
+    def on_win_change(index, value):
+        if session_ref["session"] is not None:
+            session_ref["session"].log_win(index, value)
+    win_tracker = WinTracker(wins_frame, win_rows(challenge_data), on_change=on_win_change)
+    win_tracker.pack(fill="both", expand=True, padx=10, pady=2)
     wins_frame.pack(fill="both", padx=10, pady=5)
     
-    # Timer-Logik
-    timer_data = {"running": False, "elapsed": 0}
-    def update_timer():
-        if timer_data["running"]:
-            timer_data["elapsed"] += 1
-            hrs = timer_data["elapsed"] // 3600
-            mins = (timer_data["elapsed"] % 3600) // 60
-            secs = timer_data["elapsed"] % 60
-            timer_label.config(text=f"{hrs:02d}:{mins:02d}:{secs:02d}")
-        result_win.after(1000, update_timer)
+    # Timer-Logik: gemeinsamer Scheduler für alle offenen Ergebnisfenster
+    timer = ChallengeTimer(get_scheduler(root), lambda elapsed: timer_label.config(text=format_elapsed(elapsed)))
+    def log_timer(action):
+        if session_ref["session"] is not None:
+            session_ref["session"].log_timer(action, timer.elapsed())
     def start_timer():
-        timer_data["running"] = True
+        timer.start()
+        log_timer("start")
     def pause_timer():
-        timer_data["running"] = False
+        timer.pause()
+        log_timer("pause")
     def reset_timer():
-        timer_data["elapsed"] = 0
-        timer_label.config(text="00:00:00")
+        timer.reset()
+        log_timer("reset")
+    def on_destroy(event):
+        # <Destroy> kommt auch für alle Kind-Widgets, nur das Fenster selbst zählt.
+        # Wird das Fenster über das Programmende zerstört, bleibt die Session wiederherstellbar.
+        if event.widget is result_win:
+            if session_ref["session"] is not None and not session_ref["session"].finished:
+                if timer.running:
+                    log_timer("pause")
+                session_ref["session"].close(finished=False)
+            timer.cancel()
+    def on_close():
+        # Vom Nutzer geschlossen: Session ist beendet
+        if session_ref["session"] is not None:
+            session_ref["session"].close(finished=True)
+            history.mark_closed(challenge_data.get("history_id"), timer.elapsed(), sum(win_tracker.state))
+        result_win.destroy()
+    result_win.bind("<Destroy>", on_destroy)
+    result_win.protocol("WM_DELETE_WINDOW", on_close)
     btn_start.config(command=start_timer)
     btn_pause.config(command=pause_timer)
     btn_reset.config(command=reset_timer)
@@ -90,6 +144,9 @@ def open_result_window(root, challenge_data, generate_challenge_callback):
     
     # Zunächst werden nur "Akzeptieren" und "Neu generieren" angezeigt.
     def on_accept():
+        if session_ref["session"] is None:
+            session_ref["session"] = SessionLog.create(challenge_data, len(win_tracker.state))
+            history.mark_accepted(challenge_data.get("history_id"), session_ref["session"].id)
         # Entferne diese beiden Buttons.
         btn_accept.destroy()
         btn_regenerate.destroy()
@@ -97,10 +154,10 @@ def open_result_window(root, challenge_data, generate_challenge_callback):
         control_frame.pack(fill="both", expand=True)
         # Zusätzlich werden jetzt Steuerungsbuttons zum Exportieren etc. hinzugefügt.
         btn_export = ttk.Button(button_frame, text="Als Bild exportieren",
-                                command=lambda: export_result_as_image(challenge_data["result"]))
+                                command=lambda: export_result_as_image(challenge_data["result"], result_win))
         btn_export.pack(side="left", padx=5)
         btn_copy = ttk.Button(button_frame, text="Bild in Zwischenablage kopieren",
-                              command=lambda: copy_image_to_clipboard(challenge_data["result"]))
+                              command=lambda: copy_image_to_clipboard(challenge_data["result"], result_win))
         btn_copy.pack(side="left", padx=5)
         # Zusätzlich wird ein neuer "Start" Button (für den Timer) eingeblendet – allerdings befindet sich
         # unser Timer bereits in control_frame und die Buttons Start/Pause/Reset wurden initialisiert.
@@ -116,5 +173,11 @@ def open_result_window(root, challenge_data, generate_challenge_callback):
     
     # Der Start-Button für den Timer wird hier NICHT sofort angezeigt, sondern erst nachdem "Akzeptieren" gedrückt wurde.
     # (Die Timer-Steuerung ist bereits in control_frame enthalten und wird sichtbar, sobald on_accept() ausgeführt wird.)
-    
-    update_timer()
+
+    if session is not None:
+        # Wiederhergestellte Session: gespeicherten Stand übernehmen, ohne ihn erneut zu loggen
+        on_accept()
+        for index, value in enumerate(session.state):
+            if value:
+                win_tracker.set(index, value, notify=False)
+        timer.restore(session.elapsed, session.running)
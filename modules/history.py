@@ -0,0 +1,206 @@
+# modules/history.py
+import datetime
+import json
+import sqlite3
+import threading
+import time
+from modules.profiling import instrument
+from config import HISTORY_DB
+
+# Verlauf aller generierten Challenges in einer SQLite-Datenbank.
+#   challenges      eine Zeile pro Challenge (Seed, Schwierigkeit, Status, Timer, JSON-Daten)
+#   challenge_wins  eine Zeile pro (Challenge, Spiel, Modus, Segment) für Abfragen nach Spiel/Modus
+#   game_daily      Tagessummen je (Tag, Spiel, Modus), beim Einfügen mitgepflegt, damit
+#                   Auswertungen über Zeiträume nur wenige Zeilen pro Tag lesen
+#   difficulty_stats Summen erledigter Challenges je ganzzahliger Gesamtschwierigkeit
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS challenges (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    seed INTEGER,
+    total_diff REAL NOT NULL,
+    num_wins INTEGER NOT NULL,
+    session_id TEXT,
+    accepted REAL,
+    closed REAL,
+    elapsed REAL,
+    wins_done INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_challenges_created ON challenges(created);
+CREATE TABLE IF NOT EXISTS challenge_wins (
+    challenge_id INTEGER NOT NULL,
+    created REAL NOT NULL,
+    game TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    wins INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_wins_game_mode ON challenge_wins(game, mode, created);
+CREATE INDEX IF NOT EXISTS idx_wins_challenge ON challenge_wins(challenge_id);
+CREATE TABLE IF NOT EXISTS game_daily (
+    day INTEGER NOT NULL,
+    game TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    wins INTEGER NOT NULL DEFAULT 0,
+    accepted_wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, game, mode)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_daily_game ON game_daily(game, mode, day);
+CREATE TABLE IF NOT EXISTS difficulty_stats (
+    unit INTEGER PRIMARY KEY,
+    completed INTEGER NOT NULL DEFAULT 0,
+    diff_sum REAL NOT NULL DEFAULT 0,
+    elapsed_sum REAL NOT NULL DEFAULT 0
+);
+"""
+
+_connections = {}
+_connections_lock = threading.Lock()
+
+def _connect(path=HISTORY_DB):
+    # Eine Verbindung je (Thread, Datei); sqlite3-Verbindungen sind nicht threadübergreifend nutzbar
+    key = (threading.get_ident(), path)
+    with _connections_lock:
+        conn = _connections.get(key)
+        if conn is None:
+            conn = sqlite3.connect(path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            _connections[key] = conn
+    return conn
+
+def _day(timestamp):
+    return datetime.date.fromtimestamp(timestamp).toordinal()
+
+def split_key(key):
+    """'Spiel (Modus)' -> ('Spiel', 'Modus'), wie in group_segments gebildet."""
+    game, sep, mode = key.rpartition(" (")
+    if not sep or not mode.endswith(")"):
+        return key, ""
+    return game, mode[:-1]
+
+def _win_rows(challenge_data):
+    # (spiel, modus, segment, wins); Segment 0 = Normal Wins
+    for key, info in challenge_data["normal"].items():
+        yield (*split_key(key), 0, info["count"])
+    for i, seg in enumerate(challenge_data["b2b"], 1):
+        for key, count in seg["group"].items():
+            yield (*split_key(key), i, count)
+
+def _bump_daily(conn, day, rows, column):
+    totals = {}
+    for game, mode, _, wins in rows:
+        totals[(game, mode)] = totals.get((game, mode), 0) + wins
+    conn.executemany(
+        f"INSERT INTO game_daily (day, game, mode, {column}) VALUES (?, ?, ?, ?) "
+        f"ON CONFLICT (day, game, mode) DO UPDATE SET {column} = {column} + excluded.{column}",
+        [(day, game, mode, wins) for (game, mode), wins in totals.items()])
+
+@instrument("history.record_challenge")
+def record_challenge(challenge_data, created=None, path=HISTORY_DB):
+    """
+    Speichert eine generierte Challenge und trägt ihre ID als
+    challenge_data["history_id"] ein (landet so auch im Session-Log).
+    """
+    created = time.time() if created is None else created
+    rows = list(_win_rows(challenge_data))
+    conn = _connect(path)
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO challenges (created, seed, total_diff, num_wins, data) VALUES (?, ?, ?, ?, ?)",
+            (created, challenge_data.get("seed"), challenge_data["total_diff"],
+             sum(row[3] for row in rows), json.dumps(challenge_data, ensure_ascii=False)))
+        history_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO challenge_wins (challenge_id, created, game, mode, segment, wins) VALUES (?, ?, ?, ?, ?, ?)",
+            [(history_id, created, *row) for row in rows])
+        _bump_daily(conn, _day(created), rows, "wins")
+    challenge_data["history_id"] = history_id
+    return history_id
+
+def mark_accepted(history_id, session_id, path=HISTORY_DB):
+    if history_id is None:
+        return
+    conn = _connect(path)
+    with conn:
+        row = conn.execute("SELECT created, accepted, data FROM challenges WHERE id = ?", (history_id,)).fetchone()
+        if row is None or row[1] is not None:
+            return
+        conn.execute("UPDATE challenges SET accepted = ?, session_id = ? WHERE id = ?",
+                     (time.time(), session_id, history_id))
+        _bump_daily(conn, _day(row[0]), list(_win_rows(json.loads(row[2]))), "accepted_wins")
+
+def mark_closed(history_id, elapsed, wins_done, path=HISTORY_DB):
+    """Timerstand (Sekunden) und erledigte Wins beim Schließen des Ergebnisfensters."""
+    if history_id is None:
+        return
+    conn = _connect(path)
+    with conn:
+        row = conn.execute("SELECT total_diff, num_wins, closed FROM challenges WHERE id = ?", (history_id,)).fetchone()
+        if row is None or row[2] is not None:
+            return
+        total_diff, num_wins, _ = row
+        conn.execute("UPDATE challenges SET closed = ?, elapsed = ?, wins_done = ? WHERE id = ?",
+                     (time.time(), elapsed, wins_done, history_id))
+        if wins_done == num_wins and elapsed > 0:
+            conn.execute(
+                "INSERT INTO difficulty_stats (unit, completed, diff_sum, elapsed_sum) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT (unit) DO UPDATE SET completed = completed + 1, "
+                "diff_sum = diff_sum + excluded.diff_sum, elapsed_sum = elapsed_sum + excluded.elapsed_sum",
+                (int(total_diff), total_diff, elapsed))
+
+@instrument("history.wins_per_game")
+def wins_per_game(days=30, accepted_only=False, now=None, path=HISTORY_DB):
+    """[(spiel, wins)] der letzten days Tage, absteigend nach wins."""
+    column = "accepted_wins" if accepted_only else "wins"
+    since = _day(time.time() if now is None else now) - days + 1
+    return _connect(path).execute(
+        # +game: sonst wählt SQLite idx_daily_game für das GROUP BY und liest alle Tage
+        f"SELECT game, SUM({column}) AS n FROM game_daily WHERE day >= ? GROUP BY +game HAVING n > 0 "
+        "ORDER BY n DESC, game", (since,)).fetchall()
+
+def wins_per_mode(game, days=30, accepted_only=False, now=None, path=HISTORY_DB):
+    column = "accepted_wins" if accepted_only else "wins"
+    since = _day(time.time() if now is None else now) - days + 1
+    return _connect(path).execute(
+        f"SELECT mode, SUM({column}) AS n FROM game_daily WHERE game = ? AND day >= ? GROUP BY mode HAVING n > 0 "
+        "ORDER BY n DESC, mode", (game, since)).fetchall()
+
+@instrument("history.completion_by_difficulty")
+def completion_by_difficulty(bucket=5, path=HISTORY_DB):
+    """
+    [(untergrenze, anzahl, mittlere_zeit_s)] je Schwierigkeitsbereich der
+    (ganzzahligen) Breite bucket, nur vollständig erledigte Challenges mit Timerstand.
+    """
+    rows = _connect(path).execute(
+        "SELECT unit / ? AS b, SUM(completed), SUM(elapsed_sum) FROM difficulty_stats "
+        "GROUP BY b ORDER BY b", (int(bucket),)).fetchall()
+    return [(b * int(bucket), count, total / count) for b, count, total in rows if count]
+
+def seconds_per_difficulty(path=HISTORY_DB):
+    """Mittlere Spielzeit pro Schwierigkeitspunkt aus erledigten Challenges, None ohne Daten."""
+    total_diff, total_elapsed = _connect(path).execute(
+        "SELECT SUM(diff_sum), SUM(elapsed_sum) FROM difficulty_stats").fetchone()
+    if not total_diff:
+        return None
+    return total_elapsed / total_diff
+
+def recent(limit=200, game=None, mode=None, path=HISTORY_DB):
+    """Neueste Challenges (optional nur mit game/mode) als Liste von dicts ohne die JSON-Daten."""
+    columns = "c.id, c.created, c.seed, c.total_diff, c.num_wins, c.session_id, c.accepted, c.closed, c.elapsed, c.wins_done"
+    if game is None:
+        sql = f"SELECT {columns} FROM challenges c ORDER BY c.created DESC LIMIT ?"
+        params = (limit,)
+    else:
+        condition = "w.game = ?" + (" AND w.mode = ?" if mode is not None else "")
+        sql = (f"SELECT {columns} FROM challenges c WHERE c.id IN "
+               f"(SELECT w.challenge_id FROM challenge_wins w WHERE {condition}) ORDER BY c.created DESC LIMIT ?")
+        params = (game, mode, limit) if mode is not None else (game, limit)
+    names = [c.split(".")[1] for c in columns.split(", ")]
+    return [dict(zip(names, row)) for row in _connect(path).execute(sql, params)]
+
+def load_challenge(history_id, path=HISTORY_DB):
+    row = _connect(path).execute("SELECT data FROM challenges WHERE id = ?", (history_id,)).fetchone()
+    return json.loads(row[0]) if row is not None else None
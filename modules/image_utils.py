@@ -1,10 +1,30 @@
 # modules/image_utils.py
 from PIL import Image, ImageDraw, ImageFont
 from io import BytesIO
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+import os
+import threading
+import zipfile
 import win32clipboard
 import win32con
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
+from config import EXPORT_DIR, EXPORT_FORMAT, EXPORT_WORKERS
+from modules.profiling import instrument
 
+# Dateiendung -> PIL-Format
+EXPORT_FORMATS = {"png": "PNG", "jpg": "JPEG", "jpeg": "JPEG", "webp": "WEBP"}
+
+_executor = None
+
+def _get_executor():
+    # Der Worker-Pool wird erst beim ersten Export erzeugt und danach wiederverwendet.
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="image-export")
+    return _executor
+
+@instrument("create_result_image")
 def create_result_image(result_text):
     lines = result_text.split("\n")
     try:
@@ -24,10 +44,107 @@ def create_result_image(result_text):
         y += line_height
     return img
 
-def export_result_as_image(result_text):
+def _format_from_path(path):
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    if ext not in EXPORT_FORMATS:
+        raise ValueError(f"Nicht unterstütztes Bildformat: .{ext}")
+    return EXPORT_FORMATS[ext]
+
+def encode_result_image(result_text, fmt):
+    """
+    Rendert den Ergebnistext und gibt das Bild als Bytes im gewünschten
+    Format (PNG, JPEG oder WEBP) zurück. Läuft im Worker-Thread.
+    """
     img = create_result_image(result_text)
-    img.save("challenge_result.jpg")
-    messagebox.showinfo("Erfolg", "Challenge als Bild gespeichert: challenge_result.jpg")
+    output = BytesIO()
+    if fmt == "JPEG":
+        img.save(output, fmt, quality=90)
+    else:
+        img.save(output, fmt)
+    return output.getvalue()
+
+def save_result_image(result_text, path):
+    data = encode_result_image(result_text, _format_from_path(path))
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def default_export_path(fmt=EXPORT_FORMAT):
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(EXPORT_DIR, f"challenge_{stamp}.{fmt}")
+
+def when_done(root, future, callback, interval=50):
+    """
+    Ruft callback(future) im Tk-Thread auf, sobald future fertig ist.
+    Tk darf nur aus dem Hauptthread angesprochen werden, deshalb wird
+    per after() gepollt statt add_done_callback zu verwenden.
+    """
+    def poll():
+        if future.done():
+            callback(future)
+        else:
+            root.after(interval, poll)
+    root.after(interval, poll)
+
+def export_result_as_image(result_text, root, path=None):
+    if path is None:
+        initial = default_export_path()
+        path = filedialog.asksaveasfilename(
+            parent=root,
+            initialdir=os.path.dirname(initial),
+            initialfile=os.path.basename(initial),
+            defaultextension=f".{EXPORT_FORMAT}",
+            filetypes=[("PNG", "*.png"), ("JPEG", "*.jpg *.jpeg"), ("WebP", "*.webp")])
+        if not path:
+            return None
+    future = _get_executor().submit(save_result_image, result_text, path)
+    def done(f):
+        if f.exception() is not None:
+            messagebox.showerror("Fehler", f"Export fehlgeschlagen: {f.exception()}")
+        else:
+            messagebox.showinfo("Erfolg", f"Challenge als Bild gespeichert: {f.result()}")
+    when_done(root, future, done)
+    return future
+
+def export_batch(result_texts, target, fmt=EXPORT_FORMAT):
+    """
+    Rendert mehrere Challenges parallel. Endet target auf ".zip", landen
+    alle Bilder in einem Archiv, sonst als einzelne Dateien im Verzeichnis
+    target. Gibt ein Future zurück, dessen Ergebnis die Liste der
+    geschriebenen Dateinamen ist.
+    """
+    pil_format = EXPORT_FORMATS[fmt.lower()]
+    names = [f"challenge_{i:03d}.{fmt.lower()}" for i in range(1, len(result_texts) + 1)]
+    executor = _get_executor()
+    batch_future = Future()
+    if target.lower().endswith(".zip"):
+        renders = [executor.submit(encode_result_image, text, pil_format) for text in result_texts]
+        def collect():
+            try:
+                directory = os.path.dirname(target)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # Bilder sind bereits komprimiert, daher ZIP_STORED
+                with zipfile.ZipFile(target, "w", zipfile.ZIP_STORED) as zf:
+                    for name, render in zip(names, renders):
+                        zf.writestr(name, render.result())
+                batch_future.set_result(names)
+            except Exception as e:
+                batch_future.set_exception(e)
+    else:
+        paths = [os.path.join(target, name) for name in names]
+        renders = [executor.submit(save_result_image, text, path) for text, path in zip(result_texts, paths)]
+        def collect():
+            try:
+                batch_future.set_result([render.result() for render in renders])
+            except Exception as e:
+                batch_future.set_exception(e)
+    # Das Einsammeln wartet in einem eigenen Thread, damit es keinen Pool-Worker blockiert.
+    threading.Thread(target=collect, daemon=True).start()
+    return batch_future
 
 def send_to_clipboard(clip_type, data):
     win32clipboard.OpenClipboard()
@@ -35,11 +152,15 @@ def send_to_clipboard(clip_type, data):
     win32clipboard.SetClipboardData(clip_type, data)
     win32clipboard.CloseClipboard()
 
-def copy_image_to_clipboard(result_text):
-    img = create_result_image(result_text)
-    output = BytesIO()
-    img.convert("RGB").save(output, "BMP")
-    data = output.getvalue()[14:]  # BMP-Header entfernen
-    output.close()
-    send_to_clipboard(win32con.CF_DIB, data)
-    messagebox.showinfo("Erfolg", "Bild wurde in die Zwischenablage kopiert.")
+def copy_image_to_clipboard(result_text, root):
+    # Rendern im Worker, die Zwischenablage selbst wird im Tk-Thread gesetzt.
+    future = _get_executor().submit(encode_result_image, result_text, "BMP")
+    def done(f):
+        if f.exception() is not None:
+            messagebox.showerror("Fehler", f"Bild konnte nicht erzeugt werden: {f.exception()}")
+            return
+        data = f.result()[14:]  # BMP-Header entfernen
+        send_to_clipboard(win32con.CF_DIB, data)
+        messagebox.showinfo("Erfolg", "Bild wurde in die Zwischenablage kopiert.")
+    when_done(root, future, done)
+    return future
@@ -0,0 +1,121 @@
+# modules/presets.py
+import json
+import os
+import threading
+from modules.catalog_shards import catalog_entries, catalog_stamp, shards
+from modules.file_lock import atomic_write
+from modules.challenge_generator import build_candidate_pool
+from modules.sampling import EntrySampler
+from modules.profiling import instrument
+from config import PRESETS_FILE
+
+# Ein Preset speichert die ausgewählten Spiele mit Gewicht, erlaubten Modi und Constraints:
+# {"games": {spiel: {"weight": "1.0", "allowed_modes": [...], "min_wins": None, "max_wins": None, "mode_caps": {}}}}
+
+def load_presets(path=PRESETS_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_presets(presets, path=PRESETS_FILE):
+    with atomic_write(path) as f:
+        json.dump(presets, f, ensure_ascii=False, indent=2)
+
+def capture_preset(game_vars):
+    """Aktuelle Auswahl aus game_vars als Preset (nur ausgewählte Spiele)."""
+    games = {}
+    for game, gv in game_vars.items():
+        if not gv["selected"].get():
+            continue
+        games[game] = {
+            "weight": gv["weight"].get(),
+            "allowed_modes": sorted(gv["allowed_modes"]),
+            "min_wins": gv.get("min_wins"),
+            "max_wins": gv.get("max_wins"),
+            "mode_caps": dict(gv.get("mode_caps") or {}),
+        }
+    return {"games": games}
+
+def apply_preset(preset, game_vars):
+    """
+    Überträgt ein Preset in game_vars: Spiele des Presets werden ausgewählt,
+    alle anderen abgewählt. Gibt die Spiele zurück, die es im Katalog nicht
+    (mehr) gibt.
+    """
+    games = preset["games"]
+    for game, gv in game_vars.items():
+        settings = games.get(game)
+        gv["selected"].set(settings is not None)
+        if settings is None:
+            continue
+        gv["weight"].set(settings["weight"])
+        allowed = set(settings["allowed_modes"]) & gv["available_modes"]
+        gv["allowed_modes"] = allowed or set(gv["available_modes"])
+        gv["min_wins"] = settings.get("min_wins")
+        gv["max_wins"] = settings.get("max_wins")
+        gv["mode_caps"] = {m: cap for m, cap in (settings.get("mode_caps") or {}).items() if m in gv["allowed_modes"]}
+    return [game for game in games if game not in game_vars]
+
+def preset_matches(preset, game_vars):
+    """True, solange die Auswahl in game_vars seit dem Laden nicht verändert wurde."""
+    return capture_preset(game_vars) == preset
+
+def _parse_weight(text):
+    try:
+        return float(text)
+    except ValueError:
+        return 1.0
+
+# Vorkompilierte Pläne: (name, spieleranzahl) -> {"stamp", "preset", "pool", "sampler"}
+_plans = {}
+_plans_lock = threading.Lock()
+
+@instrument("presets.compile_plan")
+def compile_plan(preset, num_players):
+    """Filtert den Katalog für ein Preset vor (pool) und baut den EntrySampler dazu."""
+    games = list(preset["games"])
+    stamp = catalog_stamp(games)
+    weights = [_parse_weight(preset["games"][g]["weight"]) for g in games]
+    preset_vars = {g: {"allowed_modes": set(s["allowed_modes"])} for g, s in preset["games"].items()}
+    pool = build_candidate_pool(catalog_entries(games), num_players, games, weights, preset_vars)
+    sampler = EntrySampler(*pool) if pool is not None else None
+    return {"stamp": stamp, "preset": preset, "pool": pool, "sampler": sampler}
+
+def get_plan(name, preset, num_players):
+    """
+    Plan für ein Preset; wird neu kompiliert, wenn sich der Katalog bzw. einer
+    der beteiligten Shards (Versionszähler, mtime oder Größe) oder das Preset
+    geändert hat.
+    Gibt None zurück, wenn das Preset keine passenden Einträge hat.
+    """
+    key = (name, num_players)
+    with _plans_lock:
+        plan = _plans.get(key)
+        if plan is None or plan["stamp"] != catalog_stamp(list(preset["games"])) or plan["preset"] != preset:
+            plan = _plans[key] = compile_plan(preset, num_players)
+    return plan if plan["pool"] is not None else None
+
+def warm_plans(presets, num_players):
+    """
+    Kompiliert alle Presets im Hintergrund vor, damit der erste Klick nichts
+    filtern muss. Presets mit Spielen aus noch nicht geladenen Shards werden
+    übersprungen: ihr Plan wäre unvollständig und nach dem Laden der Shards
+    (anderer catalog_stamp) ohnehin neu zu kompilieren.
+    """
+    def run():
+        for name, preset in list(presets.items()):
+            if shards.shards_for(preset["games"]) - set(shards.loaded):
+                continue
+            get_plan(name, preset, num_players)
+    thread = threading.Thread(target=run, name="preset-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def forget_plan(name):
+    with _plans_lock:
+        for key in [k for k in _plans if k[0] == name]:
+            del _plans[key]
@@ -0,0 +1,149 @@
+# modules/preview.py
+from concurrent.futures import ThreadPoolExecutor
+from modules.challenge_distribution import challenge_distribution, expected_length_summary
+from modules.profiling import instrument
+from config import PREVIEW_DEBOUNCE_MS
+
+# Nach so vielen Einzeländerungen wird die Mischung neu aufsummiert (Rundungsfehler)
+REBUILD_AFTER_PATCHES = 1000
+
+def _parse_weight(text):
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        return 1.0
+
+class PreviewModel:
+    """
+    Verteilung der Schwierigkeit eines Wins für die Live-Vorschau, inkrementell
+    gepflegt. Jedes Spiel trägt eine eigene Verteilung (gleichverteilt über
+    seine erlaubten Einträge) bei; die Mischung mix[d] = Summe(gewicht * p_spiel[d])
+    wird bei Gewichts- oder Modusänderungen eines Spiels nur um dessen Beitrag
+    korrigiert, statt über alle Spiele neu zu rechnen.
+    """
+    def __init__(self):
+        self.entries_by_game = {}
+        self.components = {}
+        self.weights = {}
+        self.mix = {}
+        self.total_weight = 0.0
+        self.num_players = None
+        self._patches = 0
+
+    @instrument("PreviewModel.rebuild")
+    def rebuild(self, entries, num_players, game_vars):
+        self.num_players = num_players
+        self.entries_by_game = {}
+        for e in entries:
+            if e["Spieleranzahl"] >= num_players:
+                self.entries_by_game.setdefault(e["Spiel"], []).append(e)
+        self.components = {game: self._component(game, game_vars) for game in game_vars}
+        self.weights = {game: self._weight(game, game_vars) for game in game_vars}
+        self._resum()
+
+    def _component(self, game, game_vars):
+        allowed = game_vars[game]["allowed_modes"]
+        game_entries = [e for e in self.entries_by_game.get(game, ()) if e["Spielmodus"] in allowed]
+        pmf = {}
+        for e in game_entries:
+            pmf[e["Schwierigkeit"]] = pmf.get(e["Schwierigkeit"], 0.0) + 1.0 / len(game_entries)
+        return pmf
+
+    @staticmethod
+    def _weight(game, game_vars):
+        gv = game_vars[game]
+        return _parse_weight(gv["weight"].get()) if gv["selected"].get() else 0.0
+
+    def _resum(self):
+        self.mix = {}
+        self.total_weight = 0.0
+        for game, pmf in self.components.items():
+            weight = self.weights.get(game, 0.0)
+            if weight <= 0 or not pmf:
+                continue
+            self.total_weight += weight
+            for d, p in pmf.items():
+                self.mix[d] = self.mix.get(d, 0.0) + weight * p
+        self._patches = 0
+
+    def _patch(self, pmf, delta):
+        if not pmf or delta == 0:
+            return
+        self.total_weight += delta
+        for d, p in pmf.items():
+            self.mix[d] = self.mix.get(d, 0.0) + delta * p
+        self._patches += 1
+
+    def update_game(self, game, game_vars, modes_changed=False):
+        """Übernimmt Auswahl, Gewicht (und ggf. Modi) eines Spiels; kostet O(Schwierigkeitsstufen des Spiels)."""
+        if game not in game_vars:
+            self.remove_game(game)
+            return
+        old_pmf = self.components.get(game, {})
+        old_weight = self.weights.get(game, 0.0)
+        new_pmf = self._component(game, game_vars) if modes_changed or game not in self.components else old_pmf
+        new_weight = self._weight(game, game_vars)
+        self.components[game] = new_pmf
+        self.weights[game] = new_weight
+        if self._patches >= REBUILD_AFTER_PATCHES:
+            self._resum()
+        elif new_pmf is old_pmf:
+            self._patch(old_pmf, new_weight - old_weight)
+        else:
+            self._patch(old_pmf, -old_weight)
+            self._patch(new_pmf, new_weight)
+
+    def remove_game(self, game):
+        self._patch(self.components.pop(game, {}), -self.weights.pop(game, 0.0))
+
+    def win_pmf(self):
+        if self.total_weight <= 1e-12:
+            return {}
+        return {d: p / self.total_weight for d, p in self.mix.items() if p > 1e-12}
+
+class LivePreview:
+    """
+    Entprellt Änderungen (PREVIEW_DEBOUNCE_MS) und rechnet die Verteilung in
+    einem Hintergrundthread, damit die Oberfläche nicht stockt. inputs() wird
+    im Tk-Thread aufgerufen und liefert (win_pmf, raw_b2b, desired_diff) oder
+    einen Hinweistext; on_result(text) erhält die Zusammenfassung. Ergebnisse
+    veralteter Anfragen werden verworfen.
+    """
+    def __init__(self, root, inputs, on_result, delay=PREVIEW_DEBOUNCE_MS):
+        self.root = root
+        self.inputs = inputs
+        self.on_result = on_result
+        self.delay = delay
+        self._after_id = None
+        self._sequence = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview")
+
+    def schedule(self, delay=None):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay if delay is None else delay, self._fire)
+
+    def _fire(self):
+        self._after_id = None
+        self._sequence += 1
+        sequence = self._sequence
+        inputs = self.inputs()
+        if isinstance(inputs, str):
+            self.on_result(inputs)
+            return
+        future = self._executor.submit(_summarize, *inputs)
+        def poll():
+            if sequence != self._sequence:
+                return  # inzwischen neue Anfrage
+            if not future.done():
+                self.root.after(30, poll)
+            elif future.exception() is not None:
+                self.on_result(f"Vorschau fehlgeschlagen: {future.exception()}")
+            else:
+                self.on_result(future.result())
+        self.root.after(30, poll)
+
+def _summarize(win_pmf, raw_b2b, desired_diff):
+    if not win_pmf:
+        return "Keine passenden Einträge für die Vorschau."
+    return expected_length_summary(challenge_distribution(win_pmf, raw_b2b, desired_diff))
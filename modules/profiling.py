@@ -0,0 +1,178 @@
+# modules/profiling.py
+import atexit
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from config import PROFILING_ENABLED, PROFILE_OUTPUT
+
+# Aktivierung über Umgebungsvariable oder config.PROFILING_ENABLED:
+#   WCG_PROFILE=1         Aufrufzähler und Latenz-Histogramme
+#   WCG_PROFILE=cprofile  zusätzlich cProfile über die gesamte Laufzeit
+# Ist nichts aktiv, geben instrument() und timed() die Originalfunktion
+# bzw. einen leeren Kontext zurück und kosten praktisch nichts.
+ENV_VAR = "WCG_PROFILE"
+_mode = os.environ.get(ENV_VAR, "1" if PROFILING_ENABLED else "0").strip().lower()
+enabled = _mode not in ("", "0", "false", "no")
+
+# Obere Grenzen der Histogramm-Buckets in Sekunden: 50 µs, 100 µs, 200 µs, ... ~ 100 s
+BUCKETS = [0.00005 * 2 ** i for i in range(22)]
+
+class _Stat:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, q):
+        # Schätzung aus dem Histogramm: obere Grenze des Buckets, in dem q liegt
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target and n:
+                return min(BUCKETS[i] if i < len(BUCKETS) else self.max, self.max)
+        return self.max
+
+_stats = {}
+_lock = threading.Lock()  # Bild-Rendering läuft in Worker-Threads
+
+def record(name, seconds):
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = _Stat()
+        stat.add(seconds)
+
+class _Timed:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+class _NullTimed:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullTimed()
+
+def timed(name):
+    """Kontextmanager, der die Laufzeit des Blocks unter name erfasst."""
+    if not enabled:
+        return _NULL
+    return _Timed(name)
+
+def instrument(name):
+    """Decorator, der jeden Aufruf der Funktion unter name erfasst."""
+    def decorator(func):
+        if not enabled:
+            return func
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def snapshot():
+    with _lock:
+        items = list(_stats.items())
+    result = {}
+    for name, stat in sorted(items):
+        result[name] = {
+            "count": stat.count,
+            "total_ms": stat.total * 1000,
+            "mean_ms": stat.total / stat.count * 1000,
+            "min_ms": stat.min * 1000,
+            "max_ms": stat.max * 1000,
+            "p50_ms": stat.percentile(0.5) * 1000,
+            "p95_ms": stat.percentile(0.95) * 1000,
+            "histogram": {f"<={bound * 1000:g}ms": n for bound, n in zip(BUCKETS, stat.buckets) if n},
+        }
+    return result
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+def dump_json(path=PROFILE_OUTPUT + ".json"):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    return path
+
+_profiler = None
+if enabled and _mode == "cprofile":
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+def _dump_at_exit():
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(PROFILE_OUTPUT + ".prof")
+    if _stats:
+        dump_json()
+
+if enabled:
+    atexit.register(_dump_at_exit)
+
+def show_stats_window(root):
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+    win = tk.Toplevel(root)
+    win.title("Profiling")
+    win.configure(bg="#2B2B2B")
+    columns = ("Name", "Aufrufe", "Mittel (ms)", "p50 (ms)", "p95 (ms)", "Max (ms)", "Gesamt (ms)")
+    tree = ttk.Treeview(win, columns=columns, show="headings", height=15)
+    for col in columns:
+        tree.heading(col, text=col)
+        tree.column(col, width=260 if col == "Name" else 90, anchor="w" if col == "Name" else "e")
+    tree.pack(fill="both", expand=True, padx=10, pady=10)
+    def refresh():
+        tree.delete(*tree.get_children())
+        for name, s in snapshot().items():
+            tree.insert("", "end", values=(name, s["count"], f"{s['mean_ms']:.2f}", f"{s['p50_ms']:.2f}",
+                                           f"{s['p95_ms']:.2f}", f"{s['max_ms']:.2f}", f"{s['total_ms']:.1f}"))
+    def save():
+        path = dump_json()
+        messagebox.showinfo("Erfolg", f"Statistik gespeichert: {path}", parent=win)
+    def clear():
+        reset()
+        refresh()
+    buttons = ttk.Frame(win)
+    buttons.pack(pady=(0, 10))
+    ttk.Button(buttons, text="Aktualisieren", command=refresh).pack(side="left", padx=5)
+    ttk.Button(buttons, text="Als JSON speichern", command=save).pack(side="left", padx=5)
+    ttk.Button(buttons, text="Zurücksetzen", command=clear).pack(side="left", padx=5)
+    refresh()
@@ -0,0 +1,318 @@
+# modules/sampling.py
+import bisect
+import copy
+import json
+import math
+import os
+import random
+from config import RECENCY_FILE, RECENCY_DECAY, RECENCY_STRENGTH
+
+class FenwickSampler:
+    """
+    Gewichtete Zufallsauswahl über n Elemente mit veränderlichen Gewichten.
+    Ziehen und Ändern eines Gewichts kosten jeweils O(log n), da die
+    Präfixsummen in einem Fenwick-Baum (Binary Indexed Tree) liegen.
+    """
+    def __init__(self, weights):
+        self.n = len(weights)
+        self.weights = [max(0.0, float(w)) for w in weights]
+        self._updates = 0
+        self._build()
+
+    def _build(self):
+        # Aufbau in O(n): jeder Knoten gibt seine Summe an den Elternknoten weiter
+        tree = [0.0] + self.weights
+        for i in range(1, self.n + 1):
+            parent = i + (i & -i)
+            if parent <= self.n:
+                tree[parent] += tree[i]
+        self.tree = tree
+        self._top = 1 << (self.n.bit_length() - 1) if self.n else 0
+
+    def total(self):
+        total = 0.0
+        i = self.n
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def update(self, index, weight):
+        weight = max(0.0, float(weight))
+        delta = weight - self.weights[index]
+        if delta == 0:
+            return
+        self.weights[index] = weight
+        i = index + 1
+        while i <= self.n:
+            self.tree[i] += delta
+            i += i & -i
+        # Rundungsfehler der aufsummierten Deltas gelegentlich verwerfen
+        self._updates += 1
+        if self._updates > self.n + 64:
+            self._updates = 0
+            self._build()
+
+    def sample(self, rng=random):
+        """Index mit Wahrscheinlichkeit weights[i] / total(), oder None, wenn alle Gewichte 0 sind."""
+        total = self.total()
+        if total <= 0:
+            return None
+        u = rng.random() * total
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and self.tree[nxt] <= u:
+                pos = nxt
+                u -= self.tree[nxt]
+            step >>= 1
+        # pos ist der 0-basierte Index; wegen Rundung ggf. auf ein Element mit Gewicht > 0 ausweichen
+        if pos >= self.n or self.weights[pos] <= 0:
+            pos = max(i for i in range(self.n) if self.weights[i] > 0)
+        return pos
+
+def entry_key(entry):
+    return f"{entry['Spiel']}|{entry['Spielmodus']}"
+
+class RecencyState:
+    """
+    "Hitze" kürzlich gezogener (Spiel, Spielmodus)-Kombinationen. Jede
+    Ziehung erhöht die Hitze um 1, nach jeder Generierung wird sie mit
+    RECENCY_DECAY multipliziert. Nur Einträge mit spürbarer Hitze werden
+    gespeichert, daher kostet das Abklingen O(Anzahl heißer Einträge).
+    """
+    def __init__(self, heat=None):
+        self.heat = heat or {}
+
+    @classmethod
+    def load(cls, path=RECENCY_FILE):
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls({k: float(v) for k, v in json.load(f).items()})
+        except (OSError, ValueError):
+            return cls()
+
+    def save(self, path=RECENCY_FILE):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.heat, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def factor(self, key):
+        # Gewichtsfaktor: exp(-Stärke * Hitze), 1.0 für nie gezogene Einträge
+        heat = self.heat.get(key)
+        return 1.0 if heat is None else math.exp(-RECENCY_STRENGTH * heat)
+
+    def bump(self, key):
+        self.heat[key] = self.heat.get(key, 0.0) + 1.0
+
+    def unbump(self, key):
+        heat = self.heat.get(key, 0.0) - 1.0
+        if heat > 1e-9:
+            self.heat[key] = heat
+        else:
+            self.heat.pop(key, None)
+
+    def decay(self):
+        self.heat = {k: h * RECENCY_DECAY for k, h in self.heat.items() if h * RECENCY_DECAY >= 0.01}
+
+class EntrySampler:
+    """
+    Zieht einzelne Wins wie die normale Auswahl (Spielgewicht, dann
+    gleichverteilt innerhalb des Spiels). Der Fenwick-Baum läuft über die
+    (Spiel, Spielmodus)-Kombinationen, deren Gewicht optional mit dem
+    Recency-Faktor multipliziert wird; gesperrte Kombinationen (siehe
+    ConstrainedDrawer) haben Gewicht 0. Nach einer Ziehung ändert sich
+    höchstens ein Gewicht. Innerhalb einer Kombination (mehrere Zeilen mit
+    unterschiedlicher Spieleranzahl) wird per bisect gezogen. rng ist die
+    Zufallsquelle (random.Random oder das Modul random).
+    """
+    def __init__(self, available_games, valid_games, valid_weights, recency=None, rng=random):
+        self.recency = recency
+        self.rng = rng
+        self.keys = []
+        self.key_game = []
+        self.key_mode = []
+        self.key_base = []
+        self.key_entries = []
+        self.key_cumulative = []
+        self.key_index = {}
+        self.game_keys = {}
+        for game, weight in zip(valid_games, valid_weights):
+            game_entries = available_games[game]
+            entry_weight = weight / len(game_entries)
+            for entry in game_entries:
+                key = entry_key(entry)
+                i = self.key_index.get(key)
+                if i is None:
+                    i = self.key_index[key] = len(self.keys)
+                    self.keys.append(key)
+                    self.key_game.append(entry["Spiel"])
+                    self.key_mode.append(entry["Spielmodus"])
+                    self.key_base.append(0.0)
+                    self.key_entries.append([])
+                    self.key_cumulative.append([])
+                    self.game_keys.setdefault(entry["Spiel"], []).append(i)
+                self.key_base[i] += entry_weight
+                self.key_entries[i].append(entry)
+                self.key_cumulative[i].append(self.key_base[i])
+        self.masked = bytearray(len(self.keys))
+        self.fenwick = FenwickSampler([self._weight(i) for i in range(len(self.keys))])
+
+    def _weight(self, i):
+        if self.masked[i]:
+            return 0.0
+        if self.recency is None:
+            return self.key_base[i]
+        return self.key_base[i] * self.recency.factor(self.keys[i])
+
+    def mask(self, i):
+        if not self.masked[i]:
+            self.masked[i] = 1
+            self.fenwick.update(i, 0.0)
+
+    def clone(self, recency=None, rng=random):
+        """
+        Frische Kopie ohne Sperren und mit eigenem Fenwick-Baum; die nach
+        Spiel/Modus gruppierten Tabellen werden geteilt und nicht neu aufgebaut.
+        """
+        other = copy.copy(self)
+        other.recency = recency
+        other.rng = rng
+        other.masked = bytearray(len(self.keys))
+        other.fenwick = FenwickSampler([other._weight(i) for i in range(len(self.keys))])
+        return other
+
+    def unmask(self, i):
+        if self.masked[i]:
+            self.masked[i] = 0
+            self.fenwick.update(i, self._weight(i))
+
+    def is_masked(self, entry):
+        return bool(self.masked[self.key_index[entry_key(entry)]])
+
+    def undraw(self, entry):
+        """Nimmt die Recency-Erhöhung einer Ziehung zurück (z.B. für ein verworfenes Segment)."""
+        if self.recency is not None:
+            i = self.key_index[entry_key(entry)]
+            self.recency.unbump(self.keys[i])
+            self.fenwick.update(i, self._weight(i))
+
+    def record(self, entry):
+        """Erhöht die Recency für einen Eintrag, der nicht über draw() gewählt wurde."""
+        if self.recency is not None:
+            i = self.key_index[entry_key(entry)]
+            self.recency.bump(self.keys[i])
+            self.fenwick.update(i, self._weight(i))
+
+    def draw(self, game=None):
+        """Zieht einen Win (optional nur aus game); None, wenn nichts mehr ziehbar ist."""
+        if game is None:
+            i = self.fenwick.sample(self.rng)
+            if i is None:
+                return None
+        else:
+            candidates = [k for k in self.game_keys.get(game, ()) if self.fenwick.weights[k] > 0]
+            if not candidates:
+                return None
+            i = self.rng.choices(candidates, weights=[self.fenwick.weights[k] for k in candidates], k=1)[0]
+        entries = self.key_entries[i]
+        if len(entries) == 1:
+            entry = entries[0]
+        else:
+            cumulative = self.key_cumulative[i]
+            j = bisect.bisect_right(cumulative, self.rng.random() * cumulative[-1])
+            entry = entries[min(j, len(entries) - 1)]
+        if self.recency is not None:
+            self.recency.bump(self.keys[i])
+            self.fenwick.update(i, self._weight(i))
+        return entry
+
+class ConstrainedDrawer:
+    """
+    Setzt Mindest- und Höchstanzahlen je Spiel sowie Höchstanzahlen je
+    Spielmodus direkt beim Ziehen durch: Erreicht ein Spiel (oder ein Modus)
+    sein Maximum, werden seine Kombinationen im EntrySampler gesperrt, der
+    Fenwick-Baum normiert dabei automatisch neu. Pflicht-Wins (Minimum)
+    werden zuerst gezogen. constraints hat die Form
+    {spiel: {"min": int|None, "max": int|None, "mode_caps": {modus: int}}}.
+    """
+    def __init__(self, sampler, constraints, rng=random):
+        self.sampler = sampler
+        self.constraints = constraints
+        self.game_counts = {}
+        self.mode_counts = {}
+        self.required = []
+        self.history = []
+        for game, rule in constraints.items():
+            self.required.extend([game] * (rule.get("min") or 0))
+            self._apply_masks(game)
+        rng.shuffle(self.required)
+
+    def _apply_masks(self, game):
+        # Nur die Kombinationen dieses Spiels neu bewerten: O(Modi * log n)
+        rule = self.constraints.get(game)
+        if not rule:
+            return
+        game_full = rule.get("max") is not None and self.game_counts.get(game, 0) >= rule["max"]
+        mode_caps = rule.get("mode_caps") or {}
+        for i in self.sampler.game_keys.get(game, ()):
+            mode = self.sampler.key_mode[i]
+            cap = mode_caps.get(mode)
+            if game_full or (cap is not None and self.mode_counts.get((game, mode), 0) >= cap):
+                self.sampler.mask(i)
+            else:
+                self.sampler.unmask(i)
+
+    def register(self, entry, forced=False):
+        game = entry["Spiel"]
+        self.game_counts[game] = self.game_counts.get(game, 0) + 1
+        key = (game, entry["Spielmodus"])
+        self.mode_counts[key] = self.mode_counts.get(key, 0) + 1
+        self.history.append(forced)
+        self._apply_masks(game)
+
+    def unregister(self, wins):
+        """Nimmt die zuletzt gezogenen wins zurück (z.B. ein verworfenes Segment)."""
+        for entry in reversed(wins):
+            game = entry["Spiel"]
+            self.game_counts[game] -= 1
+            self.mode_counts[(game, entry["Spielmodus"])] -= 1
+            if self.history.pop():
+                self.required.append(game)
+            self._apply_masks(game)
+
+    def allows(self, entry):
+        return not self.sampler.is_masked(entry)
+
+    def draw_required(self):
+        """Nächster Pflicht-Win, oder None, wenn keiner mehr offen (bzw. erfüllbar) ist."""
+        while self.required:
+            entry = self.sampler.draw(self.required.pop())
+            if entry is not None:
+                self.register(entry, forced=True)
+                return entry
+            # Spiel ist bereits vollständig gesperrt (Minimum > Maximum), Pflicht-Win entfällt
+        return None
+
+    def draw(self):
+        entry = self.draw_required()
+        if entry is not None:
+            return entry
+        entry = self.sampler.draw()
+        if entry is not None:
+            self.register(entry)
+        return entry
+
+def constraints_from_game_vars(valid_games, game_vars):
+    """Liest min_wins/max_wins/mode_caps aus game_vars; leeres Dict, wenn nichts gesetzt ist."""
+    constraints = {}
+    for game in valid_games:
+        gv = game_vars[game]
+        rule = {"min": gv.get("min_wins"), "max": gv.get("max_wins"), "mode_caps": gv.get("mode_caps") or {}}
+        if rule["min"] or rule["max"] is not None or rule["mode_caps"]:
+            constraints[game] = rule
+    return constraints
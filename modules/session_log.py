@@ -0,0 +1,163 @@
+# modules/session_log.py
+import json
+import os
+import time
+import uuid
+from config import SESSION_DIR, SESSION_COMPACT_EVENTS
+
+# Pro Session liegen drei Dateien in SESSION_DIR:
+#   <id>.challenge.json  Challenge-Daten (normal/b2b/result), einmalig geschrieben
+#   <id>.state.json      kompakter Stand (erledigte Wins, Timer) zum Zeitpunkt der letzten Kompaktierung
+#   <id>.log             seitdem angehängte Ereignisse, eine JSON-Zeile pro Ereignis
+
+def _path(session_id, suffix):
+    return os.path.join(SESSION_DIR, f"{session_id}.{suffix}")
+
+def _write_json_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class SessionLog:
+    """
+    Persistente Session einer akzeptierten Challenge. Jede Änderung
+    (Win abgehakt, Timer gestartet/pausiert/zurückgesetzt) wird als kleine
+    Zeile an das Log angehängt; der Stand lässt sich nach einem Absturz
+    durch Einlesen von Snapshot und Log wiederherstellen.
+    """
+    def __init__(self, session_id, challenge, state, elapsed, running, timer_wall, finished=False):
+        self.id = session_id
+        self.challenge = challenge
+        self.state = state
+        # elapsed ist der Timerstand zum Zeitpunkt timer_wall (time.time())
+        self.elapsed = elapsed
+        self.running = running
+        self.timer_wall = timer_wall
+        self.finished = finished
+        self.events = 0
+        self._log = None
+
+    @classmethod
+    def create(cls, challenge_data, num_wins):
+        os.makedirs(SESSION_DIR, exist_ok=True)
+        session_id = time.strftime("%Y%m%d_%H%M%S") + "_" + uuid.uuid4().hex[:6]
+        session = cls(session_id, challenge_data, bytearray(num_wins), 0.0, False, time.time())
+        _write_json_atomic(_path(session_id, "challenge.json"), challenge_data)
+        session._write_snapshot()
+        return session
+
+    @classmethod
+    def load(cls, session_id):
+        """Liest Snapshot und Log ein und spielt die Ereignisse nach."""
+        with open(_path(session_id, "challenge.json"), "r", encoding="utf-8") as f:
+            challenge = json.load(f)
+        with open(_path(session_id, "state.json"), "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        state = bytearray(snapshot["num_wins"])
+        for index in snapshot["done"]:
+            state[index] = 1
+        session = cls(session_id, challenge, state, snapshot["elapsed"], snapshot["running"],
+                      snapshot["wall"], snapshot.get("finished", False))
+        log_path = _path(session_id, "log")
+        if os.path.exists(log_path):
+            with open(log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        break  # unvollständige letzte Zeile nach Absturz
+                    session.events += 1
+                    if event["e"] == "win":
+                        state[event["i"]] = event["v"]
+                    elif event["e"] == "timer":
+                        session.elapsed = event["elapsed"]
+                        session.running = event["a"] == "start" or (event["a"] == "reset" and session.running)
+                        session.timer_wall = event["t"]
+        if session.running:
+            # Der Timer lief beim Absturz weiter, die Zwischenzeit zählt mit
+            now = time.time()
+            session.elapsed += max(0.0, now - session.timer_wall)
+            session.timer_wall = now
+        return session
+
+    def _write_snapshot(self):
+        _write_json_atomic(_path(self.id, "state.json"), {
+            "num_wins": len(self.state),
+            "done": [i for i, v in enumerate(self.state) if v],
+            "elapsed": self.elapsed,
+            "running": self.running,
+            "wall": self.timer_wall,
+            "finished": self.finished,
+        })
+
+    def _append(self, event):
+        event.setdefault("t", time.time())
+        if self._log is None:
+            self._log = open(_path(self.id, "log"), "a", encoding="utf-8")
+        self._log.write(json.dumps(event) + "\n")
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self.events += 1
+        if self.events >= SESSION_COMPACT_EVENTS:
+            self.compact()
+
+    def log_win(self, index, value):
+        self.state[index] = value
+        self._append({"e": "win", "i": index, "v": value})
+
+    def log_timer(self, action, elapsed):
+        self.elapsed = elapsed
+        self.running = action == "start" or (action == "reset" and self.running)
+        self.timer_wall = time.time()
+        self._append({"e": "timer", "a": action, "elapsed": elapsed, "t": self.timer_wall})
+
+    def compact(self):
+        """Schreibt den aktuellen Stand als Snapshot und leert das Log."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        self._write_snapshot()
+        log_path = _path(self.id, "log")
+        if os.path.exists(log_path):
+            os.remove(log_path)
+        self.events = 0
+
+    def close(self, finished):
+        """
+        finished=True: Fenster wurde vom Nutzer geschlossen, die Session ist beendet.
+        finished=False: Programm wird beendet, die Session bleibt wiederherstellbar.
+        """
+        self.finished = finished
+        self.compact()
+
+def list_sessions():
+    if not os.path.isdir(SESSION_DIR):
+        return []
+    return sorted(name[:-len(".challenge.json")] for name in os.listdir(SESSION_DIR)
+                  if name.endswith(".challenge.json"))
+
+def load_open_sessions():
+    """
+    Lädt alle nicht beendeten Sessions. Nebenbei werden die Logs aller
+    Sessions in ihre Snapshots eingefaltet, damit das nächste Laden nur
+    noch den Snapshot lesen muss.
+    """
+    sessions = []
+    for session_id in list_sessions():
+        try:
+            if not os.path.exists(_path(session_id, "log")):
+                # Beendete und bereits kompaktierte Sessions nicht komplett laden
+                with open(_path(session_id, "state.json"), "r", encoding="utf-8") as f:
+                    if json.load(f).get("finished", False):
+                        continue
+            session = SessionLog.load(session_id)
+        except (OSError, ValueError, KeyError):
+            continue
+        if session.events:
+            session.compact()
+        if not session.finished:
+            sessions.append(session)
+    return sessions
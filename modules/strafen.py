@@ -1,14 +1,20 @@
 # modules/strafen.py
 import csv
+import itertools
 import os
-from config import STRAFEN_CSV
+import random
+from config import STRAFEN_CSV, STRAFEN_CHANCE
+from modules.profiling import instrument
+from modules.file_lock import atomic_write, exclusive
+from modules.win_tracker import win_rows
 
 def ensure_strafen_csv():
     if not os.path.exists(STRAFEN_CSV):
-        with open(STRAFEN_CSV, "w", newline="", encoding="utf-8") as f:
+        with atomic_write(STRAFEN_CSV) as f:
             writer = csv.writer(f)
             writer.writerow(["Name", "Wahrscheinlichkeit", "Beschreibung"])
 
+@instrument("load_strafen")
 def load_strafen():
     ensure_strafen_csv()
     entries = []
@@ -22,8 +28,9 @@ def load_strafen():
             entries.append(row)
     return entries
 
+@instrument("write_strafen")
 def write_strafen(entries):
-    with open(STRAFEN_CSV, "w", newline="", encoding="utf-8") as f:
+    with atomic_write(STRAFEN_CSV) as f:
         writer = csv.writer(f)
         writer.writerow(["Name", "Wahrscheinlichkeit", "Beschreibung"])
         for entry in entries:
@@ -34,20 +41,58 @@ def update_strafe(index, new_entry):
     Aktualisiert den Strafen-Eintrag an der gegebenen Indexposition.
     new_entry: dict mit den Schlüsseln "Name", "Wahrscheinlichkeit" und "Beschreibung".
     """
-    entries = load_strafen()
-    if index < 0 or index >= len(entries):
-        raise IndexError("Strafen-Eintrag existiert nicht.")
-    entries[index] = new_entry
-    write_strafen(entries)
+    with exclusive(STRAFEN_CSV):
+        entries = load_strafen()
+        if index < 0 or index >= len(entries):
+            raise IndexError("Strafen-Eintrag existiert nicht.")
+        entries[index] = new_entry
+        write_strafen(entries)
 
 def delete_strafe(index):
     """
     Löscht den Strafen-Eintrag an der gegebenen Indexposition.
     """
-    entries = load_strafen()
-    if index < 0 or index >= len(entries):
-        raise IndexError("Strafen-Eintrag existiert nicht.")
-    del entries[index]
-    write_strafen(entries)
+    with exclusive(STRAFEN_CSV):
+        entries = load_strafen()
+        if index < 0 or index >= len(entries):
+            raise IndexError("Strafen-Eintrag existiert nicht.")
+        del entries[index]
+        write_strafen(entries)
 
+@instrument("schedule_strafen")
+def schedule_strafen(challenge_data, num_players, strafen=None, chance=STRAFEN_CHANCE, rng=random):
+    """
+    Plant die Strafen für eine ganze Challenge im Voraus: für jeden Win
+    (Reihenfolge wie im Win-Tracking, siehe win_rows) und jeden Spieler
+    wird in einem einzigen rng.choices-Aufruf gezogen. "Keine Strafe" ist
+    eine eigene Option mit Wahrscheinlichkeit 1 - chance; ansonsten wird
+    eine Strafe proportional zu ihrer Wahrscheinlichkeit gewählt.
+    Gibt {"players", "names", "slots"} zurück (slots[win * players + spieler]
+    ist ein Index in names oder -1) bzw. None, wenn nichts zu planen ist.
+    """
+    if strafen is None:
+        strafen = load_strafen()
+    active = [s for s in strafen if s["Wahrscheinlichkeit"] > 0]
+    num_wins = sum(count for _, count in win_rows(challenge_data))
+    if not active or num_wins == 0 or num_players < 1 or chance <= 0:
+        return None
+    cumulative = list(itertools.accumulate(s["Wahrscheinlichkeit"] for s in active))
+    none_weight = cumulative[-1] * (1 - chance) / chance if chance < 1 else 0.0
+    cum_weights = [none_weight] + [none_weight + c for c in cumulative]
+    slots = rng.choices(range(-1, len(active)), cum_weights=cum_weights, k=num_wins * num_players)
+    return {"players": num_players, "names": [s["Name"] for s in active], "slots": slots}
 
+def iter_strafen_plan_lines(challenge_data):
+    """Strafenplan zeilenweise, nur Wins mit mindestens einer Strafe."""
+    plan = challenge_data.get("strafen_plan")
+    if not plan:
+        return
+    players, names, slots = plan["players"], plan["names"], plan["slots"]
+    win = 0
+    for label, count in win_rows(challenge_data):
+        for number in range(1, count + 1):
+            picks = slots[win * players:(win + 1) * players]
+            hits = [f"Spieler {p}: {names[i]}" for p, i in enumerate(picks, 1) if i >= 0]
+            if hits:
+                yield f"{label[:-1]} #{number} – " + ", ".join(hits) + "\n"
+            win += 1
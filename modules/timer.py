@@ -0,0 +1,147 @@
+# modules/timer.py
+import heapq
+import itertools
+import math
+import time
+
+def format_elapsed(seconds):
+    total = int(seconds)
+    hrs = total // 3600
+    mins = (total % 3600) // 60
+    secs = total % 60
+    return f"{hrs:02d}:{mins:02d}:{secs:02d}"
+
+class TimerScheduler:
+    """
+    Gemeinsamer after()-Loop für beliebig viele Timer eines Tk-Roots.
+    Es ist immer höchstens ein after()-Callback aktiv, und zwar nur,
+    solange mindestens ein Timer läuft. Fällige Ticks liegen in einem
+    Heap, sortiert nach dem monotonic()-Zeitpunkt der nächsten vollen Sekunde.
+    """
+    def __init__(self, root):
+        self.root = root
+        self._queue = []  # (due, seq, token, timer)
+        self._seq = itertools.count()
+        self._after_id = None
+        self._after_due = None
+
+    def schedule(self, timer):
+        heapq.heappush(self._queue, (timer.next_due(), next(self._seq), timer.token, timer))
+        self.refresh()
+
+    def _is_valid(self, item):
+        _, _, token, timer = item
+        return timer.running and timer.token == token
+
+    def refresh(self):
+        # Verwaiste Einträge (pausiert, zurückgesetzt, abgebrochen) vorne entfernen
+        while self._queue and not self._is_valid(self._queue[0]):
+            heapq.heappop(self._queue)
+        if not self._queue:
+            if self._after_id is not None:
+                self.root.after_cancel(self._after_id)
+                self._after_id = None
+                self._after_due = None
+            return
+        due = self._queue[0][0]
+        if self._after_id is not None:
+            if self._after_due <= due:
+                return
+            self.root.after_cancel(self._after_id)
+        delay = max(0, math.ceil((due - time.monotonic()) * 1000))
+        self._after_due = due
+        self._after_id = self.root.after(delay, self._run)
+
+    def _run(self):
+        self._after_id = None
+        self._after_due = None
+        now = time.monotonic()
+        while self._queue and self._queue[0][0] <= now:
+            item = heapq.heappop(self._queue)
+            if not self._is_valid(item):
+                continue
+            timer = item[3]
+            timer.tick()
+            if timer.running:
+                heapq.heappush(self._queue, (timer.next_due(), next(self._seq), timer.token, timer))
+        self.refresh()
+
+def get_scheduler(root):
+    # Ein Scheduler pro Tk-Root, wird beim ersten Timer angelegt.
+    scheduler = getattr(root, "_timer_scheduler", None)
+    if scheduler is None:
+        scheduler = TimerScheduler(root)
+        root._timer_scheduler = scheduler
+    return scheduler
+
+class ChallengeTimer:
+    """
+    Stoppuhr auf Basis von time.monotonic(). Die verstrichene Zeit wird
+    immer aus Startzeitpunkt und bereits angesammelter Zeit berechnet,
+    verpasste oder verspätete Ticks führen daher nicht zu Drift.
+    on_tick(elapsed) wird bei Start/Pause/Reset und zu jeder vollen Sekunde aufgerufen.
+    """
+    def __init__(self, scheduler, on_tick):
+        self.scheduler = scheduler
+        self.on_tick = on_tick
+        self.token = 0
+        self._accumulated = 0.0
+        self._started_at = None
+
+    @property
+    def running(self):
+        return self._started_at is not None
+
+    def elapsed(self):
+        if self._started_at is None:
+            return self._accumulated
+        return self._accumulated + (time.monotonic() - self._started_at)
+
+    def next_due(self):
+        # Zeitpunkt, an dem elapsed() die nächste volle Sekunde erreicht
+        elapsed = self.elapsed()
+        return time.monotonic() + (math.floor(elapsed) + 1 - elapsed) + 0.002
+
+    def tick(self):
+        self.on_tick(self.elapsed())
+
+    def start(self):
+        if self.running:
+            return
+        self._started_at = time.monotonic()
+        self.token += 1
+        self.scheduler.schedule(self)
+        self.tick()
+
+    def pause(self):
+        if not self.running:
+            return
+        self._accumulated = self.elapsed()
+        self._started_at = None
+        self.token += 1
+        self.scheduler.refresh()
+        self.tick()
+
+    def reset(self):
+        self._accumulated = 0.0
+        self.token += 1
+        if self.running:
+            self._started_at = time.monotonic()
+            self.scheduler.schedule(self)
+        self.tick()
+
+    def cancel(self):
+        # Beim Schließen des Fensters: keine weiteren Ticks, kein Callback mehr
+        self._accumulated = self.elapsed()
+        self._started_at = None
+        self.token += 1
+        self.scheduler.refresh()
+
+    def restore(self, elapsed, running):
+        # Stand aus einer gespeicherten Session übernehmen
+        self.cancel()
+        self._accumulated = elapsed
+        if running:
+            self.start()
+        else:
+            self.tick()
@@ -0,0 +1,119 @@
+# modules/win_tracker.py
+import tkinter as tk
+from tkinter import ttk
+from bisect import bisect_right
+
+CELL_SIZE = 18
+CELL_GAP = 4
+CELLS_PER_LINE = 20
+LABEL_WIDTH = 300
+COUNTER_WIDTH = 60
+ROW_PADDING = 6
+COLOR_OPEN = "#1E1E1E"
+COLOR_DONE = "#4CAF50"
+COLOR_BORDER = "#808080"
+
+def win_rows(challenge_data):
+    """
+    Liefert die Zeilen des Win-Trackings als Liste von (Beschriftung, Anzahl),
+    zuerst die Normal Wins, danach die Back-to-Back Segmente.
+    """
+    rows = []
+    for key, info in challenge_data["normal"].items():
+        rows.append((f"{key}:", info["count"]))
+    for i, seg in enumerate(challenge_data["b2b"], 1):
+        for key, count in seg["group"].items():
+            rows.append((f"Segment {i} – {key}:", count))
+    return rows
+
+class WinTracker:
+    """
+    Zeichnet alle Wins als Kästchen-Raster auf einen einzigen Canvas statt
+    ein Checkbutton-Widget pro Win anzulegen. Der Fortschritt liegt in
+    self.state (ein Byte pro Win); ein Klick ändert genau ein Byte und
+    färbt genau ein Canvas-Item sowie den Zähler der Zeile um.
+    on_change(index, value) wird nach jeder Änderung aufgerufen.
+    """
+    def __init__(self, parent, rows, on_change=None, max_height=300):
+        self.rows = rows
+        self.on_change = on_change
+        self.state = bytearray(sum(count for _, count in rows))
+        self.row_offsets = []   # Index des ersten Wins jeder Zeile in self.state
+        self.row_tops = []      # y-Koordinate jeder Zeile (für bisect beim Klick)
+        self.cell_items = []    # Canvas-Item-ID pro Win
+        self.counter_items = []
+        self.done_per_row = [0] * len(rows)
+        self.max_height = max_height
+
+        self.frame = tk.Frame(parent, bg="#2B2B2B")
+        self.canvas = tk.Canvas(self.frame, bg="#2B2B2B", highlightthickness=0,
+                                width=LABEL_WIDTH + COUNTER_WIDTH + CELLS_PER_LINE * (CELL_SIZE + CELL_GAP))
+        scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self._draw()
+        self.canvas.bind("<Button-1>", self._on_click)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def _draw(self):
+        y = ROW_PADDING
+        offset = 0
+        for row_index, (label, count) in enumerate(self.rows):
+            lines = max(1, -(-count // CELLS_PER_LINE))
+            self.row_offsets.append(offset)
+            self.row_tops.append(y)
+            self.canvas.create_text(5, y + CELL_SIZE // 2, text=label, anchor="w",
+                                    fill="#FFFFFF", font=("Segoe UI", 12), width=LABEL_WIDTH - 10)
+            self.counter_items.append(self.canvas.create_text(
+                LABEL_WIDTH, y + CELL_SIZE // 2, text=f"0/{count}", anchor="w",
+                fill="#DCDCDC", font=("Segoe UI", 10)))
+            for i in range(count):
+                x0, y0 = self._cell_origin(y, i)
+                self.cell_items.append(self.canvas.create_rectangle(
+                    x0, y0, x0 + CELL_SIZE, y0 + CELL_SIZE, fill=COLOR_OPEN, outline=COLOR_BORDER))
+            offset += count
+            y += lines * (CELL_SIZE + CELL_GAP) + ROW_PADDING
+        self.row_tops.append(y)
+        # Bei wenigen Wins schrumpft der Canvas, ab max_height wird gescrollt
+        self.canvas.configure(scrollregion=(0, 0, int(self.canvas["width"]), y), height=min(self.max_height, y))
+
+    def _cell_origin(self, row_top, i):
+        line, col = divmod(i, CELLS_PER_LINE)
+        x0 = LABEL_WIDTH + COUNTER_WIDTH + col * (CELL_SIZE + CELL_GAP)
+        y0 = row_top + line * (CELL_SIZE + CELL_GAP)
+        return x0, y0
+
+    def _on_click(self, event):
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        row_index = bisect_right(self.row_tops, y) - 1
+        if not (0 <= row_index < len(self.rows)):
+            return
+        col, col_rest = divmod(x - LABEL_WIDTH - COUNTER_WIDTH, CELL_SIZE + CELL_GAP)
+        line, line_rest = divmod(y - self.row_tops[row_index], CELL_SIZE + CELL_GAP)
+        if col < 0 or col >= CELLS_PER_LINE or col_rest > CELL_SIZE or line_rest > CELL_SIZE:
+            return
+        i = int(line) * CELLS_PER_LINE + int(col)
+        if i >= self.rows[row_index][1]:
+            return
+        index = self.row_offsets[row_index] + i
+        self.set(index, not self.state[index])
+
+    def _row_of(self, index):
+        return bisect_right(self.row_offsets, index) - 1
+
+    def set(self, index, value, notify=True):
+        value = 1 if value else 0
+        if self.state[index] == value:
+            return
+        self.state[index] = value
+        row_index = self._row_of(index)
+        self.done_per_row[row_index] += 1 if value else -1
+        self.canvas.itemconfig(self.cell_items[index], fill=COLOR_DONE if value else COLOR_OPEN)
+        self.canvas.itemconfig(self.counter_items[row_index],
+                               text=f"{self.done_per_row[row_index]}/{self.rows[row_index][1]}")
+        if notify and self.on_change is not None:
+            self.on_change(index, value)